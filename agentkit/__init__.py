@@ -1,11 +1,54 @@
-from agentkit.actions.action import Action  # noqa: F401
-from agentkit.actions.action import ActionException  # noqa: F401
-from agentkit.actions.factories.function import action  # noqa: F401
-from agentkit.llms.client.chain import chain_completion  # noqa: F401
-from agentkit.llms.client.chat import completion  # noqa: F401
-
-from agentkit.workflow.workflow import Workflow  # noqa: F401
-from agentkit.workflow.state import State  # noqa: F401
-from agentkit.workflow.transition import Transition  # noqa: F401
-from agentkit.workflow.event import Event  # noqa: F401
-from agentkit.workflow.event import EventData  # noqa: F401
+"""Top-level exports, imported on first access.
+
+``from agentkit import Workflow`` only loads the workflow engine, the LLM stack
+(``litellm``, ``openai``) is loaded when ``completion``, ``chain_completion`` or
+``batch_completion`` is first used.
+"""
+
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+_EXPORTS = {
+    "Action": "agentkit.actions.action",
+    "ActionException": "agentkit.actions.action",
+    "action": "agentkit.actions.factories.function",
+    "batch_completion": "agentkit.llms.client.batch",
+    "chain_completion": "agentkit.llms.client.chain",
+    "completion": "agentkit.llms.client.chat",
+    "Workflow": "agentkit.workflow.workflow",
+    "State": "agentkit.workflow.state",
+    "Transition": "agentkit.workflow.transition",
+    "Event": "agentkit.workflow.event",
+    "EventData": "agentkit.workflow.event",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module), name)
+    # Later accesses are plain module attribute lookups
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted({*globals(), *_EXPORTS})
+
+
+if TYPE_CHECKING:
+    from agentkit.actions.action import Action  # noqa: F401
+    from agentkit.actions.action import ActionException  # noqa: F401
+    from agentkit.actions.factories.function import action  # noqa: F401
+    from agentkit.llms.client.batch import batch_completion  # noqa: F401
+    from agentkit.llms.client.chain import chain_completion  # noqa: F401
+    from agentkit.llms.client.chat import completion  # noqa: F401
+
+    from agentkit.workflow.workflow import Workflow  # noqa: F401
+    from agentkit.workflow.state import State  # noqa: F401
+    from agentkit.workflow.transition import Transition  # noqa: F401
+    from agentkit.workflow.event import Event  # noqa: F401
+    from agentkit.workflow.event import EventData  # noqa: F401
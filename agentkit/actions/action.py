@@ -1,19 +1,71 @@
 from __future__ import annotations
 
+import asyncio
+import functools
+import hashlib
+import importlib
+import inspect
+import json
 import logging
+import pickle
+import uuid
+import weakref
 from typing import Any
 from typing import Callable
 from typing import Dict
 from typing import List
 
+from pydantic import BaseModel
+
+from agentkit.actions.process import ProcessPool
 from agentkit.telemetry import traceable
 from agentkit.utils import DEFAULT_ACTION_SCOPE
+from agentkit.utils.response_cache import InMemoryResponseCache
+from agentkit.utils.response_cache import ResponseCache
+from agentkit.utils.workflow import run_async_from_sync
+from agentkit.utils.workflow import run_coroutine_sync
+
+_MISSING = object()
+
+# Cache namespace of the instances of bound actions, see InstanceAction.cache_key
+_INSTANCE_KEYS: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
 
 
 class ActionException(Exception):
     pass
 
 
+# Bounded, as models are generated for every decorated function, see pydantic_utils
+@functools.lru_cache(maxsize=1024)
+def _serialized_json_schema(pydantic_model) -> str:
+    return json.dumps(pydantic_model.model_json_schema())
+
+
+def model_json_schema(pydantic_model) -> dict:
+    """JSON schema of an action's arguments, generated once as it is sent on every turn.
+
+    Each call returns a new copy, decoded from the cached serialized schema, which is
+    cheaper than a deep copy, so callers may modify it.
+    """
+    return json.loads(_serialized_json_schema(pydantic_model))
+
+
+def keyword_arguments(arguments: BaseModel) -> dict:
+    """Keyword arguments of a call from its validated arguments: the explicitly set fields, by
+    alias, the names the model validates its input from."""
+    fields = type(arguments).model_fields
+    return {
+        fields[name].alias or name: getattr(arguments, name) for name in arguments.model_fields_set
+    }
+
+
+def import_action(module: str, qualname: str):
+    target = importlib.import_module(module)
+    for name in qualname.split("."):
+        target = getattr(target, name)
+    return target
+
+
 class Action:
     def __init__(
         self,
@@ -26,11 +78,27 @@ class Action:
         logger=None,
         logging_metadata: dict | None = None,
         logging_level=logging.INFO,
+        timeout: float | None = None,
+        serialize_key: str | None = None,
+        depends_on: List[str] | None = None,
+        cacheable: bool = False,
+        cache: ResponseCache | None = None,
+        model_factory: Callable[[], type[BaseModel]] | None = None,
+        process_pool: ProcessPool | bool | None = None,
     ):
         self.name = name
         self.logger = logger
         self.stop = stop
         self.decorators = decorators or []
+        # Scheduling of the calls made in a single response, see ToolExecutor
+        self.timeout = timeout
+        self.serialize_key = serialize_key
+        self.depends_on = list(depends_on or [])
+        # Results of tool calls are cached by validated arguments, see invoke
+        self.cacheable = cacheable or cache is not None
+        self.cache = cache if cache is not None or not self.cacheable else InMemoryResponseCache()
+        # CPU-bound tools run in worker processes, see ProcessPool
+        self.process_pool = ProcessPool.default() if process_pool is True else process_pool or None
 
         if function.__doc__ is None and description is None:
             raise ActionException(
@@ -38,9 +106,14 @@ class Action:
             )
         self.description = description or function.__doc__
 
-        self.pydantic_model = pydantic_model
+        # With `model_factory`, the model is only generated when first needed, see
+        # `pydantic_model`
+        self._pydantic_model = pydantic_model
+        self._model_factory = model_factory if pydantic_model is None else None
 
         self.undecorated_function = function
+        # Coroutine functions are awaited, see `acall`, or run on a loop by sync callers
+        self.is_async = inspect.iscoroutinefunction(function)
         for decorator in self.decorators:
             function = decorator(function)
         self.function = function
@@ -58,9 +131,24 @@ class Action:
         self.__qualname__ = self.function.__qualname__
         self.__annotations__ = self.function.__annotations__
         self.__doc__ = self.function.__doc__
+        self._unbound = None
+        # Actions bound to instances, referenced weakly both ways, see `__get__`
+        self._bound: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    @property
+    def pydantic_model(self) -> type[BaseModel]:
+        if self._pydantic_model is None and self._model_factory is not None:
+            self._pydantic_model = self._model_factory()
+            self._model_factory = None
+        return self._pydantic_model
+
+    @pydantic_model.setter
+    def pydantic_model(self, pydantic_model: type[BaseModel]):
+        self._pydantic_model = pydantic_model
+        self._model_factory = None
 
     def json_schema(self):
-        return self.pydantic_model.model_json_schema()
+        return model_json_schema(self.pydantic_model)
 
     def get_function_details(self):
         return {
@@ -69,37 +157,154 @@ class Action:
             "parameters": self.json_schema(),
         }
 
+    def options(self) -> dict:
+        return {
+            "timeout": self.timeout,
+            "serialize_key": self.serialize_key,
+            "depends_on": self.depends_on,
+            "cacheable": self.cacheable,
+            "cache": self.cache,
+            "process_pool": self.process_pool,
+        }
+
+    def cache_key(self, arguments: BaseModel) -> str | None:
+        payload = arguments.model_dump_json().encode("utf-8")
+        return f"{self.name}:{hashlib.sha256(payload).hexdigest()}"
+
+    def decode_arguments(self, raw: str | bytes) -> BaseModel:
+        """Validate the raw JSON arguments of a tool call into ``pydantic_model`` in one pass."""
+        return self.pydantic_model.model_validate_json(raw)
+
+    def invoke(self, arguments: dict | BaseModel) -> Any:
+        """Call the action with the arguments of a tool call, through the cache if cacheable.
+
+        ``arguments`` is either a dict or an instance of ``pydantic_model``, e.g. from
+        :meth:`decode_arguments`, whose explicitly set fields are passed by alias as they
+        were validated. The cache key is the action name and the validated arguments, so
+        arguments that only differ in representation (``"1"`` and ``1`` for an ``int``)
+        share their entry. Only successful, picklable results are cached, for the ``ttl``
+        of the cache.
+
+        Async actions are run to completion, see :meth:`call_sync`.
+        """
+        arguments, key, result = self.lookup(arguments)
+        if result is _MISSING:
+            result = self.call_sync(**arguments)
+            self.store(key, result)
+        return result
+
+    async def ainvoke(self, arguments: dict | BaseModel) -> Any:
+        """Like :meth:`invoke`, awaiting the action, see :meth:`acall`."""
+        arguments, key, result = self.lookup(arguments)
+        if result is _MISSING:
+            result = await self.acall(**arguments)
+            self.store(key, result)
+        return result
+
+    def lookup(self, arguments: dict | BaseModel):
+        """Keyword arguments of a call, its cache key and its cached result, or ``_MISSING``."""
+        validated = None
+        if isinstance(arguments, BaseModel):
+            validated = arguments
+            arguments = keyword_arguments(validated)
+
+        if not self.cacheable:
+            return arguments, None, _MISSING
+
+        if validated is None:
+            validated = self.pydantic_model.model_validate(arguments)
+        key = self.cache_key(validated)
+        if key is None:
+            return arguments, None, _MISSING
+        return arguments, key, self.cache.get(key, _MISSING)
+
+    def store(self, key: str | None, result: Any):
+        if key is None:
+            return
+        try:
+            self.cache.set(key, result)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            pass
+
+    def call_function(self, *args: Any, **kwargs: Any) -> Any:
+        return self.function(*args, **kwargs)
+
+    def call_sync(self, *args: Any, **kwargs: Any) -> Any:
+        """Call the action and return its result, running async actions to completion.
+
+        Coroutines run on the thread's loop shared with the workflow engine, or on a
+        background loop when the thread is already running one. Actions with a
+        ``process_pool`` run in one of its worker processes.
+        """
+        if self.process_pool is not None:
+            return self.process_pool.run(self, args, kwargs, timeout=self.timeout)
+        result = self.call_function(*args, **kwargs)
+        if inspect.isawaitable(result):
+            result = run_coroutine_sync(result)
+        return result
+
+    async def acall(self, *args: Any, **kwargs: Any) -> Any:
+        """Await the action. Sync actions run in a thread, so they don't block the loop."""
+        if self.process_pool is not None:
+            return await self.process_pool.arun(self, args, kwargs, timeout=self.timeout)
+        if self.is_async:
+            result = self.call_function(*args, **kwargs)
+        else:
+            result = await asyncio.to_thread(self.call_function, *args, **kwargs)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
     def bind(self, instance) -> InstanceAction:
-        return InstanceAction(
-            self.name,
-            self.function,
-            self.pydantic_model,
-            self.logger,
-            self.stop,
-            instance=instance,
-        )
+        return InstanceAction.from_action(self, instance)
 
     def __call__(self, *args: Any, **kwargs: Any) -> Any:
-        response = self.function(*args, **kwargs)
+        """Call the action. Async actions return a coroutine when called from a running loop,
+        and are run to completion otherwise."""
+        response = self.call_function(*args, **kwargs)
+        if self.is_async:
+            response = run_async_from_sync(response)
 
         return response
 
+    def __set_name__(self, owner, name):
+        self.attribute_name = name
+
     def __get__(self, instance, owner) -> InstanceAction:
         """
 
         Note:
             The `__get__` method is a descriptor method that is called when the action is accessed from an instance.
             It returns an instance-specific action method that is bound to the given instance.
+            The bound action is cached as long as it is referenced, so that accessing it
+            again returns the same action, without keeping the instance alive.
         """
-        return InstanceAction(
-            self.name,
-            self.function,
-            self.pydantic_model,
-            self.logger,
-            self.stop,
-            instance=instance,
-            decorators=self.decorators,
-        )
+        if instance is None:
+            if self._unbound is None:
+                self._unbound = self.bind(None)
+            return self._unbound
+
+        try:
+            ref = self._bound.get(instance)
+        except TypeError:
+            # Instances that can't be weakly referenced are bound on every access
+            return self.bind(instance)
+        bound = ref() if ref is not None else None
+        if bound is None:
+            bound = self.bind(instance)
+            self._bound[instance] = weakref.ref(bound)
+        return bound
+
+    def __reduce__(self):
+        # Pickled by reference like functions, e.g. to run in a ProcessPool, when defined at
+        # module level
+        try:
+            found = import_action(self.__module__, self.__qualname__) is self
+        except (ImportError, AttributeError):
+            found = False
+        if found:
+            return import_action, (self.__module__, self.__qualname__)
+        return super().__reduce__()
 
     def __hash__(self) -> int:
         return self.name.__hash__()
@@ -112,6 +317,12 @@ class Action:
 
 
 class InstanceAction(Action):
+    """An action bound to an instance, passed as the first argument of its function.
+
+    Attributes other than ``instance`` are read from the bound action when accessed, so
+    they follow its changes.
+    """
+
     def __init__(
         self,
         name,
@@ -121,15 +332,64 @@ class InstanceAction(Action):
         stop=False,
         instance=None,
         decorators=None,
+        **options,
     ):
-        super().__init__(name, function, pydantic_model, stop=stop, logger=logger)
-        self.instance = instance
-        self.pydantic_model = pydantic_model
-
-    def __call__(self, *args: Any, **kwargs: Any) -> Any:
-        response = self.function(self.instance, *args, **kwargs)
+        action = Action(
+            name,
+            function,
+            pydantic_model,
+            stop=stop,
+            decorators=decorators,
+            logger=logger,
+            **options,
+        )
+        self.__dict__.update(InstanceAction.from_action(action, instance).__dict__)
 
-        return response
+    @classmethod
+    def from_action(cls, action: Action, instance) -> InstanceAction:
+        """Bind ``action`` to ``instance``, sharing its already decorated and traced function."""
+        bound = cls.__new__(cls)
+        bound.action = action
+        bound.instance = instance
+        for name in functools.WRAPPER_ASSIGNMENTS:
+            if name in action.__dict__:
+                bound.__dict__[name] = action.__dict__[name]
+        return bound
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            action = self.__dict__["action"]
+        except KeyError:
+            raise AttributeError(name) from None
+        return getattr(action, name)
+
+    @property
+    def pydantic_model(self) -> type[BaseModel]:
+        return self.action.pydantic_model
+
+    @pydantic_model.setter
+    def pydantic_model(self, pydantic_model: type[BaseModel]):
+        self.action.pydantic_model = pydantic_model
+
+    def call_function(self, *args: Any, **kwargs: Any) -> Any:
+        return self.function(self.instance, *args, **kwargs)
+
+    def __reduce__(self):
+        # Pickled and copied by reference to the instance attribute
+        name = getattr(self, "attribute_name", None)
+        if name is None or self.instance is None:
+            raise TypeError(f"Cannot pickle the bound action {self.name}")
+        return getattr, (self.instance, name)
+
+    def cache_key(self, arguments: BaseModel) -> str | None:
+        # Entries are namespaced by a random key living as long as the instance, unlike its
+        # `id`, so they are never shared with other instances, sessions or processes.
+        # Instances that can't be weakly referenced aren't cached
+        try:
+            namespace = _INSTANCE_KEYS.setdefault(self.instance, uuid.uuid4().hex)
+        except TypeError:
+            return None
+        return f"{super().cache_key(arguments)}@{namespace}"
 
 
 class ActionHandlers:
@@ -1,27 +1,52 @@
+import functools
 from typing import List
 
 from agentkit.actions import Action
+from agentkit.actions.factories.fanout import SERIAL
+from agentkit.actions.factories.fanout import invoker
+from agentkit.actions.factories.fanout import reduce_calls
+from agentkit.actions.factories.fanout import validate_strategy
 from agentkit.actions.factories.function import action
 from agentkit.utils.pydantic_utils import create_pydantic_model_from_func
 
 
 def combine(
-    acts: List[Action | None], name: str = None, description: str = None, reducer=None
+    acts: List[Action | None],
+    name: str = None,
+    description: str = None,
+    reducer=None,
+    strategy: str = SERIAL,
+    max_concurrency: int | None = None,
+    capture_errors: bool = False,
+    streaming: bool = False,
 ) -> Action:
-    reducer = reducer
-    func = create_combined_function(acts, reducer)
+    """
+    Combine actions into one, called with the arguments of any of them.
+
+    The actions run with the given ``strategy`` (``"serial"``, ``"thread"`` or ``"asyncio"``)
+    and ``max_concurrency``. With ``capture_errors``, a failing action yields an ``ItemError``
+    in place of its result instead of failing the whole call. With ``streaming``, the
+    reducer gets an iterator of the results as they complete rather than a list in order.
+    """
+    validate_strategy(strategy, max_concurrency)
+    func = create_combined_function(
+        acts, reducer, strategy, max_concurrency, capture_errors, streaming
+    )
     name = name or generate_name(acts)
     description = description or ""
     return create_action(func, name, description, acts)
 
 
-def create_combined_function(acts, reducer):
+def create_combined_function(
+    acts, reducer, strategy=SERIAL, max_concurrency=None, capture_errors=False, streaming=False
+):
     def func(**kwargs):
-        results = []
-        for act in acts:
-            if act is not None and act.name in kwargs:
-                results.append(act(**kwargs[act.name]))
-        return reducer(results)
+        calls = [
+            functools.partial(invoker(act, strategy), kwargs[act.name])
+            for act in acts
+            if act is not None and act.name in kwargs
+        ]
+        return reduce_calls(calls, reducer, strategy, max_concurrency, capture_errors, streaming)
 
     return func
 
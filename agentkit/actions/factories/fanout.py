@@ -0,0 +1,190 @@
+import asyncio
+import inspect
+import queue
+import threading
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from typing import Any
+from typing import Callable
+from typing import Iterator
+from typing import List
+from typing import NamedTuple
+from typing import Tuple
+
+SERIAL = "serial"
+THREAD = "thread"
+ASYNCIO = "asyncio"
+STRATEGIES = (SERIAL, THREAD, ASYNCIO)
+
+
+class ItemError(NamedTuple):
+    """Result of an item that failed, in place of its result when errors are captured."""
+
+    index: int
+    error: BaseException
+
+    def __str__(self):
+        return f"Error: {type(self.error).__name__}: {self.error}"
+
+
+def validate_strategy(strategy: str, max_concurrency: int | None):
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Invalid strategy {strategy!r}, expected one of {STRATEGIES}")
+    if max_concurrency is not None and max_concurrency < 1:
+        raise ValueError(f"Invalid max_concurrency {max_concurrency}, expected at least 1")
+
+
+def fan_out(
+    calls: List[Callable[[], Any]],
+    strategy: str = SERIAL,
+    max_concurrency: int | None = None,
+    capture_errors: bool = False,
+) -> Iterator[Tuple[int, Any]]:
+    """Run ``calls`` and yield ``(index, result)`` pairs as they complete.
+
+    With the ``serial`` strategy the calls run one after another in the caller's thread.
+    With ``thread`` they run on a thread pool, and with ``asyncio`` on an event loop where
+    coroutine functions are awaited and other calls run in threads; in both cases at most
+    ``max_concurrency`` at the same time, all of them when omitted.
+
+    When a call fails, its error is yielded as an :class:`ItemError` if ``capture_errors``,
+    otherwise the calls that didn't start are cancelled and the error is raised.
+    """
+    validate_strategy(strategy, max_concurrency)
+    if not calls:
+        return iter(())
+    width = min(max_concurrency or len(calls), len(calls))
+    if strategy == SERIAL or (strategy == THREAD and width == 1):
+        return run_serial(calls, capture_errors)
+    if strategy == THREAD:
+        return run_threads(calls, width, capture_errors)
+    return run_asyncio(calls, width, capture_errors)
+
+
+def reduce_calls(
+    calls: List[Callable[[], Any]],
+    reducer: Callable,
+    strategy: str = SERIAL,
+    max_concurrency: int | None = None,
+    capture_errors: bool = False,
+    streaming: bool = False,
+):
+    """Run ``calls`` with :func:`fan_out` and reduce their results.
+
+    The reducer gets the list of results in the order of the calls, or with ``streaming``
+    an iterator yielding each result as soon as it completes, so that it can start working,
+    or stop the remaining calls, before all of them are done.
+    """
+    completed = fan_out(calls, strategy, max_concurrency, capture_errors)
+    if streaming:
+        return reducer(result for _, result in completed)
+    results = [None] * len(calls)
+    for index, result in completed:
+        results[index] = result
+    return reducer(results)
+
+
+def invoker(act, strategy: str) -> Callable:
+    """Method calling an action with the arguments of a tool call under ``strategy``."""
+    return act.ainvoke if strategy == ASYNCIO else act.invoke
+
+
+def run_serial(calls, capture_errors):
+    for index, call in enumerate(calls):
+        try:
+            result = call()
+        except Exception as e:
+            if not capture_errors:
+                raise
+            result = ItemError(index, e)
+        yield index, result
+
+
+def run_threads(calls, width, capture_errors):
+    executor = ThreadPoolExecutor(max_workers=width, thread_name_prefix="agentkit-fanout")
+    try:
+        futures = {executor.submit(call): index for index, call in enumerate(calls)}
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = futures[future]
+                error = future.exception()
+                if error is None:
+                    yield index, future.result()
+                elif capture_errors:
+                    yield index, ItemError(index, error)
+                else:
+                    raise error
+    finally:
+        # Also reached when the consumer stops early
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+_DONE = object()
+
+
+def run_asyncio(calls, width, capture_errors):
+    """Run the calls on an event loop in a separate thread, which works both from sync code
+    and from a thread already running a loop, and stream the results through a queue."""
+    results = queue.Queue()
+    cancelled = threading.Event()
+    start_loop(calls, width, results, cancelled)
+    try:
+        yield from drain(results, capture_errors)
+    finally:
+        cancelled.set()
+
+
+def start_loop(calls, width, results: queue.Queue, cancelled: threading.Event):
+    """Start the thread running the calls, which puts ``(index, value, failed)`` in
+    ``results`` as they complete, and ``_DONE`` once they all did."""
+
+    async def run_all():
+        semaphore = asyncio.Semaphore(width)
+        await asyncio.gather(
+            *(
+                run_one(index, call, semaphore, results, cancelled)
+                for index, call in enumerate(calls)
+            )
+        )
+
+    def target():
+        try:
+            asyncio.run(run_all())
+        finally:
+            results.put(_DONE)
+
+    thread = threading.Thread(target=target, name="agentkit-fanout-loop", daemon=True)
+    thread.start()
+
+
+async def run_one(index, call, semaphore, results, cancelled):
+    async with semaphore:
+        if cancelled.is_set():
+            return
+        try:
+            result = await (
+                call() if inspect.iscoroutinefunction(call) else asyncio.to_thread(call)
+            )
+            if inspect.isawaitable(result):
+                result = await result
+        except Exception as e:
+            results.put((index, e, True))
+        else:
+            results.put((index, result, False))
+
+
+def drain(results: queue.Queue, capture_errors):
+    while True:
+        item = results.get()
+        if item is _DONE:
+            return
+        index, value, failed = item
+        if not failed:
+            yield index, value
+        elif capture_errors:
+            yield index, ItemError(index, value)
+        else:
+            raise value
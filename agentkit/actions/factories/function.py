@@ -3,7 +3,9 @@ from typing import Callable
 from typing import List
 
 from agentkit.actions.action import Action
+from agentkit.actions.process import ProcessPool
 from agentkit.utils.pydantic_utils import create_pydantic_model_from_func
+from agentkit.utils.response_cache import ResponseCache
 
 
 def create_pydantic_model_from_function(
@@ -26,27 +28,44 @@ def action(
     decorators: List[Callable[..., None]] = None,
     logging_metadata: dict | None = None,
     logging_level=logging.INFO,
+    timeout: float | None = None,
+    serialize_key: str | None = None,
+    depends_on: List[str] | None = None,
+    cacheable: bool = False,
+    cache: ResponseCache | None = None,
+    process_pool: ProcessPool | bool | None = None,
+    lazy: bool = False,
 ):
+    """Decorate a function into an :class:`~agentkit.actions.action.Action`.
+
+    Args:
+        process_pool: Run the action in worker processes, the default pool when True.
+        lazy: Generate the pydantic model of the arguments on first use instead of at
+            decoration.
+    """
     _logger = logger
 
     def create_action(function):
+        def model_factory():
+            return create_pydantic_model_from_func(function.__name__.title(), function)
+
         return Action(
             name=name,
             function=function,
-            pydantic_model=(
-                pydantic_model
-                if pydantic_model
-                else create_pydantic_model_from_func(
-                    function.__name__.title(),
-                    function,
-                )
-            ),
+            pydantic_model=pydantic_model if pydantic_model or lazy else model_factory(),
+            model_factory=model_factory,
             stop=stop,
             decorators=decorators or [],
             description=description,
             logger=_logger,
             logging_metadata=logging_metadata,
             logging_level=logging_level,
+            timeout=timeout,
+            serialize_key=serialize_key,
+            depends_on=depends_on,
+            cacheable=cacheable,
+            cache=cache,
+            process_pool=process_pool,
         )
 
     return create_action
@@ -1,6 +1,11 @@
+import functools
 from typing import List
 
 from agentkit.actions import Action
+from agentkit.actions.factories.fanout import SERIAL
+from agentkit.actions.factories.fanout import invoker
+from agentkit.actions.factories.fanout import reduce_calls
+from agentkit.actions.factories.fanout import validate_strategy
 from agentkit.actions.factories.function import action
 from agentkit.utils.pydantic_utils import create_pydantic_model_from_func
 
@@ -21,10 +26,30 @@ def validate_input(args, kwargs, act_name):
             )
 
 
-def repeat(act: Action, name: str = None, description: str = None, reducer=default_reducer):
+def repeat(
+    act: Action,
+    name: str = None,
+    description: str = None,
+    reducer=default_reducer,
+    strategy: str = SERIAL,
+    max_concurrency: int | None = None,
+    capture_errors: bool = False,
+    streaming: bool = False,
+):
+    """
+    Repeat an action over a list of arguments in a single call.
+
+    Options are the same as for ``combine``: the items run with the given ``strategy``
+    and ``max_concurrency``, failing items are replaced with an ``ItemError`` when
+    ``capture_errors``, and a ``streaming`` reducer consumes the results as they complete.
+    """
+    validate_strategy(strategy, max_concurrency)
+
     def func(*args, **kwargs):
         validate_input(args, kwargs, act.name)
-        return reducer([act(**e) for e in next(iter(kwargs.values()))] if kwargs else [])
+        items = next(iter(kwargs.values())) if kwargs else []
+        calls = [functools.partial(invoker(act, strategy), e) for e in items]
+        return reduce_calls(calls, reducer, strategy, max_concurrency, capture_errors, streaming)
 
     if name is None:
         name = act.name
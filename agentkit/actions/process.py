@@ -0,0 +1,149 @@
+import asyncio
+import atexit
+import inspect
+import multiprocessing
+import pickle
+import threading
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from agentkit.utils.exceptions import ToolTimeoutException
+
+
+class ProcessPoolException(Exception):
+    pass
+
+
+def run_pickled(payload: bytes) -> bytes:
+    """Run an action in a worker process, from and to pickled data."""
+    action, args, kwargs = pickle.loads(payload)
+    result = action.call_function(*args, **kwargs)
+    if inspect.isawaitable(result):
+        result = asyncio.run(result)
+    try:
+        return pickle.dumps(result)
+    except (pickle.PicklingError, TypeError, AttributeError) as e:
+        raise ProcessPoolException(
+            f"The result of {action.name} can't be sent back from the worker process: {e}"
+        ) from None
+
+
+class ProcessPool:
+    """Pool of worker processes running the actions created with a ``process_pool``.
+
+    Tools holding the GIL, e.g. parsing documents or transforming dataframes, stall the
+    completion loop and every other thread of the process. Run in a pool, their action
+    and validated arguments are pickled and sent to a worker process, and the result is
+    pickled back, so that callers see the same result or error as in process.
+
+    Actions are pickled by reference, so they must be defined at module level, or be bound
+    to a picklable instance. Workers are started with ``start_method``, ``"spawn"`` by
+    default, as forking a process running threads (HTTP clients, loops) is unsafe.
+
+    A timed out call raises :class:`ToolTimeoutException`, its worker isn't interrupted
+    and finishes it in the background. When a worker dies, e.g. killed for memory, the
+    pending calls fail with ``BrokenProcessPool`` and the next calls start a new pool.
+
+    Args:
+        max_workers: Number of worker processes, the number of CPUs when omitted.
+        timeout: Default timeout of a call, in seconds, unlimited when omitted.
+        start_method: ``multiprocessing`` start method of the workers.
+    """
+
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(
+        self,
+        max_workers: int | None = None,
+        timeout: float | None = None,
+        start_method: str = "spawn",
+    ):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.start_method = start_method
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def default(cls) -> "ProcessPool":
+        """Return the pool shared by the whole process."""
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+                atexit.register(cls._default.shutdown)
+            return cls._default
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context(self.start_method),
+                )
+            return self._executor
+
+    def submit(self, action, args=(), kwargs=None) -> Future:
+        try:
+            payload = pickle.dumps((action, tuple(args), kwargs or {}))
+        except (pickle.PicklingError, TypeError, AttributeError) as e:
+            raise ProcessPoolException(
+                f"{action.name} or its arguments can't be sent to a worker process: {e}"
+            ) from e
+        executor = self.executor
+        try:
+            return executor.submit(run_pickled, payload)
+        except BrokenProcessPool:
+            self.reset(executor)
+            return self.executor.submit(run_pickled, payload)
+
+    def timeout_of(self, timeout: float | None) -> float | None:
+        return timeout if timeout is not None else self.timeout
+
+    def run(self, action, args=(), kwargs=None, timeout: float | None = None):
+        """Run ``action`` in a worker process and return its result."""
+        executor = self.executor
+        future = self.submit(action, args, kwargs)
+        timeout = self.timeout_of(timeout)
+        try:
+            return pickle.loads(future.result(timeout))
+        except TimeoutError:
+            future.cancel()
+            raise ToolTimeoutException(f"Tool {action.name} timed out after {timeout}s") from None
+        except BrokenProcessPool:
+            self.reset(executor)
+            raise
+
+    async def arun(self, action, args=(), kwargs=None, timeout: float | None = None):
+        """Like :meth:`run`, without blocking the running loop."""
+        executor = self.executor
+        future = self.submit(action, args, kwargs)
+        timeout = self.timeout_of(timeout)
+        try:
+            return pickle.loads(await asyncio.wait_for(asyncio.wrap_future(future), timeout))
+        except TimeoutError:
+            raise ToolTimeoutException(f"Tool {action.name} timed out after {timeout}s") from None
+        except BrokenProcessPool:
+            self.reset(executor)
+            raise
+
+    def reset(self, broken: ProcessPoolExecutor):
+        """Drop a broken executor, so that the next call starts new workers."""
+        with self._lock:
+            if self._executor is broken:
+                self._executor = None
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
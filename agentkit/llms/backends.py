@@ -0,0 +1,240 @@
+import itertools
+import json
+import threading
+import time
+from abc import ABC
+from abc import abstractmethod
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Tuple
+
+import litellm
+from litellm.types.utils import ModelResponseStream
+
+from agentkit.llms.cache import make_cache_key
+
+ToolCallSpec = Tuple[str, Dict[str, Any]]
+Turn = str | List[ToolCallSpec]
+
+
+class CompletionBackendException(Exception):
+    pass
+
+
+class CompletionBackend(ABC):
+    """Pluggable provider behind the completion loop.
+
+    A backend receives the same arguments as ``litellm.completion`` and returns either a
+    ``ModelResponse`` or, when ``stream=True``, an iterable of streamed chunks.
+    """
+
+    @abstractmethod
+    def completion(self, *args, **kwargs):
+        pass
+
+    def __call__(self, *args, **kwargs):
+        return self.completion(*args, **kwargs)
+
+
+class LiteLLMBackend(CompletionBackend):
+    def completion(self, *args, **kwargs):
+        return litellm.completion(*args, **kwargs)
+
+
+def response_from_dict(data: dict):
+    return litellm.ModelResponse(**data)
+
+
+def chunk_from_dict(data: dict):
+    return ModelResponseStream(**data)
+
+
+class RecordingBackend(CompletionBackend):
+    """Forward requests to another backend and append every exchange to a JSONL fixture.
+
+    The fixture can later be served offline by :class:`ReplayBackend`.
+    """
+
+    def __init__(self, path: str, backend: CompletionBackend = None):
+        self.path = path
+        self.backend = backend or LiteLLMBackend()
+        self._lock = threading.Lock()
+
+    def write(self, record: dict):
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, default=str) + "\n")
+
+    def completion(self, *args, **kwargs):
+        key = make_cache_key(*args, **kwargs)
+        response = self.backend.completion(*args, **kwargs)
+        if kwargs.get("stream"):
+            return self._record_stream(key, response)
+
+        self.write({"key": key, "response": response.model_dump()})
+        return response
+
+    def _record_stream(self, key, response):
+        chunks = []
+        for chunk in response:
+            chunks.append(chunk.model_dump())
+            yield chunk
+        self.write({"key": key, "chunks": chunks})
+
+
+class ReplayBackend(CompletionBackend):
+    """Serve recorded responses from a JSONL fixture, without any network access.
+
+    Each line holds either a ``response`` or a list of streamed ``chunks``, plus an optional
+    request ``key`` (see :func:`agentkit.llms.cache.make_cache_key`). Requests are matched by
+    key when ``match_requests`` is set, otherwise records are served in file order.
+    """
+
+    def __init__(self, path: str = None, records: Iterable[dict] = None, match_requests=False):
+        if records is None:
+            if path is None:
+                raise CompletionBackendException("Either path or records must be provided")
+            with open(path, encoding="utf-8") as f:
+                records = [json.loads(line) for line in f if line.strip()]
+
+        self.records = list(records)
+        self.match_requests = match_requests
+        self._by_key = {record["key"]: record for record in self.records if "key" in record}
+        self._position = 0
+        self._lock = threading.Lock()
+
+    def next_record(self, *args, **kwargs):
+        if self.match_requests:
+            key = make_cache_key(*args, **kwargs)
+            if key not in self._by_key:
+                raise CompletionBackendException(f"No recorded response for request {key}")
+            return self._by_key[key]
+
+        with self._lock:
+            if self._position >= len(self.records):
+                raise CompletionBackendException("Recorded responses exhausted")
+            record = self.records[self._position]
+            self._position += 1
+        return record
+
+    def reset(self):
+        self._position = 0
+
+    def completion(self, *args, **kwargs):
+        record = self.next_record(*args, **kwargs)
+        if "chunks" in record:
+            return iter([chunk_from_dict(chunk) for chunk in record["chunks"]])
+        return response_from_dict(record["response"])
+
+
+class SyntheticBackend(CompletionBackend):
+    """Deterministic stand-in for a provider emitting a scripted conversation.
+
+    ``script`` is a list of turns: a string is answered as the final assistant text, a list of
+    ``(name, arguments)`` pairs is answered as parallel tool calls. The script is replayed
+    from the start once exhausted, so it can drive any number of benchmark iterations.
+
+    Args:
+        script: Turns to emit, in order.
+        latency: Seconds to wait before answering, or a callable returning them.
+        chunk_size: Size of the text and argument fragments when streaming.
+        usage: Usage reported with every response.
+    """
+
+    def __init__(
+        self,
+        script: List[Turn],
+        latency: float | Callable[[], float] = 0.0,
+        chunk_size: int = 16,
+        usage: Dict[str, int] = None,
+    ):
+        if not script:
+            raise CompletionBackendException("script must have at least one turn")
+        self.script = script
+        self.latency = latency
+        self.chunk_size = chunk_size
+        self.usage = usage or {"prompt_tokens": 10, "completion_tokens": 10, "total_tokens": 20}
+        self.calls = 0
+        self._turns = itertools.cycle(script)
+        self._lock = threading.Lock()
+
+    def next_turn(self) -> Turn:
+        with self._lock:
+            self.calls += 1
+            return next(self._turns)
+
+    def wait(self):
+        latency = self.latency() if callable(self.latency) else self.latency
+        if latency:
+            time.sleep(latency)
+
+    def completion(self, *args, **kwargs):
+        turn = self.next_turn()
+        self.wait()
+        if kwargs.get("stream"):
+            return iter(self.chunks(turn))
+        return response_from_dict(self.message(turn))
+
+    def tool_calls(self, turn: List[ToolCallSpec]):
+        return [
+            {
+                "id": f"call_{self.calls}_{index}",
+                "type": "function",
+                "function": {"name": name, "arguments": json.dumps(arguments)},
+            }
+            for index, (name, arguments) in enumerate(turn)
+        ]
+
+    def message(self, turn: Turn) -> dict:
+        if isinstance(turn, str):
+            message = {"role": "assistant", "content": turn}
+            finish_reason = "stop"
+        else:
+            message = {"role": "assistant", "content": None, "tool_calls": self.tool_calls(turn)}
+            finish_reason = "tool_calls"
+        return {
+            "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+            "usage": self.usage,
+        }
+
+    def split(self, text: str):
+        return [text[i : i + self.chunk_size] for i in range(0, len(text), self.chunk_size)]
+
+    def chunks(self, turn: Turn):
+        deltas = []
+        if isinstance(turn, str):
+            deltas = [{"content": part} for part in self.split(turn)]
+            finish_reason = "stop"
+        else:
+            for index, tool_call in enumerate(self.tool_calls(turn)):
+                function = tool_call["function"]
+                deltas.append(
+                    {
+                        "tool_calls": [
+                            {
+                                "index": index,
+                                "id": tool_call["id"],
+                                "type": "function",
+                                "function": {"name": function["name"], "arguments": ""},
+                            }
+                        ]
+                    }
+                )
+                deltas += [
+                    {"tool_calls": [{"index": index, "function": {"arguments": part}}]}
+                    for part in self.split(function["arguments"])
+                ]
+            finish_reason = "tool_calls"
+
+        chunks = [chunk_from_dict({"choices": [{"index": 0, "delta": delta}]}) for delta in deltas]
+        chunks.append(
+            chunk_from_dict(
+                {
+                    "choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}],
+                    "usage": self.usage,
+                }
+            )
+        )
+        return chunks
@@ -0,0 +1,8 @@
+# The response caches are shared with the actions, see agentkit.utils.response_cache
+from agentkit.utils.response_cache import CREDENTIAL_KEYS  # noqa: F401
+from agentkit.utils.response_cache import IGNORED_KEYS  # noqa: F401
+from agentkit.utils.response_cache import InMemoryResponseCache  # noqa: F401
+from agentkit.utils.response_cache import ResponseCache  # noqa: F401
+from agentkit.utils.response_cache import SQLiteResponseCache  # noqa: F401
+from agentkit.utils.response_cache import is_cache_hit  # noqa: F401
+from agentkit.utils.response_cache import make_cache_key  # noqa: F401
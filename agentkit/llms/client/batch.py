@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+
+from agentkit.llms.client.chat import ChatCompletion
+from agentkit.utils.tokens import TokenUsageTracker
+from agentkit.utils.tokens import to_dict
+from pydantic import BaseModel
+
+
+class BatchResult(BaseModel):
+    id: str
+    response: Any = None
+    error: str | None = None
+    usage: Dict[str, int] = {}
+    # Whether the result was loaded from the checkpoint of a previous run
+    restored: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def to_jsonable(value):
+    """Convert a completion result to JSON data, to checkpoint it."""
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(v) for v in value]
+    if isinstance(value, dict):
+        return {key: to_jsonable(v) for key, v in value.items()}
+    if hasattr(value, "model_dump"):
+        return to_jsonable(to_dict(value))
+    return value
+
+
+class BatchCheckpoint:
+    """Append-only JSONL file of the finished requests of a batch.
+
+    Each line holds a :class:`BatchResult` whose response was converted to JSON data, so
+    restored responses are plain dicts and lists rather than the original objects.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def load(self) -> Dict[str, BatchResult]:
+        results = {}
+        if not os.path.exists(self.path):
+            return results
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    result = BatchResult.model_validate_json(line)
+                except ValueError:
+                    # Line truncated by a crash while it was written
+                    continue
+                results[result.id] = result.model_copy(update={"restored": True})
+        return results
+
+    def write(self, result: BatchResult):
+        data = result.model_dump(exclude={"restored"})
+        data["response"] = to_jsonable(data["response"])
+        line = json.dumps(data, default=str)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class BatchCompletion:
+    """Run the full tool loop of many independent completion requests concurrently.
+
+    Every request is a dict of :func:`completion` keyword arguments (``messages``,
+    ``actions``, ...) with an optional ``"id"``, its position in ``requests`` otherwise.
+    Results are yielded as the requests finish, not in order. Requests that fail are
+    yielded with their error instead of stopping the batch.
+
+    With a ``checkpoint`` path, each result is appended to a JSONL file as soon as it is
+    known, and the requests already in the file are skipped when the batch is run again,
+    e.g. after a crash.
+
+    Token usage is tracked by ``token_usage_tracker``, in total and per request (as the
+    ``batch:<id>`` workflow), and each result carries the usage of its request.
+
+    Args:
+        concurrency: Number of requests in flight at the same time.
+        checkpoint: Path of the checkpoint file, no checkpointing when omitted.
+        token_usage_tracker: Tracker shared by every request, e.g. with a budget for the
+            whole batch.
+        yield_restored: Also yield the results restored from the checkpoint.
+        **completion_kwargs: Options of the :class:`ChatCompletion` running the requests,
+            e.g. ``model``, ``backend`` or ``scheduler``.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 8,
+        checkpoint: str | None = None,
+        token_usage_tracker: TokenUsageTracker | None = None,
+        yield_restored: bool = False,
+        **completion_kwargs,
+    ):
+        self.concurrency = concurrency
+        self.checkpoint = BatchCheckpoint(checkpoint) if checkpoint else None
+        self.token_usage_tracker = token_usage_tracker or TokenUsageTracker()
+        self.yield_restored = yield_restored
+        self.completion_kwargs = completion_kwargs
+
+    @property
+    def usage(self) -> Dict[str, int]:
+        """Aggregate token usage of the batch so far."""
+        return dict(self.token_usage_tracker.tracker)
+
+    def run_one(self, request_id: str, request: dict) -> BatchResult:
+        workflow = f"batch:{request_id}"
+        chat_completion = ChatCompletion.create(
+            token_usage_tracker=self.token_usage_tracker, **self.completion_kwargs
+        )
+        try:
+            with self.token_usage_tracker.workflow(workflow):
+                response = chat_completion(**request)
+        except Exception as e:
+            result = BatchResult(id=request_id, error=f"{type(e).__name__}: {e}")
+        else:
+            result = BatchResult(id=request_id, response=response)
+        result.usage = dict(self.token_usage_tracker.by_workflow.get(workflow, {}))
+        return result
+
+    def run(self, requests: Iterable[dict]) -> Iterator[BatchResult]:
+        # Failed requests are retried when the batch is run again
+        done = self.checkpoint.load() if self.checkpoint else {}
+        done = {request_id: result for request_id, result in done.items() if result.ok}
+        if self.yield_restored:
+            yield from done.values()
+
+        with ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix="agentkit-batch"
+        ) as executor:
+            pending = set()
+            for index, request in enumerate(requests):
+                request = dict(request)
+                request_id = str(request.pop("id", index))
+                if request_id in done:
+                    continue
+
+                # Submit lazily, so that huge or generated batches aren't loaded in memory
+                if len(pending) >= self.concurrency:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    yield from self.collect(finished)
+                pending.add(executor.submit(self.run_one, request_id, request))
+
+            while pending:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                yield from self.collect(finished)
+
+    def collect(self, futures) -> Iterator[BatchResult]:
+        for future in futures:
+            result = future.result()
+            if self.checkpoint is not None:
+                self.checkpoint.write(result)
+            yield result
+
+    __call__ = run
+
+
+def batch_completion(requests: Iterable[dict], concurrency: int = 8, **kwargs):
+    """
+    Run many completion requests concurrently and yield their results as they finish.
+    See BatchCompletion for the options.
+    """
+    return BatchCompletion(concurrency=concurrency, **kwargs).run(requests)
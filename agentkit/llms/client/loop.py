@@ -0,0 +1,588 @@
+from __future__ import annotations
+
+import collections
+import logging
+import time
+from collections import defaultdict
+from functools import wraps
+from typing import Any
+from typing import Callable
+from typing import Iterator
+from typing import List
+
+import agentkit.llms.loop_action as la
+import litellm
+from agentkit.actions.action import Action
+from agentkit.actions.action import ActionHandlers
+from agentkit.llms import events
+from agentkit.llms.backends import CompletionBackend
+from agentkit.llms.cache import ResponseCache
+from agentkit.llms.cache import is_cache_hit
+from agentkit.llms.exception_handler import ChatLoopInfo
+from agentkit.llms.exception_handler import ExceptionHandler
+from agentkit.llms.executor import ToolCall
+from agentkit.llms.executor import ToolExecutor
+from agentkit.llms.general.stream import StreamMerger
+from agentkit.llms.general.tools import Tools
+from agentkit.llms.history import ConversationBuffer
+from agentkit.llms.pool import ClientPool
+from agentkit.llms.resilience import Hedger
+from agentkit.llms.resilience import ResilientCompletion
+from agentkit.llms.scheduler import RequestScheduler
+from agentkit.telemetry import traceable
+from agentkit.telemetry.spans import span
+from agentkit.telemetry.spans import start_span
+from agentkit.utils import DEFAULT_ACTION_SCOPE
+from agentkit.utils.encoding import encode_tool_result
+from agentkit.utils.stream import get_first_element_and_iterator
+from agentkit.utils.tokens import TokenUsageTracker
+from agentkit.utils.tokens import usage_to_dict
+from openai import Stream
+from openai.types.chat.chat_completion_message_tool_call import ChatCompletionMessageToolCall
+from pydantic import ValidationError
+
+# Keyword arguments of the standalone functions that configure the loop itself
+LOOP_OPTIONS = [
+    "logger",
+    "logging_name",
+    "logging_metadata",
+    "logging_level",
+    "cache",
+    "backend",
+    "resilience",
+    "hedge",
+    "scheduler",
+    "priority",
+    "client_pool",
+    "tool_executor",
+    "result_encoder",
+    "exception_handler",
+    "hooks",
+]
+
+
+def orch_actions(elements) -> Iterator[Action]:
+    """Actions among ``elements``, which are actions or lists of actions."""
+    for element in elements:
+        if isinstance(element, list):
+            yield from element
+        elif isinstance(element, Action):
+            yield element
+
+
+class ChatLoopException(Exception):
+    def __init__(self, message="", extra_info=None):
+        super().__init__(message)
+        self.extra_info = extra_info or {}
+
+    def __str__(self):
+        extra_info_str = ", ".join(f"{key}: {value}" for key, value in self.extra_info.items())
+        return f"{super().__str__()} | Additional Info: [{extra_info_str}]"
+
+
+class LoopState:
+    """State of one run of the loop, shared by its stages and hooks."""
+
+    def __init__(self, args, kwargs, action_handler, orch, tools, stream_events=False):
+        self.args = args
+        self.kwargs = kwargs
+        self.messages = kwargs.get("messages")
+        self.model = kwargs.get("model")
+        self.action_handler = action_handler
+        self.orch = orch
+        self.tools = tools
+        self.stream = bool(kwargs.get("stream"))
+        self.stream_events = stream_events
+        self.total_usage = collections.Counter()
+        self.turn = 0
+        self.start_turn()
+
+    def start_turn(self):
+        self.turn += 1
+        self.request = None
+        self.response = None
+        self.message = None
+        self.finish_reason = None
+        self.usage = None
+        # Responses served by the cache were billed when first received
+        self.cache_hit = False
+        self.tool_results = []
+        self.stop = False
+        self.result = None
+        self.action = None
+
+
+class LoopHook:
+    """Extension point called after each stage of the loop, see :class:`ChatLoop`.
+
+    Hooks may read and modify the state, e.g. rewrite ``state.request`` before it is sent
+    or replace ``state.action`` to change the decision.
+    """
+
+    def on_request(self, state: LoopState):
+        pass
+
+    def on_response(self, state: LoopState):
+        pass
+
+    def on_message(self, state: LoopState):
+        pass
+
+    def on_tool_results(self, state: LoopState):
+        pass
+
+    def on_decision(self, state: LoopState):
+        pass
+
+
+class ChatLoop:
+    """Function calling loop shared by :class:`ChatCompletion` and :class:`ChatLoopManager`.
+
+    Each turn goes through explicit stages, each one followed by the matching hooks:
+
+    1. :meth:`build_request` fits the history, checks the budget and adds the tools.
+    2. :meth:`send` calls the completion method, wrapped by the backend, hedging,
+       scheduling, resilience and cache layers.
+    3. :meth:`decode` merges streamed responses and tracks the token usage.
+    4. :meth:`dispatch_tools` runs the requested tool calls through the tool executor.
+    5. :meth:`decide` returns the :mod:`loop action <agentkit.llms.loop_action>`: return the
+       response or the results of a ``stop`` action, or continue with the next tools.
+
+    Errors raised by the stages go to the ``exception_handler`` when one is configured.
+    Subclasses configure the loop through class attributes rather than override it.
+    """
+
+    DEFAULT_LOGGING_NAME = "agentkit_chat_loop"
+    exception_class = ChatLoopException
+    # Return streamed responses as typed events, see agentkit.llms.events
+    stream_events = False
+    # Return streamed text responses to the caller as a raw chunk iterator
+    return_text_streams = False
+
+    def __init__(
+        self,
+        model=None,
+        token_usage_tracker=None,
+        logger: logging.Logger | None = None,
+        logging_name: str | None = None,
+        logging_metadata: dict | None = None,
+        logging_level=logging.INFO,
+        exception_handler: ExceptionHandler = None,
+        cache: ResponseCache | None = None,
+        backend: CompletionBackend | None = None,
+        resilience: ResilientCompletion | None = None,
+        hedge: Hedger | None = None,
+        scheduler: RequestScheduler | None = None,
+        priority: int = 0,
+        client_pool: ClientPool | None = None,
+        tool_executor: ToolExecutor | None = None,
+        result_encoder: Callable[[Any], str] = encode_tool_result,
+        hooks: List[LoopHook] | None = None,
+    ):
+        self.model = model
+        self.token_usage_tracker = token_usage_tracker or TokenUsageTracker()
+        self.logger = logger
+        self.logging_name = logging_name or self.DEFAULT_LOGGING_NAME
+        self.logging_metadata = logging_metadata
+        self.logging_level = logging_level
+        self.exception_handler = exception_handler
+        self.cache = cache
+        self.backend = backend
+        self.resilience = resilience
+        self.hedge = hedge
+        self.scheduler = scheduler
+        self.priority = priority
+        self.client_pool = client_pool
+        self.tool_executor = tool_executor or ToolExecutor()
+        self.result_encoder = result_encoder
+        self.hooks = list(hooks or [])
+
+    @classmethod
+    def create(cls, **kwargs):
+        """
+        Class method to create and optionally wrap an instance with logging.
+        """
+        instance = cls(**kwargs)
+        if instance.logger:
+            return traceable(
+                name=instance.logging_name,
+                logger=instance.logger,
+                metadata=instance.logging_metadata,
+                level=instance.logging_level,
+            )(instance)
+        return instance
+
+    def close(self):
+        """Close the client pool installed by the loop, if any, handing litellm's sessions
+        back to the pool installed before it. The pool is installed again on the next call."""
+        if self.client_pool is not None:
+            self.client_pool.close()
+
+    async def aclose(self):
+        if self.client_pool is not None:
+            await self.client_pool.aclose()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def validate_orch(self, orch):
+        if orch is not None:
+            for key in orch.keys():
+                if not isinstance(key, str):
+                    raise self.exception_class(
+                        f"Orch keys must be action name (str), found {type(key)}"
+                    )
+
+    def build_orch(self, actions: List[Action], orch=None):
+        action_handler = ActionHandlers()
+
+        if orch is None:
+            orch = {}
+        if DEFAULT_ACTION_SCOPE not in orch:
+            orch[DEFAULT_ACTION_SCOPE] = actions
+
+        buf = actions + list(orch.values())
+        for action in orch_actions(buf):
+            action_handler.name_to_action[action.name] = action
+
+        for name in action_handler.name_to_action:
+            orch.setdefault(name, DEFAULT_ACTION_SCOPE)
+
+        return action_handler, orch
+
+    def argument_check(self, **kwargs):
+        if "messages" not in kwargs:
+            raise self.exception_class("messages keyword argument is required for chat completion")
+        if "model" not in kwargs and not self.model:
+            raise self.exception_class("model keyword argument is required for chat completion")
+        if "tools" in kwargs:
+            raise self.exception_class(
+                "tools keyword argument is not allowed for this method, use actions instead"
+            )
+        if "tool_choice" in kwargs:
+            raise self.exception_class(
+                "tool_choice keyword argument is not allowed for this method, use actions instead"
+            )
+
+    def parse_tool_call(self, model, tool_call, action_handler) -> ToolCall:
+        if isinstance(tool_call, ChatCompletionMessageToolCall):
+            tool_call = tool_call.model_dump()
+
+        name = tool_call["function"]["name"]
+        arguments = tool_call["function"]["arguments"]
+
+        if not action_handler.contains(name):
+            raise self.exception_class(
+                f"{name} is not a valid function name",
+                extra_info={"timestamp": time.time(), "model": model},
+            )
+
+        action = action_handler[name]
+        try:
+            arguments = action.decode_arguments(arguments)
+        except ValidationError as e:
+            raise self.exception_class(
+                "Failed to parse function call arguments from OpenAI response",
+                extra_info={
+                    "arguments": arguments,
+                    "timestamp": time.time(),
+                    "model": model,
+                },
+            ) from e
+
+        return ToolCall(tool_call["id"], action, arguments)
+
+    def tool_message(self, call: ToolCall, tool_response):
+        return {
+            "tool_call_id": call.id,
+            "role": "tool",
+            "name": call.name,
+            "content": self.result_encoder(tool_response),
+        }
+
+    def call_tools(self, messages, model, tool_calls, action_handler):
+        """Run the tool calls of a response and append their results in the original order.
+
+        Returns ``(call, tool_response)`` pairs and whether the loop should stop, which is the
+        case as soon as one of the called actions is a ``stop`` action.
+        """
+        calls = [
+            self.parse_tool_call(model, tool_call, action_handler) for tool_call in tool_calls
+        ]
+        results = list(zip(calls, self.tool_executor.run(calls), strict=True))
+        for call, tool_response in results:
+            messages += [self.tool_message(call, tool_response)]
+        return results, any(call.action.stop for call in calls)
+
+    def next_tools(self, called_tools, stop, orch, tools):
+        if len(called_tools) == 1:
+            name = list(called_tools.keys())[0]
+            expr = orch[name] if orch[name] != DEFAULT_ACTION_SCOPE else orch[DEFAULT_ACTION_SCOPE]
+            return Tools.from_expr(expr), (stop, called_tools[name])
+        else:
+            return tools, (stop, list(called_tools.values()))
+
+    def run_hooks(self, name, state):
+        for hook in self.hooks:
+            getattr(hook, name)(state)
+
+    def build_request(self, state: LoopState):
+        if isinstance(state.messages, ConversationBuffer):
+            state.messages.fit(self.token_usage_tracker)
+        self.token_usage_tracker.preflight(state.messages, state.tools.tools, model=state.model)
+
+        state.request = {
+            **state.kwargs,
+            **(state.tools.to_arguments() if bool(state.tools) else {}),
+        }
+
+    def send(self, state: LoopState, method: Callable):
+        with span("llm.request", model=state.model, stream=bool(state.stream)):
+            state.response = method(*state.args, **state.request)
+        state.cache_hit = is_cache_hit(state.response)
+
+    def decode(self, state: LoopState):
+        """Extract the assistant message of the response, yielding stream events if enabled."""
+        response = state.response
+        if not state.stream and not isinstance(response, Stream):
+            self.decode_response(state)
+            return
+
+        if self.return_text_streams and not state.stream_events:
+            first_element, response = get_first_element_and_iterator(response)
+            if first_element.choices and first_element.choices[0].delta.content is not None:
+                state.action = la.ReturnRightAway(content=response)
+                return
+
+        merger = StreamMerger()
+        yield from self.merge_stream(state, response, merger)
+        self.decode_merged(state, merger)
+
+    def decode_response(self, state: LoopState):
+        response = state.response
+        with span("llm.response", model=state.model):
+            usage = getattr(response, "usage", None)
+            if usage is not None:
+                self.track_usage(state, usage, getattr(response, "model", None))
+            choice = response.choices[0]
+            state.message = choice.message
+            state.finish_reason = choice.finish_reason
+
+    def merge_stream(self, state: LoopState, response, merger: StreamMerger):
+        # Spans the whole stream, including the time the caller spends on the events
+        merge_span = start_span("llm.stream_merge", model=state.model)
+        chunks = 0
+        try:
+            for chunk in response:
+                chunks += 1
+                found = merger.feed(chunk)
+                if state.stream_events:
+                    yield from found
+                else:
+                    collections.deque(found, maxlen=0)
+        except BaseException as e:
+            merge_span.end(e)
+            raise
+        merge_span.set_attribute("chunks", chunks)
+        merge_span.end()
+
+    def decode_merged(self, state: LoopState, merger: StreamMerger):
+        state.message = merger.message()
+        state.finish_reason = merger.finish_reason
+        # Most providers don't report usage on streams, estimate it instead
+        usage = merger.usage or self.token_usage_tracker.estimate_usage(
+            state.messages, state.message, tools=state.tools.tools, model=state.model
+        )
+        self.track_usage(state, usage)
+
+        # Return the first chunk carrying the merged message, like a complete response
+        first_element = merger.first_chunk
+        if first_element is not None and first_element.choices:
+            first_element.choices[0].message = state.message
+            first_element.choices[0].finish_reason = merger.finish_reason
+        state.response = first_element
+
+    def track_usage(self, state: LoopState, usage, model=None):
+        state.usage = usage_to_dict(usage)
+        state.total_usage.update(state.usage)
+        if not state.cache_hit:
+            self.token_usage_tracker.track_usage(state.usage, model=model or state.model)
+
+    def dispatch_tools(self, state: LoopState):
+        """Run the tool calls of the message, yielding their results as events if enabled."""
+        message = state.message
+        if state.action is not None or not message.tool_calls:
+            return
+
+        state.messages += [message]
+        state.tool_results, stop = self.call_tools(
+            state.messages, state.model, message.tool_calls, state.action_handler
+        )
+
+        called_tools = defaultdict(list)
+        for call, tool_response in state.tool_results:
+            called_tools[call.name].append(tool_response)
+            if state.stream_events:
+                yield events.ToolResult(
+                    tool_call_id=call.id,
+                    name=call.name,
+                    output=tool_response,
+                    content=self.tool_message(call, tool_response)["content"],
+                )
+
+        state.tools, (state.stop, state.result) = self.next_tools(
+            called_tools, stop, state.orch, state.tools
+        )
+
+    def decide(self, state: LoopState) -> la.LoopAction:
+        if state.action is not None:
+            return state.action
+
+        message = state.message
+        if message.tool_calls:
+            if state.stop:
+                return la.ReturnRightAway(content=state.result)
+            return la.Continue(functions=state.tools)
+        if message.content is not None or state.stream_events:
+            return la.ReturnRightAway(content=state.response)
+        raise self.exception_class(f"Unsupported response from OpenAI api: {state.response}")
+
+    def handle_exception(self, e: Exception, state: LoopState) -> la.LoopAction:
+        return self.exception_handler.handle_exception(
+            e,
+            ChatLoopInfo(
+                context={
+                    "response": state.response,
+                    "tools": state.tools,
+                    "messages": state.messages,
+                    "model": state.model,
+                    "orch": state.orch,
+                }
+            ),
+        )
+
+    def run_loop(self, state: LoopState):
+        """Run the loop until it returns, as a generator of the stream events if enabled."""
+        method = self.get_chat_completion_method()
+
+        while True:
+            yield from self.run_turn(state, method)
+
+            action = state.action
+            if isinstance(action, la.ReturnRightAway):
+                break
+            elif isinstance(action, la.Continue):
+                state.start_turn()
+                state.tools = action.functions
+            else:
+                raise self.exception_class(f"Unsupported chat loop action: {action}")
+
+        if state.stream_events and state.total_usage:
+            yield events.Usage(usage=dict(state.total_usage))
+        return action.content
+
+    def run_turn(self, state: LoopState, method: Callable):
+        """Send a request and handle its response, up to the decision of the next step."""
+        try:
+            self.build_request(state)
+            self.run_hooks("on_request", state)
+            self.send(state, method)
+            self.run_hooks("on_response", state)
+            yield from self.decode(state)
+            self.run_hooks("on_message", state)
+            yield from self.dispatch_tools(state)
+            self.run_hooks("on_tool_results", state)
+            state.action = self.decide(state)
+        except Exception as e:
+            if self.exception_handler is None:
+                raise
+            state.action = self.handle_exception(e, state)
+        self.run_hooks("on_decision", state)
+
+    @wraps(litellm.completion)
+    def __call__(self, *args, **kwargs):
+        return self.create_chat_completion(*args, **kwargs)
+
+    def create_chat_completion(self, *args, **kwargs):
+        self.argument_check(**kwargs)
+
+        if "model" not in kwargs and self.model:
+            kwargs["model"] = self.model
+
+        actions = kwargs.pop("actions", None)
+        orch = kwargs.pop("orch", None)
+
+        if actions is None:
+            raise self.exception_class("actions must be provided")
+
+        self.validate_orch(orch)
+        action_handler, orch = self.build_orch(actions, orch)
+        tools = Tools.from_expr(orch[DEFAULT_ACTION_SCOPE])
+
+        stream_events = self.stream_events and bool(kwargs.get("stream"))
+        loop = self.run_loop(LoopState(args, kwargs, action_handler, orch, tools, stream_events))
+        if stream_events:
+            return loop
+
+        # Without stream events the loop doesn't yield, it returns right away
+        try:
+            next(loop)
+        except StopIteration as stop:
+            return stop.value
+        raise self.exception_class("The loop yielded events without stream events enabled")
+
+    def estimate_request_tokens(self, kwargs):
+        """Estimated token cost of a request, used to schedule it under rate limits."""
+        prompt_tokens = self.token_usage_tracker.estimate(
+            kwargs.get("messages") or [], tools=kwargs.get("tools"), model=kwargs.get("model")
+        )
+        return prompt_tokens + (kwargs.get("max_tokens") or 0)
+
+    def track_discarded_usage(self, api_response):
+        """Bill the tokens of a hedged request whose response lost the race."""
+        self.token_usage_tracker.track_usage(
+            api_response.usage, model=getattr(api_response, "model", None)
+        )
+
+    def get_chat_completion_method(self):
+        if self.client_pool is not None:
+            self.client_pool.install()
+        method = self.backend.completion if self.backend is not None else litellm.completion
+        method = self.wrap_completion_method(method)
+
+        if self.logger:
+            return traceable(
+                name=f"{self.logging_name}.chat.completions.create",
+                logger=self.logger,
+                metadata=self.logging_metadata,
+                level=self.logging_level,
+            )(method)
+        else:
+            return method
+
+    def wrap_completion_method(self, method: Callable) -> Callable:
+        """Wrap the backend method with the hedging, scheduling, resilience and cache layers,
+        the first ones being the closest to the backend."""
+        if self.hedge is not None:
+            method = self.hedge.wrap(
+                method,
+                on_discarded=self.track_discarded_usage,
+                # The scheduler wrapping the hedger only admits the first request
+                admit=self.scheduled,
+            )
+        method = self.scheduled(method)
+        if self.resilience is not None:
+            method = self.resilience.wrap(method)
+        if self.cache is not None:
+            method = self.cache.wrap(method)
+        return method
+
+    def scheduled(self, method: Callable) -> Callable:
+        if self.scheduler is None:
+            return method
+        return self.scheduler.wrap(
+            method, estimate=self.estimate_request_tokens, priority=self.priority
+        )
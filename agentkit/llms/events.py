@@ -0,0 +1,35 @@
+from typing import Any
+from typing import Dict
+
+from pydantic import BaseModel
+
+
+class StreamEvent(BaseModel):
+    pass
+
+
+class TextDelta(StreamEvent):
+    content: str
+
+
+class ToolCallStarted(StreamEvent):
+    index: int
+    id: str | None = None
+    name: str
+
+
+class ToolCallArgumentsDelta(StreamEvent):
+    index: int
+    id: str | None = None
+    delta: str
+
+
+class ToolResult(StreamEvent):
+    tool_call_id: str | None = None
+    name: str
+    output: Any = None
+    content: str
+
+
+class Usage(StreamEvent):
+    usage: Dict[str, int]
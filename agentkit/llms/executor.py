@@ -0,0 +1,300 @@
+import asyncio
+import contextvars
+import inspect
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import CancelledError
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from typing import Any
+from typing import List
+from typing import NamedTuple
+
+from agentkit.telemetry.spans import span
+from agentkit.utils.exceptions import ToolExecutorException
+from agentkit.utils.exceptions import ToolTimeoutException
+from agentkit.utils.workflow import run_coroutine_sync
+
+# How often calls waiting for their prerequisites check whether the batch was aborted
+ABORT_POLL_INTERVAL = 0.05
+
+
+class ToolCall(NamedTuple):
+    id: str | None
+    action: Any
+    arguments: Any
+
+    @property
+    def name(self):
+        return self.action.name
+
+    @property
+    def is_async(self) -> bool:
+        return getattr(self.action, "is_async", False)
+
+    def invoke(self):
+        with span("llm.tool", tool=self.name, call_id=self.id):
+            if hasattr(self.action, "invoke"):
+                return self.action.invoke(self.arguments)
+            return self.action(**self.arguments)
+
+    async def ainvoke(self):
+        with span("llm.tool", tool=self.name, call_id=self.id):
+            if hasattr(self.action, "ainvoke"):
+                return await self.action.ainvoke(self.arguments)
+            result = self.action(**self.arguments)
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+
+
+def schedule(calls: List[ToolCall]) -> List[tuple]:
+    """Order the calls of a response so that each one comes after its prerequisites.
+
+    A call waits for the earlier calls sharing its action's ``serialize_key``, and for every
+    call of the actions named in its ``depends_on``. Returns ``(index, prerequisites)``
+    pairs, where indexes refer to ``calls``, in an order satisfying the dependencies.
+    """
+    prerequisites = {index: set() for index in range(len(calls))}
+    add_serialized(calls, prerequisites)
+    add_dependencies(calls, prerequisites)
+
+    order, done = [], set()
+    while len(order) < len(calls):
+        ready = [
+            index for index in prerequisites if index not in done and prerequisites[index] <= done
+        ]
+        if not ready:
+            cycle = sorted({calls[index].name for index in prerequisites if index not in done})
+            raise ToolExecutorException(f"Circular tool dependencies between {cycle}")
+        for index in ready:
+            order.append((index, prerequisites[index]))
+            done.add(index)
+    return order
+
+
+def add_serialized(calls: List[ToolCall], prerequisites: dict):
+    """Make each call wait for the previous call sharing its ``serialize_key``."""
+    last_by_key = {}
+    for index, call in enumerate(calls):
+        key = getattr(call.action, "serialize_key", None)
+        if key is None:
+            continue
+        if key in last_by_key:
+            prerequisites[index].add(last_by_key[key])
+        last_by_key[key] = index
+
+
+def add_dependencies(calls: List[ToolCall], prerequisites: dict):
+    """Make each call wait for every call of the actions in its ``depends_on``."""
+    by_name = {}
+    for index, call in enumerate(calls):
+        by_name.setdefault(call.name, set()).add(index)
+    for index, call in enumerate(calls):
+        for dependency in getattr(call.action, "depends_on", None) or []:
+            prerequisites[index].update(by_name.get(dependency, set()) - {index})
+
+
+def failure(future) -> BaseException | None:
+    """Error of a finished call, ``None`` if it succeeded or was cancelled."""
+    if future.cancelled() or isinstance(future.exception(), CancelledError):
+        return None
+    return future.exception()
+
+
+class ToolExecutor:
+    """Run the tool calls of a response, in parallel when allowed.
+
+    With ``max_workers=1`` the calls run one after another in the caller's thread, like a
+    plain loop. Otherwise independent calls run on a thread pool while calls sharing a
+    ``serialize_key`` (e.g. tools writing the same file) run in order, and calls of actions
+    listed in an action's ``depends_on`` complete before it starts.
+
+    When a response calls async actions, the whole batch runs on a single event loop, see
+    :meth:`arun`: the async calls are awaited together, whatever ``max_workers``, and the
+    sync ones still run on the thread pool.
+
+    Results are returned in the original order of the calls. If a call fails, or runs longer
+    than its action's ``timeout`` (or the executor's default), the calls that didn't start
+    are cancelled and the error of the first failing call, in original order, is raised
+    once the others have settled. A timed out sync call can't be interrupted: its thread is
+    left to finish in the background.
+
+    Args:
+        max_workers: Number of calls running at the same time.
+        timeout: Default timeout of a call, in seconds, unlimited when omitted.
+    """
+
+    def __init__(self, max_workers: int = 1, timeout: float | None = None):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="agentkit-tool"
+                )
+            return self._executor
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+    def timeout_of(self, call: ToolCall) -> float | None:
+        timeout = getattr(call.action, "timeout", None)
+        return timeout if timeout is not None else self.timeout
+
+    def run(self, calls: List[ToolCall]) -> List[Any]:
+        order = schedule(calls)
+        if any(call.is_async for call in calls):
+            # Blocks the caller, like the sync calls, the loop completion isn't async
+            return run_coroutine_sync(self.arun(calls, order))
+        if self.max_workers == 1 and all(self.timeout_of(call) is None for call in calls):
+            results = [None] * len(calls)
+            for index, _ in order:
+                call = calls[index]
+                results[index] = call.invoke()
+            return results
+        return self.run_parallel(calls, order)
+
+    def run_parallel(self, calls, order):
+        futures = {}
+        started_at = {}
+        aborted = threading.Event()
+
+        # Submitted in dependency order, which the FIFO pool preserves, so prerequisites
+        # can't be stuck behind the calls waiting for them. Calls run in the caller's
+        # context, so that their spans and traced runs nest under the caller's.
+        for index, prerequisites in order:
+            waiting = {futures[prerequisite] for prerequisite in prerequisites}
+            context = contextvars.copy_context()
+            futures[index] = self.executor.submit(
+                context.run, self.start, index, calls[index], waiting, started_at, aborted
+            )
+
+        errors = self.collect(calls, futures, started_at, aborted)
+        if errors:
+            raise errors[min(errors)]
+        return [futures[index].result() for index in range(len(calls))]
+
+    @staticmethod
+    def start(index, call, waiting, started_at, aborted):
+        while waiting:
+            if aborted.is_set():
+                raise CancelledError()
+            done, waiting = wait(waiting, timeout=ABORT_POLL_INTERVAL)
+            for future in done:
+                future.result()
+        started_at[index] = time.monotonic()
+        return call.invoke()
+
+    def collect(self, calls, futures, started_at, aborted) -> dict:
+        """Wait for the calls, cancelling the ones that didn't start after the first error,
+        and return the errors by call index."""
+        errors = {}
+        pending = set(futures.values())
+        while pending:
+            timeout = self.next_deadline(calls, started_at, futures)
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            pending -= self.find_errors(calls, futures, started_at, done, pending, errors)
+            if errors:
+                aborted.set()
+                for future in pending:
+                    future.cancel()
+                pending = {future for future in pending if not future.cancelled()}
+        return errors
+
+    def find_errors(self, calls, futures, started_at, done, pending, errors) -> set:
+        """Add the errors of the ``done`` calls and the timeouts of the ``pending`` ones to
+        ``errors``, and return the futures of the timed out calls."""
+        timed_out = set()
+        for index, future in futures.items():
+            if future in done:
+                error = failure(future)
+                if error is not None:
+                    errors.setdefault(index, error)
+            elif future in pending and self.expired(calls[index], started_at.get(index)):
+                errors[index] = self.timeout_error(calls[index])
+                timed_out.add(future)
+        return timed_out
+
+    def timeout_error(self, call: ToolCall) -> ToolTimeoutException:
+        return ToolTimeoutException(f"Tool {call.name} timed out after {self.timeout_of(call)}s")
+
+    def expired(self, call, started) -> bool:
+        timeout = self.timeout_of(call)
+        return timeout is not None and started is not None and time.monotonic() - started > timeout
+
+    def next_deadline(self, calls, started_at, futures) -> float | None:
+        """Seconds until the next running call times out, ``None`` if none can."""
+        deadlines = [
+            started + self.timeout_of(calls[index])
+            for index, started in list(started_at.items())
+            if self.timeout_of(calls[index]) is not None and not futures[index].done()
+        ]
+        waits = [max(0.0, deadline - time.monotonic()) for deadline in deadlines]
+        if any(
+            self.timeout_of(call) is not None and index not in started_at
+            for index, call in enumerate(calls)
+        ):
+            # A call with a timeout hasn't started yet, check again shortly
+            waits.append(ABORT_POLL_INTERVAL)
+        return min(waits, default=None)
+
+    async def arun(self, calls: List[ToolCall], order: List[tuple] | None = None) -> List[Any]:
+        """Run the tool calls of a response on the running loop, like :meth:`run`.
+
+        Async actions are awaited concurrently, sync ones run on the thread pool, and each
+        call first waits for its prerequisites, see :func:`schedule`.
+        """
+        tasks = {}
+        for index, prerequisites in order or schedule(calls):
+            waiting = [tasks[prerequisite] for prerequisite in prerequisites]
+            tasks[index] = asyncio.ensure_future(self.acall(calls[index], waiting))
+
+        errors = await self.settle(tasks)
+        if errors:
+            raise errors[min(errors)]
+        return [tasks[index].result() for index in range(len(calls))]
+
+    async def acall(self, call: ToolCall, prerequisites: List[asyncio.Future]) -> Any:
+        if prerequisites:
+            await asyncio.wait(prerequisites)
+            if any(task.cancelled() or task.exception() for task in prerequisites):
+                raise asyncio.CancelledError()
+
+        if call.is_async:
+            invocation = call.ainvoke()
+        else:
+            context = contextvars.copy_context()
+            loop = asyncio.get_running_loop()
+            invocation = loop.run_in_executor(self.executor, context.run, call.invoke)
+
+        try:
+            return await asyncio.wait_for(invocation, self.timeout_of(call))
+        except TimeoutError as e:
+            raise self.timeout_error(call) from e
+
+    async def settle(self, tasks: dict) -> dict:
+        """Wait for the tasks, cancelling the pending ones after the first error, and return
+        the errors by call index."""
+        errors = {}
+        pending = set(tasks.values())
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for index, task in tasks.items():
+                if task in done and not task.cancelled() and task.exception() is not None:
+                    errors.setdefault(index, task.exception())
+            if errors and pending:
+                for task in pending:
+                    task.cancel()
+                await asyncio.wait(pending)
+                pending = set()
+        return errors
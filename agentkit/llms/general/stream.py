@@ -0,0 +1,103 @@
+from typing import Dict
+from typing import Iterator
+
+from agentkit.llms import events
+from agentkit.utils.tokens import to_dict
+from agentkit.utils.tokens import usage_to_dict
+from openai.types.chat.chat_completion_message import ChatCompletionMessage
+
+
+class StreamMerger:
+    """Incrementally merge streamed chat completion chunks into a single assistant message.
+
+    Each call to :meth:`feed` yields the typed events found in the chunk, so the text can be
+    rendered while the tool calls are still being assembled. Argument fragments are kept in
+    lists and joined once, as extraction tools may stream very large payloads.
+    """
+
+    def __init__(self):
+        self.content_parts = []
+        self.tool_calls: Dict[int, dict] = {}
+        self.arguments: Dict[int, list] = {}
+        self.finish_reason = None
+        self.usage = None
+        self.first_chunk = None
+
+    def feed(self, chunk) -> Iterator[events.StreamEvent]:
+        if self.first_chunk is None:
+            self.first_chunk = chunk
+
+        usage = getattr(chunk, "usage", None)
+        if usage:
+            self.usage = usage_to_dict(usage)
+
+        delta = self.feed_choice(chunk)
+        if delta is None:
+            return
+
+        if delta.content:
+            self.content_parts.append(delta.content)
+            yield events.TextDelta(content=delta.content)
+
+        for tool_delta in delta.tool_calls or []:
+            yield from self.feed_tool_call(to_dict(tool_delta))
+
+    def feed_choice(self, chunk):
+        """Record the finish reason of the chunk and return its delta, if any."""
+        if not chunk.choices:
+            return None
+        choice = chunk.choices[0]
+        if choice.finish_reason:
+            self.finish_reason = choice.finish_reason
+        return choice.delta
+
+    def feed_tool_call(self, tool_delta: dict) -> Iterator[events.StreamEvent]:
+        index = tool_delta.get("index")
+        if index is None:
+            index = len(self.tool_calls)
+        function = tool_delta.get("function") or {}
+
+        tool_call = self.tool_calls.get(index)
+        if tool_call is None:
+            tool_call = {
+                "id": tool_delta.get("id"),
+                "type": "function",
+                "function": {"name": function.get("name") or ""},
+            }
+            self.tool_calls[index] = tool_call
+            self.arguments[index] = []
+            yield events.ToolCallStarted(
+                index=index, id=tool_call["id"], name=tool_call["function"]["name"]
+            )
+        else:
+            if tool_delta.get("id") and not tool_call["id"]:
+                tool_call["id"] = tool_delta["id"]
+            if function.get("name") and not tool_call["function"]["name"]:
+                tool_call["function"]["name"] = function["name"]
+
+        if function.get("arguments"):
+            self.arguments[index].append(function["arguments"])
+            yield events.ToolCallArgumentsDelta(
+                index=index, id=tool_call["id"], delta=function["arguments"]
+            )
+
+    @property
+    def content(self):
+        return "".join(self.content_parts) if self.content_parts else None
+
+    def message(self) -> ChatCompletionMessage:
+        tool_calls = [
+            {
+                **tool_call,
+                "function": {
+                    **tool_call["function"],
+                    "arguments": "".join(self.arguments[index]),
+                },
+            }
+            for index, tool_call in sorted(self.tool_calls.items())
+        ]
+        return ChatCompletionMessage(
+            role="assistant",
+            content=self.content,
+            tool_calls=tool_calls or None,
+        )
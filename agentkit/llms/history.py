@@ -0,0 +1,244 @@
+from abc import ABC
+from abc import abstractmethod
+from typing import Callable
+from typing import List
+from typing import Tuple
+
+from agentkit.utils.tokens import TokenUsageTracker
+from agentkit.utils.tokens import count_message_tokens
+
+
+class ConversationBufferException(Exception):
+    pass
+
+
+def _get(message, key):
+    if isinstance(message, dict):
+        return message.get(key)
+    return getattr(message, key, None)
+
+
+class HistoryPolicy(ABC):
+    """Strategy used by :class:`ConversationBuffer` to shrink a history over its budget."""
+
+    def __init__(self, keep_turns: int = 1):
+        self.keep_turns = keep_turns
+
+    def oldest_blocks(self, buffer: "ConversationBuffer", budget: int) -> Tuple[int, int]:
+        """Return the ``(start, end)`` range of the fewest oldest turns to remove."""
+        blocks = buffer.turns()[: -self.keep_turns or None]
+        excess = buffer.total_tokens - budget
+        freed = 0
+        end = None
+        for start_index, end_index in blocks:
+            if freed >= excess:
+                break
+            freed += sum(buffer.token_counts[start_index:end_index])
+            end = end_index
+        if end is None:
+            return 0, 0
+        return blocks[0][0], end
+
+    @abstractmethod
+    def apply(self, buffer: "ConversationBuffer", budget: int) -> None:
+        pass
+
+
+class DropOldestPolicy(HistoryPolicy):
+    """Drop the oldest turns until the history fits."""
+
+    def apply(self, buffer, budget):
+        start, end = self.oldest_blocks(buffer, budget)
+        del buffer[start:end]
+
+
+class SummarizePolicy(HistoryPolicy):
+    """Replace every turn but the last ``keep_turns`` by a summary produced by ``summarize``.
+
+    The summary is kept as a system message right after the pinned system prompt and is
+    summarized again together with the next turns that need to go, so it never piles up.
+    Turns are dropped if the history is still over budget after summarizing.
+    """
+
+    def __init__(self, summarize: Callable[[List], str], keep_turns: int = 1):
+        super().__init__(keep_turns=keep_turns)
+        self.summarize = summarize
+
+    def apply(self, buffer, budget):
+        turns = buffer.turns()[: -self.keep_turns or None]
+        if not turns:
+            return
+
+        start, end = turns[0][0], turns[-1][1]
+
+        summary = {"role": "system", "content": self.summarize(buffer[start:end])}
+        buffer[start:end] = [summary]
+        buffer.summary = summary
+
+        if buffer.total_tokens > budget:
+            DropOldestPolicy(keep_turns=self.keep_turns).apply(buffer, budget)
+
+
+def _rebuild_buffer(cls, messages, state):
+    # Restores the messages and their counts together, list.extend would count them again
+    buffer = list.__new__(cls)
+    list.extend(buffer, messages)
+    buffer.__dict__.update(state)
+    return buffer
+
+
+class ConversationBuffer(list):
+    """Chat history that tracks per-message token counts and fits a context budget.
+
+    It is a plain ``list`` of messages, so it can be passed as ``messages`` to the completion
+    loop, which appends to it in place. Token counts are computed once, when a message is
+    added. Before each request the loop calls :meth:`fit`, which lets ``policy`` drop or
+    summarize the oldest turns. The leading system messages and the last turns are never
+    removed, and tool results always go together with the assistant message calling them.
+
+    Args:
+        messages: Initial messages.
+        max_tokens: Context budget for the prompt, ``None`` for no limit.
+        policy: How to shrink the history, defaults to :class:`DropOldestPolicy`.
+        model: Model used to count tokens.
+        token_usage_tracker: Tracker whose remaining budget also bounds the prompt.
+        token_counter: ``(message, model) -> int`` used to count the tokens of a message.
+    """
+
+    def __init__(
+        self,
+        messages=(),
+        max_tokens: int = None,
+        policy: HistoryPolicy = None,
+        model: str = None,
+        token_usage_tracker: TokenUsageTracker = None,
+        token_counter: Callable = count_message_tokens,
+    ):
+        super().__init__()
+        self.max_tokens = max_tokens
+        self.policy = policy or DropOldestPolicy()
+        self.model = model
+        self.token_usage_tracker = token_usage_tracker
+        self.token_counter = token_counter
+        self.token_counts: List[int] = []
+        self.summary = None
+        self.extend(messages)
+
+    def count_tokens(self, message) -> int:
+        return self.token_counter(message, self.model)
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(self.token_counts)
+
+    def append(self, message):
+        super().append(message)
+        self.token_counts.append(self.count_tokens(message))
+
+    def extend(self, messages):
+        messages = list(messages)
+        super().extend(messages)
+        self.token_counts.extend(self.count_tokens(message) for message in messages)
+
+    def __iadd__(self, messages):
+        self.extend(messages)
+        return self
+
+    def insert(self, index, message):
+        super().insert(index, message)
+        self.token_counts.insert(index, self.count_tokens(message))
+
+    def pop(self, index=-1):
+        self.token_counts.pop(index)
+        return super().pop(index)
+
+    def remove(self, message):
+        del self[self.index(message)]
+
+    def clear(self):
+        super().clear()
+        self.token_counts.clear()
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            # Materialized first, an iterator would be consumed by the list
+            value = list(value)
+        super().__setitem__(index, value)
+        if isinstance(index, slice):
+            self.token_counts[index] = [self.count_tokens(message) for message in value]
+        else:
+            self.token_counts[index] = self.count_tokens(value)
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        del self.token_counts[index]
+
+    def __imul__(self, times):
+        super().__imul__(times)
+        self.token_counts *= times
+        return self
+
+    def sort(self, *, key=None, reverse=False):
+        key = key or (lambda message: message)
+        order = sorted(range(len(self)), key=lambda index: key(self[index]), reverse=reverse)
+        messages = [self[index] for index in order]
+        self.token_counts[:] = [self.token_counts[index] for index in order]
+        super().__setitem__(slice(None), messages)
+
+    def reverse(self):
+        super().reverse()
+        self.token_counts.reverse()
+
+    def __reduce__(self):
+        state = {**self.__dict__, "token_counts": list(self.token_counts)}
+        return _rebuild_buffer, (type(self), list(self), state)
+
+    def __copy__(self):
+        return _rebuild_buffer(*self.__reduce__()[1])
+
+    def pinned(self) -> int:
+        """Number of leading system messages that are always sent."""
+        index = 0
+        while (
+            index < len(self)
+            and _get(self[index], "role") == "system"
+            and self[index] is not self.summary
+        ):
+            index += 1
+        return index
+
+    def turns(self) -> List[Tuple[int, int]]:
+        """Split the unpinned history into ``(start, end)`` turns that are removed together."""
+        turns = []
+        for index in range(self.pinned(), len(self)):
+            if turns and _get(self[index], "role") == "tool":
+                turns[-1] = (turns[-1][0], index + 1)
+            else:
+                turns.append((index, index + 1))
+        return turns
+
+    def budget(self, token_usage_tracker: TokenUsageTracker = None):
+        limits = [self.max_tokens]
+        tracker = token_usage_tracker or self.token_usage_tracker
+        if tracker is not None:
+            limits.append(tracker.remaining())
+        limits = [limit for limit in limits if limit is not None]
+        return min(limits) if limits else None
+
+    def fit(self, token_usage_tracker: TokenUsageTracker = None):
+        """Shrink the history to the context budget and the tracker's remaining tokens."""
+        budget = self.budget(token_usage_tracker)
+        if budget is None or self.total_tokens <= budget:
+            return self
+
+        self.policy.apply(self, budget)
+
+        tracker = token_usage_tracker or self.token_usage_tracker
+        if tracker is not None:
+            tracker.check_budget(self.total_tokens)
+        if self.max_tokens is not None and self.total_tokens > self.max_tokens:
+            raise ConversationBufferException(
+                f"Conversation does not fit the context budget. Budget: {self.max_tokens}, "
+                f"Tokens: {self.total_tokens}"
+            )
+        return self
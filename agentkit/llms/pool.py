@@ -0,0 +1,257 @@
+import asyncio
+import atexit
+import collections
+import threading
+from typing import List
+
+import httpx
+
+# Pools installed as litellm's sessions, the last one being in use, see ClientPool.install
+_installed: List["ClientPool"] = []
+# litellm's sessions before the first installed pool, restored once all are closed
+_base_sessions = (None, None)
+_installed_lock = threading.Lock()
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    def __init__(self, stream, release):
+        self.stream = stream
+        self.release = release
+
+    def __iter__(self):
+        yield from self.stream
+
+    def close(self):
+        try:
+            self.stream.close()
+        finally:
+            self.release()
+
+
+class _AsyncReleasingStream(httpx.AsyncByteStream):
+    def __init__(self, stream, release):
+        self.stream = stream
+        self.release = release
+
+    async def __aiter__(self):
+        async for chunk in self.stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self.stream.aclose()
+        finally:
+            self.release()
+
+
+def _once(release):
+    lock = threading.Lock()
+    released = []
+
+    def wrapper():
+        with lock:
+            if released:
+                return
+            released.append(True)
+        release()
+
+    return wrapper
+
+
+class HostLimitedTransport(httpx.BaseTransport):
+    """Transport allowing at most ``per_host`` requests in flight to the same host.
+
+    The slot is held until the response body is closed, so streamed completions count
+    for their whole duration.
+    """
+
+    def __init__(self, transport: httpx.BaseTransport, per_host: int):
+        self.transport = transport
+        self.semaphores = collections.defaultdict(lambda: threading.BoundedSemaphore(per_host))
+        self._lock = threading.Lock()
+
+    def handle_request(self, request):
+        with self._lock:
+            semaphore = self.semaphores[request.url.host]
+        semaphore.acquire()
+        try:
+            response = self.transport.handle_request(request)
+        except BaseException:
+            semaphore.release()
+            raise
+        if response.is_closed:
+            semaphore.release()
+        else:
+            response.stream = _ReleasingStream(response.stream, _once(semaphore.release))
+        return response
+
+    def close(self):
+        self.transport.close()
+
+
+class AsyncHostLimitedTransport(httpx.AsyncBaseTransport):
+    """Asynchronous counterpart of :class:`HostLimitedTransport`."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, per_host: int):
+        self.transport = transport
+        self.semaphores = collections.defaultdict(lambda: asyncio.BoundedSemaphore(per_host))
+
+    async def handle_async_request(self, request):
+        semaphore = self.semaphores[request.url.host]
+        await semaphore.acquire()
+        try:
+            response = await self.transport.handle_async_request(request)
+        except BaseException:
+            semaphore.release()
+            raise
+        if response.is_closed:
+            semaphore.release()
+        else:
+            response.stream = _AsyncReleasingStream(response.stream, _once(semaphore.release))
+        return response
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+class ClientPool:
+    """Keep-alive HTTP clients shared by every completion request.
+
+    The clients are created lazily on first use and installed as litellm's client sessions,
+    which every provider reuses, so connections (and their TLS handshakes) survive from one
+    agent turn to the next. The most recently installed pool is in use, :meth:`close` shuts
+    its clients down and hands the sessions back to the pool installed before it, in
+    whichever order pools are closed, or to the sessions litellm had before. The
+    process-wide :meth:`default` pool is closed at exit.
+
+    Args:
+        max_connections: Maximum number of open connections.
+        max_keepalive_connections: Maximum number of idle connections kept open.
+        keepalive_expiry: Seconds an idle connection is kept open.
+        per_host: Maximum number of requests in flight per host, unlimited when omitted.
+        timeout: Request timeout in seconds.
+        http2: Use HTTP/2 when the server supports it, requires ``h2``.
+    """
+
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 60.0,
+        per_host: int | None = None,
+        timeout: float = 600.0,
+        http2: bool = False,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.per_host = per_host
+        self.timeout = timeout
+        self.http2 = http2
+        self._client = None
+        self._async_client = None
+        self._closing = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def default(cls) -> "ClientPool":
+        """Return the pool shared by the whole process."""
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+                atexit.register(cls._default.close)
+            return cls._default
+
+    @property
+    def client(self) -> httpx.Client:
+        with self._lock:
+            if self._client is None:
+                transport = httpx.HTTPTransport(limits=self.limits, http2=self.http2)
+                if self.per_host:
+                    transport = HostLimitedTransport(transport, self.per_host)
+                self._client = httpx.Client(transport=transport, timeout=self.timeout)
+            return self._client
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        with self._lock:
+            if self._async_client is None:
+                transport = httpx.AsyncHTTPTransport(limits=self.limits, http2=self.http2)
+                if self.per_host:
+                    transport = AsyncHostLimitedTransport(transport, self.per_host)
+                self._async_client = httpx.AsyncClient(transport=transport, timeout=self.timeout)
+            return self._async_client
+
+    def install(self):
+        """Make litellm send its requests through this pool. Idempotent."""
+        import litellm
+
+        global _base_sessions
+        client, async_client = self.client, self.async_client
+        with _installed_lock:
+            if self in _installed:
+                return self
+            if not _installed:
+                _base_sessions = (litellm.client_session, litellm.aclient_session)
+            _installed.append(self)
+            litellm.client_session = client
+            litellm.aclient_session = async_client
+        return self
+
+    def _uninstall(self):
+        """Hand litellm's sessions back to the last pool installed before this one."""
+        import litellm
+
+        with _installed_lock:
+            if self not in _installed:
+                return
+            _installed.remove(self)
+            if _installed:
+                sessions = (_installed[-1]._client, _installed[-1]._async_client)
+            else:
+                sessions = _base_sessions
+            if litellm.client_session is self._client:
+                litellm.client_session = sessions[0]
+            if litellm.aclient_session is self._async_client:
+                litellm.aclient_session = sessions[1]
+
+    def _detach(self) -> httpx.AsyncClient | None:
+        """Uninstall the pool and close the sync client, the async client is returned to be
+        closed by the caller, in its event loop."""
+        self._uninstall()
+        with self._lock:
+            client, self._client = self._client, None
+            async_client, self._async_client = self._async_client, None
+        if client is not None:
+            client.close()
+        return async_client
+
+    def close(self):
+        async_client = self._detach()
+        if async_client is None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            asyncio.run(async_client.aclose())
+            return
+        # The loop only keeps weak references to its tasks
+        task = loop.create_task(async_client.aclose())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def aclose(self):
+        async_client = self._detach()
+        if async_client is not None:
+            await async_client.aclose()
+
+    def __enter__(self):
+        return self.install()
+
+    def __exit__(self, *exc_info):
+        self.close()
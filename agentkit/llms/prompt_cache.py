@@ -0,0 +1,100 @@
+from agentkit.llms.client.loop import LoopHook
+
+CACHE_CONTROL = {"type": "ephemeral"}
+
+# Providers caching a prompt prefix only when it is marked with `cache_control`. Others,
+# like OpenAI or DeepSeek, cache matching prefixes automatically.
+MARKER_PROVIDERS = frozenset({"anthropic", "bedrock", "vertex_ai", "vertex_ai_beta"})
+
+# Anthropic accepts at most 4 cache breakpoints per request
+MAX_BREAKPOINTS = 4
+
+
+def supports_cache_markers(model: str | None) -> bool:
+    if not model:
+        return False
+    if "claude" in model:
+        return True
+    try:
+        import litellm
+
+        _, provider, _, _ = litellm.get_llm_provider(model)
+    except Exception:
+        return False
+    return provider in MARKER_PROVIDERS
+
+
+def with_cache_control(message: dict) -> dict:
+    """Copy of a message whose last content block carries a cache breakpoint."""
+    content = message.get("content")
+    if isinstance(content, str):
+        content = [{"type": "text", "text": content}]
+    elif isinstance(content, list) and content:
+        content = list(content)
+    else:
+        return {**message, "cache_control": CACHE_CONTROL}
+    content[-1] = {**content[-1], "cache_control": CACHE_CONTROL}
+    return {**message, "content": content}
+
+
+def with_breakpoints(messages: list, limit: int) -> list:
+    """Copy of the messages with cache breakpoints on the last system message and the last
+    message, at most ``limit`` of them."""
+    messages = list(messages)
+    breakpoints = [
+        index
+        for index, message in enumerate(messages)
+        if isinstance(message, dict) and message.get("role") == "system"
+    ][-1:]
+    if messages and isinstance(messages[-1], dict):
+        breakpoints.append(len(messages) - 1)
+
+    for index in sorted(set(breakpoints))[:limit]:
+        messages[index] = with_cache_control(messages[index])
+    return messages
+
+
+class PromptCache(LoopHook):
+    """Loop hook making requests friendly to provider prompt caching.
+
+    Providers cache the longest prefix shared with previous requests, i.e. tools, system
+    prompt and history, which the loop resends unchanged on every turn:
+
+    - the tools are sent sorted by name, so the same tool set always makes the same prefix;
+    - for providers that only cache marked prefixes (Anthropic, also through Bedrock and
+      Vertex), cache breakpoints are set on the last tool, the last system message and the
+      last message, so the next turn reads the whole conversation from the cache.
+
+    The history itself is never modified, only the request sent. The cached tokens
+    reported by the providers are tracked by :class:`TokenUsageTracker` as
+    ``cache_read_input_tokens``.
+
+    Args:
+        markers: Whether to set cache breakpoints, detected from the model when omitted.
+        sort_tools: Whether to sort the tools by name.
+    """
+
+    def __init__(self, markers: bool | None = None, sort_tools: bool = True):
+        self.markers = markers
+        self.sort_tools = sort_tools
+
+    def on_request(self, state):
+        request = state.request
+        tools = request.get("tools")
+        if tools and self.sort_tools:
+            tools = sorted(tools, key=lambda tool: tool["function"]["name"])
+            request["tools"] = tools
+
+        if not self.uses_markers(request.get("model")):
+            return
+
+        if tools:
+            request["tools"] = [*tools[:-1], {**tools[-1], "cache_control": CACHE_CONTROL}]
+        request["messages"] = with_breakpoints(
+            request.get("messages") or [], MAX_BREAKPOINTS - bool(tools)
+        )
+
+    def uses_markers(self, model: str | None) -> bool:
+        if self.markers is None:
+            return supports_cache_markers(model)
+        return self.markers
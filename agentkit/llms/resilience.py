@@ -0,0 +1,458 @@
+import collections
+import contextvars
+import functools
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from typing import Callable
+from typing import List
+
+import openai
+
+TRANSIENT_STATUS_CODES = frozenset({408, 409, 425, 429, 500, 502, 503, 504, 529})
+
+
+class ResilienceException(Exception):
+    pass
+
+
+class CircuitOpenException(ResilienceException):
+    pass
+
+
+class HedgeDiscarded(ResilienceException):
+    pass
+
+
+def is_transient(e: Exception) -> bool:
+    """Whether a failed completion is worth retrying: rate limits, 5xx, timeouts, network."""
+    if isinstance(e, (openai.APIConnectionError, TimeoutError, ConnectionError)):
+        return True
+    return getattr(e, "status_code", None) in TRANSIENT_STATUS_CODES
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter.
+
+    Args:
+        max_attempts: Attempts per model, including the first one.
+        initial_delay: Upper bound of the first backoff, in seconds.
+        max_delay: Upper bound of any backoff, in seconds.
+        multiplier: Growth factor of the upper bound between attempts.
+        jitter: Draw the delay uniformly below the bound, so that concurrent clients that
+            failed together don't retry together.
+        retry_on: Predicate selecting the exceptions to retry.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        initial_delay: float = 0.5,
+        max_delay: float = 8.0,
+        multiplier: float = 2.0,
+        jitter: bool = True,
+        retry_on: Callable[[Exception], bool] = is_transient,
+    ):
+        self.max_attempts = max_attempts
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.retry_on = retry_on
+
+    def delay(self, attempt: int) -> float:
+        bound = min(self.max_delay, self.initial_delay * self.multiplier**attempt)
+        return random.uniform(0, bound) if self.jitter else bound
+
+
+class CircuitBreaker:
+    """Stop calling a model after ``failure_threshold`` consecutive failures.
+
+    Once open, the circuit lets a single trial request through after ``recovery_time``
+    seconds (half-open) and closes again if it succeeds. Every request let through must
+    end with :meth:`record`, otherwise a half-open circuit would wait for its trial forever.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, recovery_time: float = 30.0, clock=None):
+        self.failure_threshold = failure_threshold
+        self.recovery_time = recovery_time
+        self.clock = clock or time.monotonic
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and self.clock() - self.opened_at >= self.recovery_time:
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = self.clock()
+
+    def release(self):
+        """Give the half-open trial back without an outcome, e.g. when it was interrupted, so
+        that the next request becomes the trial."""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+
+    def record(self, succeeded: bool | None):
+        """Record the outcome of a request: succeeded, failed, or ``None`` when unknown."""
+        if succeeded is None:
+            self.release()
+        elif succeeded:
+            self.record_success()
+        else:
+            self.record_failure()
+
+
+class ResilienceMetrics:
+    """Counters of the resilience layer, in total and per model."""
+
+    def __init__(self):
+        self.counts = collections.Counter()
+        self.by_model = collections.defaultdict(collections.Counter)
+        self._lock = threading.Lock()
+
+    def incr(self, name: str, model: str = None, value: int = 1):
+        with self._lock:
+            self.counts[name] += value
+            if model is not None:
+                self.by_model[model][name] += value
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "counts": dict(self.counts),
+                "by_model": {model: dict(counts) for model, counts in self.by_model.items()},
+            }
+
+
+class Hedger:
+    """Send a second request when the first one is slow, and keep whichever answers first.
+
+    The hedge is sent once the first request has been pending for longer than the
+    ``percentile`` of the latencies observed for its model, over the last ``window``
+    requests. Until ``min_samples`` latencies are known, the fixed ``delay`` is used
+    instead, or no hedge is sent if it is ``None``. The hedge can target a cheaper
+    ``model`` than the original request, and is sent with its own copy of the messages.
+
+    Requests run on a pool of ``max_workers`` threads and never wait for a worker: when
+    the pool can't run both requests, the first one is sent from the caller's thread without
+    a hedge. A losing request that already started can't be interrupted: it is left to
+    finish in the background, when its response is handed to ``on_discarded`` so that its
+    tokens are billed too. A hedge still waiting for ``admit`` when the race is decided is
+    not sent. Both requests run in a copy of the caller's context.
+
+    Args:
+        delay: Fixed hedging delay in seconds, used until enough latencies are observed.
+        percentile: Percentile of the observed latencies to use as delay, in ``(0, 1]``.
+        min_samples: Latencies needed before the percentile is used.
+        window: Number of latencies kept per model.
+        model: Model of the hedge request, the original model when omitted.
+        max_workers: Size of the thread pool, two workers per hedged request.
+    """
+
+    def __init__(
+        self,
+        delay: float | None = None,
+        percentile: float | None = 0.95,
+        min_samples: int = 20,
+        window: int = 200,
+        model: str = None,
+        max_workers: int = 32,
+    ):
+        self.delay = delay
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.model = model
+        self.max_workers = max_workers
+        self.metrics = ResilienceMetrics()
+        self.latencies = collections.defaultdict(
+            functools.partial(collections.deque, maxlen=window)
+        )
+        self._executor = None
+        self._running = 0
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="agentkit-hedge"
+                )
+            return self._executor
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+    def hedge_delay(self, model) -> float | None:
+        with self._lock:
+            samples = sorted(self.latencies[model])
+        if self.percentile is None or len(samples) < self.min_samples:
+            return self.delay
+        return samples[min(len(samples) - 1, int(self.percentile * len(samples)))]
+
+    def timed(self, method, model):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            started = time.monotonic()
+            response = method(*args, **kwargs)
+            with self._lock:
+                self.latencies[model].append(time.monotonic() - started)
+            return response
+
+        return wrapper
+
+    def reserve(self, workers: int) -> bool:
+        """Take ``workers`` idle workers of the pool, if it has them."""
+        with self._lock:
+            if self._running + workers > self.max_workers:
+                return False
+            self._running += workers
+            return True
+
+    def release(self, workers: int = 1):
+        with self._lock:
+            self._running -= workers
+
+    def submit(self, method, *args, **kwargs) -> Future:
+        """Run ``method`` on a reserved worker, in a copy of the caller's context."""
+        context = contextvars.copy_context()
+        future = self.executor.submit(context.run, method, *args, **kwargs)
+        future.add_done_callback(lambda future: self.release())
+        return future
+
+    def wrap(
+        self,
+        method: Callable,
+        on_discarded: Callable = None,
+        admit: Callable[[Callable], Callable] = None,
+    ) -> Callable:
+        """Wrap ``method``; ``on_discarded(response)`` receives the responses of lost requests.
+
+        ``admit(method)`` wraps the method sending the hedges, e.g. with
+        :meth:`~agentkit.llms.scheduler.RequestScheduler.wrap` when the first request was
+        already admitted by the scheduler wrapping the hedger.
+        """
+
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            return self.call(method, args, kwargs, on_discarded=on_discarded, admit=admit)
+
+        return wrapper
+
+    def call(self, method, args, kwargs, on_discarded=None, admit=None):
+        model = kwargs.get("model")
+        delay = self.hedge_delay(model)
+        if delay is None:
+            return self.timed(method, model)(*args, **kwargs)
+        if not self.reserve(2):
+            self.metrics.incr("hedges_skipped", model)
+            return self.timed(method, model)(*args, **kwargs)
+
+        primary = self.submit(self.timed(method, model), *args, **kwargs)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            self.release()
+            return primary.result()
+
+        self.metrics.incr("hedges", model)
+        decided = threading.Event()
+        hedge_kwargs = self.hedge_kwargs(kwargs)
+        send = self.unless_decided(self.timed(method, hedge_kwargs.get("model")), decided)
+        hedge = self.submit(admit(send) if admit else send, *args, **hedge_kwargs)
+        return self.race(primary, hedge, model, decided, on_discarded)
+
+    def hedge_kwargs(self, kwargs: dict) -> dict:
+        # The caller may append to the messages once the race is decided, before the hedge
+        # is sent
+        hedge_kwargs = {**kwargs, "model": self.model} if self.model else dict(kwargs)
+        if kwargs.get("messages") is not None:
+            hedge_kwargs["messages"] = list(kwargs["messages"])
+        return hedge_kwargs
+
+    @staticmethod
+    def unless_decided(method, decided: threading.Event):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            if decided.is_set():
+                raise HedgeDiscarded("The race was decided before the hedge was sent")
+            return method(*args, **kwargs)
+
+        return wrapper
+
+    def race(self, primary: Future, hedge: Future, model, decided=None, on_discarded=None):
+        """Return the response of the first request to succeed, or raise the error of the last
+        one to fail, and discard the other request."""
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            winner = next((future for future in done if future.exception() is None), None)
+            if winner is None and pending:
+                # The first answer is an error, give the other request a chance
+                continue
+
+            if decided is not None:
+                decided.set()
+            winner = winner or done.pop()
+            if winner is hedge:
+                self.metrics.incr("hedge_wins", model)
+            for loser in {primary, hedge} - {winner}:
+                self.discard(loser, on_discarded)
+            return winner.result()
+
+    def discard(self, future, on_discarded):
+        if future.cancel():
+            self.metrics.incr("hedges_cancelled")
+            return
+        # Done callbacks run in the worker thread, bill in the caller's context instead
+        context = contextvars.copy_context()
+        future.add_done_callback(
+            functools.partial(context.run, self.bill, on_discarded=on_discarded)
+        )
+
+    def bill(self, future, on_discarded=None):
+        """Hand the response of a discarded request to ``on_discarded``, once it is done."""
+        exception = None if future.cancelled() else future.exception()
+        if isinstance(exception, HedgeDiscarded):
+            self.metrics.incr("hedges_cancelled")
+        if future.cancelled() or exception is not None:
+            return
+        response = future.result()
+        if on_discarded is not None and hasattr(response, "usage"):
+            on_discarded(response)
+        elif hasattr(response, "close"):
+            response.close()
+
+
+class ResilientCompletion:
+    """Retry, circuit breaking and failover around a completion method.
+
+    Each model, starting with the requested one and then ``fallback_models`` in order, is
+    tried up to ``retry.max_attempts`` times with backoff between attempts, unless its
+    circuit is open. Errors that are not transient are raised right away. Requests are
+    hedged by the ``hedge`` of the completion loop, see :class:`Hedger`, each attempt
+    being hedged on its own.
+
+    Args:
+        retry: Backoff policy, :class:`RetryPolicy` defaults when omitted.
+        fallback_models: Models to fail over to, in order.
+        failure_threshold: Consecutive failures opening a model's circuit.
+        recovery_time: Seconds before an open circuit lets a trial request through.
+        sleep: Function used to wait between attempts.
+    """
+
+    def __init__(
+        self,
+        retry: RetryPolicy = None,
+        fallback_models: List[str] = None,
+        failure_threshold: int = 5,
+        recovery_time: float = 30.0,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.retry = retry or RetryPolicy()
+        self.fallback_models = list(fallback_models or [])
+        self.sleep = sleep
+        self.metrics = ResilienceMetrics()
+        self.breakers = collections.defaultdict(
+            functools.partial(
+                CircuitBreaker,
+                failure_threshold=failure_threshold,
+                recovery_time=recovery_time,
+            )
+        )
+
+    def wrap(self, method: Callable) -> Callable:
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            return self.call(method, *args, **kwargs)
+
+        return wrapper
+
+    def call(self, method, *args, **kwargs):
+        last_exception = None
+        models = [kwargs.get("model"), *self.fallback_models]
+
+        for index, model in enumerate(models):
+            breaker = self.admit(model, failover=index > 0)
+            if breaker is None:
+                continue
+
+            try:
+                return self.call_with_retries(method, breaker, args, {**kwargs, "model": model})
+            except Exception as e:
+                if not self.retry.retry_on(e):
+                    raise
+                last_exception = e
+
+        if last_exception is None:
+            raise CircuitOpenException(f"Circuit open for every model: {models}")
+        raise last_exception
+
+    def admit(self, model: str, failover: bool = False) -> CircuitBreaker | None:
+        """Circuit breaker of ``model`` if it lets a request through, ``None`` otherwise."""
+        if failover:
+            self.metrics.incr("failovers", model)
+        breaker = self.breakers[model]
+        if not breaker.allow():
+            self.metrics.incr("short_circuits", model)
+            return None
+        return breaker
+
+    def call_with_retries(self, method, breaker, args, kwargs):
+        model = kwargs["model"]
+        for attempt in range(self.retry.max_attempts):
+            if attempt > 0:
+                self.metrics.incr("retries", model)
+                self.sleep(self.retry.delay(attempt - 1))
+
+            try:
+                return self.attempt(method, breaker, args, kwargs)
+            except Exception as e:
+                # Checked last, as letting a request through can take the half-open trial
+                last = attempt == self.retry.max_attempts - 1
+                if not self.retry.retry_on(e) or last or not breaker.allow():
+                    raise
+
+    def attempt(self, method, breaker, args, kwargs):
+        """Send a request and record its outcome on the circuit of its model."""
+        self.metrics.incr("requests", kwargs["model"])
+        succeeded = None
+        try:
+            response = method(*args, **kwargs)
+            succeeded = True
+            return response
+        except Exception as e:
+            self.metrics.incr("failures", kwargs["model"])
+            # Other errors are answers of the model to a bad request, it is up
+            succeeded = not self.retry.retry_on(e)
+            raise
+        finally:
+            breaker.record(succeeded)
@@ -0,0 +1,209 @@
+import asyncio
+import functools
+import heapq
+import itertools
+import threading
+import time
+from typing import Callable
+from typing import Dict
+from typing import Tuple
+
+# Polling interval of asynchronous waiters, which can't be woken up by the condition
+ASYNC_POLL_INTERVAL = 0.05
+
+
+class TokenBucket:
+    """Bucket holding up to ``capacity`` units, refilled continuously over one minute."""
+
+    def __init__(self, capacity: float, clock=time.monotonic):
+        self.capacity = capacity
+        self.rate = capacity / 60.0
+        self.clock = clock
+        self.level = capacity
+        self.updated_at = clock()
+
+    def refill(self):
+        now = self.clock()
+        self.level = min(self.capacity, self.level + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until ``amount`` units are available, assuming a refilled bucket."""
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def consume(self, amount: float):
+        self.level -= min(amount, self.capacity)
+
+
+class RateLimit:
+    """Requests-per-minute and tokens-per-minute limits of a model and API key."""
+
+    def __init__(self, rpm: int | None = None, tpm: int | None = None, clock=time.monotonic):
+        self.requests = TokenBucket(rpm, clock=clock) if rpm else None
+        self.tokens = TokenBucket(tpm, clock=clock) if tpm else None
+
+    def buckets(self):
+        return [bucket for bucket in (self.requests, self.tokens) if bucket is not None]
+
+    def wait_time(self, cost: int) -> float:
+        for bucket in self.buckets():
+            bucket.refill()
+        waits = [self.requests.wait_time(1)] if self.requests else []
+        if self.tokens:
+            waits.append(self.tokens.wait_time(cost))
+        return max(waits, default=0.0)
+
+    def consume(self, cost: int):
+        if self.requests:
+            self.requests.consume(1)
+        if self.tokens:
+            self.tokens.consume(cost)
+
+
+class RequestScheduler:
+    """Process-wide scheduler smoothing completion requests under provider rate limits.
+
+    Each ``(model, api_key)`` pair has its own token buckets; requests to unlimited pairs go
+    through right away. Waiting requests are served by priority (lower first) and then in
+    arrival order, and a request is only let through once both its request and estimated
+    token cost fit, so concurrent agents share the limits instead of tripping them and
+    retrying. The token bucket is corrected with the actual usage once known.
+
+    Both synchronous (:meth:`acquire`, :meth:`wrap`) and asynchronous (:meth:`aacquire`,
+    :meth:`awrap`) callers are supported and share the same queues.
+    """
+
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.limits: Dict[Tuple[str, str | None], RateLimit] = {}
+        self.queues: Dict[Tuple[str, str | None], list] = {}
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+
+    @classmethod
+    def default(cls) -> "RequestScheduler":
+        """Return the scheduler shared by the whole process."""
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+            return cls._default
+
+    def set_limit(self, model: str, rpm: int = None, tpm: int = None, api_key: str = None):
+        with self._condition:
+            self.limits[(model, api_key)] = RateLimit(rpm=rpm, tpm=tpm, clock=self.clock)
+            self._condition.notify_all()
+
+    def _enqueue(self, key, priority):
+        entry = (priority, next(self._counter))
+        heapq.heappush(self.queues.setdefault(key, []), entry)
+        return entry
+
+    def _try_acquire(self, key, entry, cost) -> float:
+        """Acquire if ``entry`` is first in line and fits, else return the time to wait."""
+        queue = self.queues[key]
+        limit = self.limits[key]
+        wait_time = limit.wait_time(cost)
+        if queue[0] is not entry:
+            return max(wait_time, ASYNC_POLL_INTERVAL)
+        if wait_time > 0:
+            return wait_time
+
+        heapq.heappop(queue)
+        limit.consume(cost)
+        self._condition.notify_all()
+        return 0.0
+
+    def _dequeue(self, key, entry):
+        """Remove a waiter that gave up, e.g. cancelled or interrupted."""
+        queue = self.queues[key]
+        if entry in queue:
+            queue.remove(entry)
+            heapq.heapify(queue)
+            self._condition.notify_all()
+
+    def acquire(self, model: str, cost: int = 0, priority: int = 0, api_key: str = None):
+        key = (model, api_key)
+        with self._condition:
+            if key not in self.limits:
+                return
+            entry = self._enqueue(key, priority)
+            try:
+                while True:
+                    wait_time = self._try_acquire(key, entry, cost)
+                    if not wait_time:
+                        return
+                    self._condition.wait(timeout=wait_time)
+            except BaseException:
+                self._dequeue(key, entry)
+                raise
+
+    async def aacquire(self, model: str, cost: int = 0, priority: int = 0, api_key: str = None):
+        key = (model, api_key)
+        with self._condition:
+            if key not in self.limits:
+                return
+            entry = self._enqueue(key, priority)
+        try:
+            while True:
+                with self._condition:
+                    wait_time = self._try_acquire(key, entry, cost)
+                if not wait_time:
+                    return
+                await asyncio.sleep(min(wait_time, ASYNC_POLL_INTERVAL))
+        except BaseException:
+            with self._condition:
+                self._dequeue(key, entry)
+            raise
+
+    def reconcile(self, model: str, estimated: int, actual: int, api_key: str = None):
+        """Correct the token bucket once the actual usage of a request is known."""
+        with self._condition:
+            limit = self.limits.get((model, api_key))
+            if limit is None or limit.tokens is None:
+                return
+            limit.tokens.refill()
+            limit.tokens.level = min(
+                limit.tokens.capacity, limit.tokens.level + estimated - actual
+            )
+            self._condition.notify_all()
+
+    def _settle(self, kwargs, cost, response):
+        usage = getattr(response, "usage", None)
+        total_tokens = getattr(usage, "total_tokens", None)
+        if total_tokens is not None:
+            self.reconcile(kwargs.get("model"), cost, total_tokens, kwargs.get("api_key"))
+
+    def wrap(self, method: Callable, estimate: Callable = None, priority: int = 0) -> Callable:
+        """Wrap a completion method so each call waits for its turn.
+
+        ``estimate(kwargs)`` returns the estimated token cost of a request.
+        """
+
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            cost = estimate(kwargs) if estimate else 0
+            self.acquire(kwargs.get("model"), cost, priority, kwargs.get("api_key"))
+            response = method(*args, **kwargs)
+            self._settle(kwargs, cost, response)
+            return response
+
+        return wrapper
+
+    def awrap(self, method: Callable, estimate: Callable = None, priority: int = 0) -> Callable:
+        """Asynchronous counterpart of :meth:`wrap`, e.g. for ``litellm.acompletion``."""
+
+        @functools.wraps(method)
+        async def wrapper(*args, **kwargs):
+            cost = estimate(kwargs) if estimate else 0
+            await self.aacquire(kwargs.get("model"), cost, priority, kwargs.get("api_key"))
+            response = await method(*args, **kwargs)
+            self._settle(kwargs, cost, response)
+            return response
+
+        return wrapper
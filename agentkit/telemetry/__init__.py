@@ -1,2 +1,11 @@
+from .exporter import BatchLogExporter  # noqa: F401
+from .exporter import LogExporter  # noqa: F401
+from .helpers import configure  # noqa: F401
 from .helpers import get_parent_run_id  # noqa: F401
 from .helpers import traceable  # noqa: F401
+from .profiler import Profiler  # noqa: F401
+from .sampling import Sampler  # noqa: F401
+from .spans import InMemoryCollector  # noqa: F401
+from .spans import OTLPFileExporter  # noqa: F401
+from .spans import instrument  # noqa: F401
+from .spans import span  # noqa: F401
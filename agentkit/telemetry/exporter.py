@@ -0,0 +1,152 @@
+import atexit
+import copy
+import logging
+import queue
+import threading
+import traceback
+from typing import List
+from typing import Tuple
+
+Entry = Tuple[logging.Logger, int, dict]
+
+
+def format_error(record: dict):
+    error = record.get("error")
+    if isinstance(error, BaseException):
+        record["error"] = "".join(
+            traceback.format_exception(type(error), error, error.__traceback__)
+        )
+
+
+def snapshot(value):
+    """Copy of a recorded value, or its ``repr`` when it can't be copied."""
+    try:
+        return copy.deepcopy(value)
+    except Exception:
+        return repr(value)
+
+
+class LogExporter:
+    """Log the records of ``traceable`` functions right away, in the calling thread.
+
+    This is the exporter of the traceable functions unless another one is set with
+    :func:`configure`.
+    """
+
+    def submit(self, logger: logging.Logger, level: int, record: dict) -> bool:
+        self.export([(logger, level, record)])
+        return True
+
+    def export(self, batch: List[Entry]):
+        for logger, level, record in batch:
+            # Formatted here rather than when the call failed, off the hot path
+            format_error(record)
+            logger.log(level, record)
+
+    def flush(self, timeout: float | None = None) -> bool:
+        return True
+
+    def shutdown(self):
+        pass
+
+
+class BatchLogExporter(LogExporter):
+    """Log the records of ``traceable`` functions in batches from a background thread.
+
+    Records are put in a bounded queue, so that tracing doesn't wait on logging handlers
+    (files, network). When the queue is full, records are dropped and counted in
+    ``dropped`` rather than slowing the traced functions down. The process-wide
+    :meth:`default` exporter is flushed at exit, opt in with
+    ``configure(exporter=BatchLogExporter.default())``.
+
+    Records are copied when submitted, as the inputs and outputs they hold may be changed
+    by the caller before they are logged. Values that can't be copied are recorded by
+    their ``repr``.
+
+    Args:
+        max_queue_size: Maximum number of records waiting to be exported.
+        batch_size: Maximum number of records exported at once.
+        flush_interval: Seconds the exporter waits to fill a batch.
+    """
+
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(
+        self, max_queue_size: int = 10_000, batch_size: int = 256, flush_interval: float = 0.5
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def default(cls) -> "BatchLogExporter":
+        """Return the exporter shared by the whole process."""
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+                atexit.register(cls._default.shutdown)
+            return cls._default
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self.run, name="agentkit-trace-exporter", daemon=True
+                )
+                self._thread.start()
+
+    def submit(self, logger: logging.Logger, level: int, record: dict) -> bool:
+        if self._thread is None:
+            self.start()
+        format_error(record)
+        record = {key: snapshot(value) for key, value in record.items()}
+        try:
+            self._queue.put_nowait((logger, level, record))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def run(self):
+        while True:
+            batch, marker = self.next_batch()
+            try:
+                if batch:
+                    self.export(batch)
+            except Exception:
+                logging.getLogger(__name__).exception("Failed to export trace records")
+            finally:
+                if marker is not None:
+                    marker.set()
+
+    def next_batch(self) -> Tuple[List[Entry], threading.Event | None]:
+        """Wait for the next batch of records, and the marker of the flush waiting for it,
+        if any."""
+        batch = []
+        entry = self._queue.get()
+        try:
+            # Fill the batch, unless a flush is waiting for it
+            while not isinstance(entry, threading.Event):
+                batch.append(entry)
+                if len(batch) >= self.batch_size:
+                    return batch, None
+                entry = self._queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            return batch, None
+        return batch, entry
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Wait until the records submitted so far are exported."""
+        if self._thread is None:
+            return True
+        marker = threading.Event()
+        # Blocks if the queue is full, flushing must not drop its marker
+        self._queue.put(marker)
+        return marker.wait(timeout)
+
+    def shutdown(self):
+        self.flush(timeout=5.0)
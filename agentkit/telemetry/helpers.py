@@ -3,24 +3,46 @@ import functools
 import inspect
 import logging
 import time
-import traceback
 import uuid
 from typing import Any
 from typing import Callable
 from typing import Dict
 
+from .exporter import LogExporter
+from .sampling import Sampler
+
 _PARENT_RUN_ID = contextvars.ContextVar("_PARENT_RUN_ID", default=None)
+# Head sampling decision of the current trace, `None` outside of a trace
+_SAMPLED = contextvars.ContextVar("_SAMPLED", default=None)
+
+_sampler: Sampler | None = None
+_exporter: LogExporter | None = None
+# Used when neither the traceable function nor `configure` set one: every run is
+# recorded, and logged in the calling thread
+_default_sampler = Sampler()
+_default_exporter = LogExporter()
 
 
 def get_parent_run_id():
     return _PARENT_RUN_ID.get()
 
 
+def configure(sampler: Sampler | None = None, exporter: LogExporter | None = None):
+    """Set the sampler and exporter of the traceable functions that don't have their own.
+
+    By default every run is recorded and logged synchronously by a :class:`LogExporter`.
+    Use :meth:`BatchLogExporter.default` to log records from a background thread.
+    """
+    global _sampler, _exporter
+    _sampler = sampler
+    _exporter = exporter
+
+
 def _get_inputs(signature: inspect.Signature, *args: Any, **kwargs: Any) -> Dict[str, Any]:
     """Return a dictionary of inputs from the function signature."""
     bound = signature.bind_partial(*args, **kwargs)
     bound.apply_defaults()
-    arguments = dict(bound.arguments)
+    arguments = bound.arguments
     arguments.pop("self", None)
     arguments.pop("cls", None)
     for param_name, param in signature.parameters.items():
@@ -34,67 +56,163 @@ def _get_inputs(signature: inspect.Signature, *args: Any, **kwargs: Any) -> Dict
     return arguments
 
 
+class _Tracer:
+    """Record the runs of a traced function."""
+
+    def __init__(self, func, name, logger, level, metadata, sampler, exporter):
+        self.name = name
+        self.logger = logger
+        self.level = level
+        self.metadata = metadata
+        self._sampler = sampler
+        self._exporter = exporter
+        # Resolved once, as binding the inputs is the main cost of a traced call
+        try:
+            self.signature = inspect.signature(func)
+        except (TypeError, ValueError):
+            self.signature = None
+
+    @property
+    def sampler(self) -> Sampler:
+        return self._sampler or _sampler or _default_sampler
+
+    @property
+    def exporter(self) -> LogExporter:
+        return self._exporter or _exporter or _default_exporter
+
+    def start(self, args, kwargs) -> tuple | None:
+        """Start a run, ``None`` when its trace isn't sampled."""
+        sampled = _SAMPLED.get()
+        if sampled is None:
+            sampled = self.sampler.sample()
+        if not sampled:
+            return None
+        inputs = _get_inputs(self.signature, *args, **kwargs) if self.signature else {}
+        return (inputs, _PARENT_RUN_ID.get(), uuid.uuid4(), time.perf_counter())
+
+    def finish(self, run, logging_extra, **result):
+        if run is None:
+            return
+        inputs, parent_run_id, run_id, started = run
+        duration = time.perf_counter() - started
+        if not self.sampler.keep(duration, "error" in result):
+            return
+        record = {
+            "name": self.name,
+            "inputs": inputs,
+            **result,
+            "parent_run_id": parent_run_id,
+            "run_id": run_id,
+            "timestamp": time.time(),
+            **self.metadata,
+        }
+        if logging_extra:
+            record.update(logging_extra)
+        self.exporter.submit(self.logger, self.level, record)
+
+
+def _enter(run) -> tuple:
+    """Make ``run`` the parent of the runs started until :func:`_exit`, or make them
+    follow its sampling decision when it isn't sampled."""
+    if run is None:
+        return _SAMPLED.set(False), None
+    return _SAMPLED.set(True), _PARENT_RUN_ID.set(run[2])
+
+
+def _exit(tokens: tuple):
+    sampled, parent_run_id = tokens
+    _SAMPLED.reset(sampled)
+    if parent_run_id is not None:
+        _PARENT_RUN_ID.reset(parent_run_id)
+
+
+def _sync_wrapper(func: Callable, tracer: _Tracer) -> Callable:
+    @functools.wraps(func)
+    def wrapper(*args: Any, logging_extra: None | dict = None, **kwargs: Any) -> Any:
+        run = tracer.start(args, kwargs)
+        tokens = _enter(run)
+        try:
+            function_result = func(*args, **kwargs)
+        except Exception as e:
+            tracer.finish(run, logging_extra, error=e)
+            raise
+        finally:
+            _exit(tokens)
+        tracer.finish(run, logging_extra, outputs=function_result)
+        return function_result
+
+    return wrapper
+
+
+def _async_wrapper(func: Callable, tracer: _Tracer) -> Callable:
+    @functools.wraps(func)
+    async def wrapper(*args: Any, logging_extra: None | dict = None, **kwargs: Any) -> Any:
+        run = tracer.start(args, kwargs)
+        tokens = _enter(run)
+        try:
+            function_result = await func(*args, **kwargs)
+        except Exception as e:
+            tracer.finish(run, logging_extra, error=e)
+            raise
+        finally:
+            _exit(tokens)
+        tracer.finish(run, logging_extra, outputs=function_result)
+        return function_result
+
+    return wrapper
+
+
+def _generator_wrapper(func: Callable, tracer: _Tracer) -> Callable:
+    @functools.wraps(func)
+    def wrapper(*args: Any, logging_extra: None | dict = None, **kwargs: Any) -> Any:
+        run = tracer.start(args, kwargs)
+        generator = func(*args, **kwargs)
+        outputs, sent = [], None
+        try:
+            while True:
+                # The run is only the parent while the generator runs, not while the
+                # caller handles the items
+                tokens = _enter(run)
+                try:
+                    item = generator.send(sent)
+                finally:
+                    _exit(tokens)
+                outputs.append(item)
+                sent = yield item
+        except StopIteration:
+            tracer.finish(run, logging_extra, outputs=outputs)
+        except Exception as e:
+            tracer.finish(run, logging_extra, error=e)
+            raise
+        finally:
+            generator.close()
+
+    return wrapper
+
+
 # inspired by langsmith.run_helpers.traceable
 def traceable(
     name,
     logger,
     metadata: None | dict = None,
     level=logging.INFO,
+    sampler: Sampler | None = None,
+    exporter: LogExporter | None = None,
 ) -> Callable:
-    original_metadata = metadata or {}
+    """Record the inputs and outputs, or error, of the calls of the decorated function.
+
+    Runs are sampled by ``sampler`` and their records handed to ``exporter``, by default
+    those set with :func:`configure`. Coroutine functions are wrapped in a coroutine
+    function, which records the run once awaited, and generator functions in a generator
+    function, which records the yielded items once exhausted.
+    """
 
     def decorator(func: Callable):
-        @functools.wraps(func)
-        def wrapper(
-            *args: Any,
-            logging_extra: None | dict = None,
-            **kwargs: Any,
-        ) -> Any:
-            parent_run_id = _PARENT_RUN_ID.get()
-
-            run_id = uuid.uuid4()
-
-            logging_extra = logging_extra or {}
-            metadata = original_metadata.copy()
-            metadata.update(logging_extra)
-
-            signature = inspect.signature(func)
-            inputs = _get_inputs(signature, *args, **kwargs)
-
-            _PARENT_RUN_ID.set(run_id)
-            try:
-                function_result = func(*args, **kwargs)
-                logger.log(
-                    level,
-                    {
-                        "name": name,
-                        "inputs": inputs,
-                        "outputs": function_result,
-                        "parent_run_id": parent_run_id,
-                        "run_id": run_id,
-                        "timestamp": time.time(),
-                        **metadata,
-                    },
-                )
-            except Exception as e:
-                stacktrace = traceback.format_exc()
-                logger.log(
-                    level,
-                    {
-                        "name": name,
-                        "inputs": inputs,
-                        "error": stacktrace,
-                        "parent_run_id": parent_run_id,
-                        "run_id": run_id,
-                        "timestamp": time.time(),
-                        **metadata,
-                    },
-                )
-                raise e
-            finally:
-                _PARENT_RUN_ID.set(parent_run_id)
-            return function_result
-
-        return wrapper
+        tracer = _Tracer(func, name, logger, level, metadata or {}, sampler, exporter)
+        if inspect.iscoroutinefunction(func):
+            return _async_wrapper(func, tracer)
+        if inspect.isgeneratorfunction(func):
+            return _generator_wrapper(func, tracer)
+        return _sync_wrapper(func, tracer)
 
     return decorator
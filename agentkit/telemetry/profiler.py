@@ -0,0 +1,151 @@
+"""Profile a workflow session from the spans of the engines, callbacks and completion loop.
+
+:class:`Profiler` collects the spans while installed, and exports their call tree for flame
+graph viewers, without sampling: every instrumented call is recorded with its
+``perf_counter_ns`` timings::
+
+    with Profiler() as profiler:
+        replay(session)
+    profiler.write_collapsed("session.folded")  # speedscope, flamegraph.pl
+    profiler.write_chrome_trace("session.json")  # Perfetto, chrome://tracing, speedscope
+
+Code outside the instrumented sites, like the body of an action, is accounted as the self
+time of its closest span.
+"""
+
+import json
+import os
+import threading
+from collections import deque
+from typing import Dict
+from typing import List
+
+from .spans import Collector
+from .spans import Span
+from .spans import instrument
+
+# Attributes naming the frames, in priority order
+LABEL_ATTRIBUTES = ("callback", "group", "event", "tool", "workflow", "model")
+
+
+def frame_label(span: Span) -> str:
+    """Name of the span in the profiles, e.g. ``workflow.trigger(cycle)``."""
+    for key in LABEL_ATTRIBUTES:
+        value = span.attributes.get(key)
+        if value is not None:
+            label = f"{span.name}({value})"
+            break
+    else:
+        label = span.name
+    # ``;`` separates the frames of the collapsed stacks
+    return label.replace(";", ",")
+
+
+class Profiler(Collector):
+    """Record the spans started while installed, and export them as a profile.
+
+    Use it as a context manager, or call :meth:`start` and :meth:`stop`. It replaces the
+    installed collector meanwhile, and records the spans of every thread.
+
+    Args:
+        max_spans: Number of spans kept, the oldest are dropped first.
+    """
+
+    def __init__(self, max_spans: int = 1_000_000):
+        self.spans = deque(maxlen=max_spans)
+        self.thread_names: Dict[int, str] = {}
+        self._instrument: instrument | None = None
+
+    def on_end(self, span: Span):
+        # Spans end in the thread that started them, but for the explicitly ended ones
+        if span.thread_id not in self.thread_names:
+            self.thread_names[span.thread_id] = threading.current_thread().name
+        self.spans.append(span)
+
+    def start(self):
+        if self._instrument is None:
+            self._instrument = instrument(self)
+
+    def stop(self):
+        if self._instrument is not None:
+            self._instrument.stop()
+            self._instrument = None
+
+    def __enter__(self) -> "Profiler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def clear(self):
+        self.spans.clear()
+        self.thread_names.clear()
+
+    def children(self) -> Dict[object | None, List[Span]]:
+        """Spans by parent span id, the roots are under ``None``.
+
+        Spans whose parent wasn't recorded, like a ``traceable`` run, are roots."""
+        recorded = {span.span_id for span in self.spans}
+        tree: Dict[object | None, List[Span]] = {}
+        for span in self.spans:
+            parent = span.parent_id if span.parent_id in recorded else None
+            tree.setdefault(parent, []).append(span)
+        return tree
+
+    def collapsed(self) -> List[str]:
+        """Collapsed stacks of the profile, one ``frame;frame;frame self_time_ns`` line per
+        distinct stack, as read by ``flamegraph.pl`` and speedscope."""
+        tree = self.children()
+        totals: Dict[str, int] = {}
+
+        # Iterative walk, the call trees of long sessions can be deep
+        stack = [(root, frame_label(root)) for root in tree.get(None, [])]
+        while stack:
+            span, path = stack.pop()
+            children = tree.get(span.span_id, [])
+            self_ns = span.duration_ns - sum(child.duration_ns for child in children)
+            totals[path] = totals.get(path, 0) + max(self_ns, 0)
+            stack.extend((child, f"{path};{frame_label(child)}") for child in children)
+
+        return [f"{path} {total}" for path, total in totals.items()]
+
+    def chrome_trace(self) -> dict:
+        """Profile in the Chrome trace event format, with a complete event per span."""
+        pid = os.getpid()
+        origin = min((span.perf_start_ns for span in self.spans), default=0)
+        events = [
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": pid,
+                "tid": tid,
+                "args": {"name": name},
+            }
+            for tid, name in self.thread_names.items()
+        ]
+        for span in self.spans:
+            args = {key: str(value) for key, value in span.attributes.items()}
+            if span.error is not None:
+                args["error"] = span.error
+            events.append(
+                {
+                    "name": frame_label(span),
+                    "cat": span.name.split(".")[0],
+                    "ph": "X",
+                    "ts": (span.perf_start_ns - origin) / 1000,
+                    "dur": span.duration_ns / 1000,
+                    "pid": pid,
+                    "tid": span.thread_id,
+                    "args": args,
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ns"}
+
+    def write_collapsed(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            f.writelines(line + "\n" for line in self.collapsed())
+
+    def write_chrome_trace(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.chrome_trace(), f)
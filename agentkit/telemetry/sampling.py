@@ -0,0 +1,44 @@
+import random
+from typing import Callable
+
+
+class Sampler:
+    """Decide which runs of ``traceable`` functions are recorded.
+
+    Head sampling decides when a root run starts, i.e. one without a traced parent, and
+    its nested runs follow the same decision, so that traces are recorded whole. Runs
+    that aren't sampled only cost a context variable lookup, their inputs aren't bound.
+
+    Tail sampling decides once a sampled run finished: failed runs and runs slower than
+    ``slow_threshold`` are always kept, other runs are kept with ``tail_rate``.
+
+    The sampler of all the traceable functions without their own is set with
+    ``configure(sampler=...)``.
+
+    Args:
+        rate: Probability that a root run is traced.
+        tail_rate: Probability that a successful run faster than ``slow_threshold`` is kept.
+        slow_threshold: Duration in seconds from which a run is always kept.
+    """
+
+    def __init__(
+        self,
+        rate: float = 1.0,
+        tail_rate: float = 1.0,
+        slow_threshold: float | None = None,
+        random: Callable[[], float] = random.random,
+    ):
+        self.rate = rate
+        self.tail_rate = tail_rate
+        self.slow_threshold = slow_threshold
+        self.random = random
+
+    def sample(self) -> bool:
+        return self.rate >= 1.0 or self.random() < self.rate
+
+    def keep(self, duration: float, failed: bool) -> bool:
+        if failed or self.tail_rate >= 1.0:
+            return True
+        if self.slow_threshold is not None and duration >= self.slow_threshold:
+            return True
+        return self.random() < self.tail_rate
@@ -0,0 +1,314 @@
+"""Spans timing the hot paths of the workflow engines and of the completion loop.
+
+Instrumentation is disabled until a collector is installed with :func:`instrument`, and
+:func:`span` then returns a shared no-op span, so instrumented code only pays for a
+function call. Spans are nested through the ``_PARENT_RUN_ID`` context variable of
+:func:`traceable`, so spans and traced runs share one tree::
+
+    with instrument(InMemoryCollector()) as collector:
+        workflow.send("cycle")
+    collector.summary()
+"""
+
+import contextvars
+import json
+import threading
+import time
+import uuid
+from abc import ABC
+from abc import abstractmethod
+from collections import deque
+from typing import Any
+from typing import Dict
+from typing import List
+
+from .helpers import _PARENT_RUN_ID
+
+_TRACE_ID = contextvars.ContextVar("_TRACE_ID", default=None)
+
+collector: "Collector | None" = None
+"""Collector of the finished spans, instrumentation is disabled when ``None``."""
+
+
+class Collector(ABC):
+    """Receive the spans as they end."""
+
+    @abstractmethod
+    def on_end(self, span: "Span"):
+        pass
+
+    def flush(self):  # noqa: B027, optional for the collectors that don't buffer
+        pass
+
+
+class Span:
+    __slots__ = (
+        "collector",
+        "name",
+        "attributes",
+        "span_id",
+        "parent_id",
+        "trace_id",
+        "thread_id",
+        "start_ns",
+        "end_ns",
+        "perf_start_ns",
+        "perf_end_ns",
+        "error",
+        "_tokens",
+    )
+
+    def __init__(self, collector: Collector, name: str, attributes: Dict[str, Any]):
+        self.collector = collector
+        self.name = name
+        self.attributes = attributes
+        self.span_id = uuid.uuid4()
+        self.parent_id = _PARENT_RUN_ID.get()
+        self.trace_id = _TRACE_ID.get() or self.span_id
+        self.thread_id = threading.get_ident()
+        # Durations are measured with the monotonic clock, anchored to the wall clock
+        self.start_ns = time.time_ns()
+        self.perf_start_ns = time.perf_counter_ns()
+        self.end_ns = None
+        self.perf_end_ns = None
+        self.error = None
+        self._tokens = None
+
+    @property
+    def duration_ns(self) -> int:
+        return (self.perf_end_ns or time.perf_counter_ns()) - self.perf_start_ns
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def end(self, error: BaseException | None = None):
+        if self.end_ns is not None:
+            return
+        self.perf_end_ns = time.perf_counter_ns()
+        self.end_ns = self.start_ns + self.perf_end_ns - self.perf_start_ns
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        self.collector.on_end(self)
+
+    def __enter__(self):
+        # Nested spans and traced runs are children of this span
+        self._tokens = (_PARENT_RUN_ID.set(self.span_id), _TRACE_ID.set(self.trace_id))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        parent_token, trace_token = self._tokens
+        _PARENT_RUN_ID.reset(parent_token)
+        _TRACE_ID.reset(trace_token)
+        self.end(exc)
+        return False
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.name!r}, {self.attributes!r})"
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set_attribute(self, key, value):
+        pass
+
+    def end(self, error=None):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def span(name: str, **attributes):
+    """Span timing a ``with`` block, a no-op when instrumentation is disabled."""
+    if collector is None:
+        return NOOP_SPAN
+    return Span(collector, name, attributes)
+
+
+def start_span(name: str, **attributes):
+    """Span ended explicitly with ``end()``, for work interleaved with other code like a
+    stream consumed by the caller. It isn't the parent of the spans started meanwhile."""
+    return span(name, **attributes)
+
+
+def enabled() -> bool:
+    return collector is not None
+
+
+class instrument:
+    """Install ``collector`` while the block runs, or until :meth:`stop` when not used as a
+    context manager. Collectors are process-wide, spans of every thread are collected."""
+
+    def __init__(self, new_collector: Collector):
+        self.collector = new_collector
+        self.previous = None
+        self.start()
+
+    def start(self):
+        global collector
+        self.previous, collector = collector, self.collector
+
+    def stop(self):
+        global collector
+        collector = self.previous
+        self.collector.flush()
+
+    def __enter__(self) -> Collector:
+        return self.collector
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class InMemoryCollector(Collector):
+    """Keep the last ``max_spans`` spans in memory and aggregate their durations.
+
+    Args:
+        max_spans: Number of spans kept, the aggregates count every span.
+    """
+
+    def __init__(self, max_spans: int = 100_000):
+        self.spans = deque(maxlen=max_spans)
+        self.stats: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+
+    def on_end(self, span: Span):
+        duration = span.end_ns - span.start_ns
+        with self._lock:
+            self.spans.append(span)
+            stats = self.stats.get(span.name)
+            if stats is None:
+                self.stats[span.name] = [1, duration, duration, int(span.error is not None)]
+            else:
+                stats[0] += 1
+                stats[1] += duration
+                stats[2] = max(stats[2], duration)
+                stats[3] += span.error is not None
+
+    def by_name(self, name: str) -> List[Span]:
+        return [span for span in self.spans if span.name == name]
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Count, errors, total, mean and max duration in milliseconds of the spans by name."""
+        with self._lock:
+            return {
+                name: {
+                    "count": count,
+                    "errors": errors,
+                    "total_ms": total / 1e6,
+                    "mean_ms": total / count / 1e6,
+                    "max_ms": maximum / 1e6,
+                }
+                for name, (count, total, maximum, errors) in self.stats.items()
+            }
+
+    def clear(self):
+        with self._lock:
+            self.spans.clear()
+            self.stats.clear()
+
+
+def otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(spans: List[Span], service_name: str = "agentkit") -> dict:
+    """OTLP/JSON ``ExportTraceServiceRequest`` of the spans, as sent to an OpenTelemetry
+    collector or read by its ``otlpjsonfile`` receiver."""
+
+    def span_id(value) -> str:
+        return f"{value.int & 0xFFFFFFFFFFFFFFFF:016x}"
+
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": [
+                        {"key": "service.name", "value": otlp_value(service_name)},
+                    ]
+                },
+                "scopeSpans": [
+                    {
+                        "scope": {"name": "agentkit"},
+                        "spans": [
+                            {
+                                "traceId": f"{span.trace_id.int:032x}",
+                                "spanId": span_id(span.span_id),
+                                **(
+                                    {"parentSpanId": span_id(span.parent_id)}
+                                    if span.parent_id is not None
+                                    else {}
+                                ),
+                                "name": span.name,
+                                "kind": 1,
+                                "startTimeUnixNano": str(span.start_ns),
+                                "endTimeUnixNano": str(span.end_ns),
+                                "attributes": [
+                                    {"key": key, "value": otlp_value(value)}
+                                    for key, value in span.attributes.items()
+                                ],
+                                "status": (
+                                    {"code": 2, "message": span.error}
+                                    if span.error is not None
+                                    else {"code": 1}
+                                ),
+                            }
+                            for span in spans
+                        ],
+                    }
+                ],
+            }
+        ]
+    }
+
+
+class OTLPFileExporter(Collector):
+    """Append the spans to a file in the OTLP/JSON format, one request per line.
+
+    Works offline: the file can be loaded later by an OpenTelemetry collector with the
+    ``otlpjsonfile`` receiver, or sent to any OTLP/HTTP endpoint as is.
+
+    Args:
+        path: Path of the JSONL file.
+        batch_size: Number of spans written at once.
+        service_name: ``service.name`` resource attribute of the spans.
+    """
+
+    def __init__(self, path: str, batch_size: int = 512, service_name: str = "agentkit"):
+        self.path = path
+        self.batch_size = batch_size
+        self.service_name = service_name
+        self._pending: List[Span] = []
+        self._lock = threading.Lock()
+
+    def on_end(self, span: Span):
+        with self._lock:
+            self._pending.append(span)
+            if len(self._pending) < self.batch_size:
+                return
+            spans, self._pending = self._pending, []
+        self.write(spans)
+
+    def flush(self):
+        with self._lock:
+            spans, self._pending = self._pending, []
+        if spans:
+            self.write(spans)
+
+    def write(self, spans: List[Span]):
+        line = json.dumps(to_otlp(spans, self.service_name))
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
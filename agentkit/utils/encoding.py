@@ -0,0 +1,33 @@
+import json
+from typing import Any
+
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    # Optional, see the `fast` extra
+    orjson = None
+
+
+def dumps(value: Any) -> str:
+    """Serialize ``value`` to JSON, with ``orjson`` when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY).decode("utf-8")
+    return json.dumps(value, ensure_ascii=False)
+
+
+def encode_tool_result(value: Any) -> str:
+    """Default encoder of the results sent back to the model as tool messages.
+
+    Strings are sent as is, pydantic models and JSON-compatible values as JSON, and anything
+    else through ``str``.
+    """
+    if isinstance(value, str):
+        return value
+    if isinstance(value, BaseModel):
+        return value.model_dump_json()
+    try:
+        return dumps(value)
+    except (TypeError, ValueError):
+        return str(value)
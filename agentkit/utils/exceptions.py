@@ -0,0 +1,9 @@
+# Raised by the tool executor and by the process pools running its calls
+
+
+class ToolExecutorException(Exception):
+    pass
+
+
+class ToolTimeoutException(ToolExecutorException):
+    pass
@@ -1,16 +1,38 @@
 import itertools
+import types
 
 
 def process_and_display_output(output, messages):
-    processed_output = ""
     if type(output) == itertools._tee:
-        for chunk in output:
-            content = chunk["choices"][0].get("delta", {}).get("content")
-            if content is not None:
-                processed_output += content
-                print(content, end="")
+        processed_output = display(chunk_contents(output))
+    elif isinstance(output, types.GeneratorType):
+        processed_output = display(text_deltas(output))
     else:
         processed_output = output
         print(processed_output)
 
     messages += [{"role": "assistant", "content": processed_output}]
+
+
+def display(contents) -> str:
+    """Print the streamed contents as they come, and return them joined."""
+    processed_output = ""
+    for content in contents:
+        processed_output += content
+        print(content, end="")
+    return processed_output
+
+
+def chunk_contents(output):
+    for chunk in output:
+        content = chunk["choices"][0].get("delta", {}).get("content")
+        if content is not None:
+            yield content
+
+
+def text_deltas(output):
+    from agentkit.llms.events import TextDelta
+
+    for event in output:
+        if isinstance(event, TextDelta):
+            yield event.content
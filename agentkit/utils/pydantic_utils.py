@@ -1,4 +1,6 @@
+import collections
 import inspect
+import threading
 from inspect import getfullargspec
 from typing import Any
 from typing import Callable
@@ -130,6 +132,72 @@ def convert_annotation(val):
     return annotation_mapping.get(val, val)
 
 
+# Least recently used models are evicted first, once the cache holds `_MODEL_CACHE_SIZE`
+_MODEL_CACHE: collections.OrderedDict = collections.OrderedDict()
+_MODEL_CACHE_SIZE = 1024
+_MODEL_CACHE_LOCK = threading.Lock()
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(v)) for key, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    hash(value)
+    return value
+
+
+def _model_cache_key(
+    model_name, func, base_model, config, validators, override_params, ignored_params
+):
+    """Key identifying the model generated for a function, or ``None`` if not cacheable.
+
+    Functions are identified by their code object, together with what can differ between
+    functions sharing it (closures created in a loop or by a factory): defaults,
+    annotations and the overrides.
+    """
+    code = getattr(func, "__code__", None)
+    try:
+        return (
+            model_name,
+            code if code is not None else func,
+            _freeze(getattr(func, "__defaults__", None)),
+            _freeze(getattr(func, "__kwdefaults__", None)),
+            _freeze(getattr(func, "__annotations__", None)),
+            base_model,
+            _freeze(config),
+            _freeze(validators),
+            _freeze(override_params),
+            _freeze(ignored_params),
+        )
+    except TypeError:
+        # Unhashable defaults or overrides
+        return None
+
+
+def clear_model_cache():
+    with _MODEL_CACHE_LOCK:
+        _MODEL_CACHE.clear()
+
+
+def _cached_model(key) -> Type[BaseModel] | None:
+    with _MODEL_CACHE_LOCK:
+        model = _MODEL_CACHE.get(key)
+        if model is not None:
+            _MODEL_CACHE.move_to_end(key)
+        return model
+
+
+def _cache_model(key, model: Type[BaseModel]) -> Type[BaseModel]:
+    """Cache ``model``, or return the one cached meanwhile by another thread."""
+    with _MODEL_CACHE_LOCK:
+        model = _MODEL_CACHE.setdefault(key, model)
+        _MODEL_CACHE.move_to_end(key)
+        while len(_MODEL_CACHE) > _MODEL_CACHE_SIZE:
+            _MODEL_CACHE.popitem(last=False)
+        return model
+
+
 def create_pydantic_model_from_func(
     model_name: str,
     func: Callable,
@@ -142,13 +210,35 @@ def create_pydantic_model_from_func(
     """
     Create a Pydantic model from a function signature.
 
+    Models are cached, so decorating the same function again, e.g. in ``repeat`` or
+    ``combine``, returns the model generated the first time. The cache keeps the most
+    recently used models, at most ``_MODEL_CACHE_SIZE``.
+
     If inspect signature return string for imported methods, consider removing `from __future__ import annotations`
     Documentation:
     -------------
     1. https://docs.pydantic.dev/latest/concepts/models/#dynamic-model-creation
     2. https://github.com/pydantic/pydantic/issues/1391
     """
-
+    key = _model_cache_key(
+        model_name, func, base_model, config, validators, override_params, ignored_params
+    )
+    if key is not None:
+        model = _cached_model(key)
+        if model is not None:
+            return model
+
+    model = _create_pydantic_model_from_func(
+        model_name, func, base_model, config, validators, override_params, ignored_params
+    )
+    if key is not None:
+        model = _cache_model(key, model)
+    return model
+
+
+def _create_pydantic_model_from_func(
+    model_name, func, base_model, config, validators, override_params, ignored_params
+):
     # Retrieve function signature details using inspect.signature
     signature = inspect.signature(func)
     parameters = list(signature.parameters.values())
@@ -0,0 +1,236 @@
+import collections
+import functools
+import hashlib
+import json
+import pickle
+import sqlite3
+import threading
+import time
+from abc import ABC
+from abc import abstractmethod
+from typing import Any
+from typing import Callable
+
+# Request arguments that do not change the completion and must not split the cache.
+IGNORED_KEYS = frozenset(
+    {
+        "logging_extra",
+        "metadata",
+        "timeout",
+        "request_timeout",
+        "num_retries",
+    }
+)
+
+# Request arguments selecting the account or deployment answering the request. They split
+# the cache, so that responses aren't shared across tenants, and are only kept hashed.
+CREDENTIAL_KEYS = frozenset({"api_key", "api_base", "base_url"})
+
+_MISSING = object()
+
+
+def _normalize(value):
+    if hasattr(value, "model_dump"):
+        value = value.model_dump(exclude_none=True)
+    if isinstance(value, dict):
+        return {key: _normalize(v) for key, v in value.items() if v is not None}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def _digest(value) -> str:
+    return hashlib.sha256(str(value).encode("utf-8")).hexdigest()
+
+
+def make_cache_key(*args, **kwargs) -> str:
+    """Hash the normalized completion request (model, messages, tools, tool_choice, ...)."""
+    request = {
+        key: _digest(value) if key in CREDENTIAL_KEYS and value is not None else value
+        for key, value in kwargs.items()
+        if key not in IGNORED_KEYS
+    }
+    payload = json.dumps(
+        {"args": _normalize(list(args)), "kwargs": _normalize(request)},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def is_cache_hit(response) -> bool:
+    """Whether a response was served by :meth:`ResponseCache.wrap`, so it isn't billed."""
+    return getattr(response, "cache_hit", False) is True
+
+
+def mark_cache_hit(response):
+    try:
+        response.cache_hit = True
+    except (AttributeError, TypeError, ValueError):
+        # Responses without attributes, e.g. strings, can't be told apart
+        pass
+    return response
+
+
+class CachedStream:
+    """Replay of the chunks of a cached streamed response."""
+
+    cache_hit = True
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self.chunks)
+
+
+class ResponseCache(ABC):
+    """Base class for completion response caches.
+
+    Entries expire ``ttl`` seconds after being stored; ``ttl=None`` keeps them forever.
+    ``hits`` and ``misses`` count the lookups of :meth:`get`, updated under the lock of the
+    store so they stay exact when the cache is shared by threads.
+    """
+
+    def __init__(self, ttl: float | None = None):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def is_expired(self, stored_at: float) -> bool:
+        return self.ttl is not None and time.time() - stored_at > self.ttl
+
+    @abstractmethod
+    def get(self, key: str, default: Any = None) -> Any:
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+    @abstractmethod
+    def clear(self) -> None:
+        pass
+
+    def wrap(self, method: Callable) -> Callable:
+        """Wrap a completion method so that identical requests are served from the cache.
+
+        Streamed responses are recorded chunk by chunk while the caller consumes them and
+        stored once the stream is exhausted, so later hits are replayed as a stream too.
+        Hits are marked, see :func:`is_cache_hit`, as their tokens were billed when the
+        response was first received.
+        """
+
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            key = make_cache_key(*args, **kwargs)
+            cached = self.get(key, _MISSING)
+            if cached is not _MISSING:
+                return CachedStream(cached) if kwargs.get("stream") else mark_cache_hit(cached)
+
+            response = method(*args, **kwargs)
+            if kwargs.get("stream"):
+                return self._record_stream(key, response)
+
+            self.set(key, response)
+            return response
+
+        return wrapper
+
+    def _record_stream(self, key, response):
+        chunks = []
+        for chunk in response:
+            chunks.append(chunk)
+            yield chunk
+        self.set(key, chunks)
+
+
+class InMemoryResponseCache(ResponseCache):
+    """Thread-safe LRU cache holding at most ``maxsize`` responses."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float | None = None):
+        super().__init__(ttl=ttl)
+        self.maxsize = maxsize
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.is_expired(entry[0]):
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._entries.move_to_end(key)
+        return pickle.loads(entry[1])
+
+    def set(self, key, value):
+        # Responses are stored pickled so callers can't mutate the cached copy.
+        value = pickle.dumps(value)
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteResponseCache(ResponseCache):
+    """Disk cache backed by a SQLite database, shareable across processes and CI runs."""
+
+    def __init__(self, path: str = "agentkit_cache.sqlite3", ttl: float | None = None):
+        super().__init__(ttl=ttl)
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, stored_at REAL NOT NULL, value BLOB NOT NULL)"
+            )
+
+    def get(self, key, default=None):
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT stored_at, value FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.is_expired(row[0]):
+                with self._connection:
+                    self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+        return pickle.loads(row[1])
+
+    def set(self, key, value):
+        value = pickle.dumps(value)
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses (key, stored_at, value) VALUES (?, ?, ?)",
+                (key, time.time(), value),
+            )
+
+    def clear(self):
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM responses")
+
+    def close(self):
+        self._connection.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
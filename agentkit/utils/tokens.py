@@ -1,22 +1,198 @@
 import collections
+import contextlib
+import contextvars
+import json
+import threading
 from typing import Dict
 
+_WORKFLOW = contextvars.ContextVar("_WORKFLOW", default=None)
+
 
 class TokenUsageTrackerException(Exception):
     pass
 
 
+def to_dict(obj):
+    if obj is None or isinstance(obj, dict):
+        return obj
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    return dict(obj)
+
+
+def usage_to_dict(usage) -> Dict[str, int]:
+    """Keep only the integer counters of a provider usage payload.
+
+    Prompt tokens read from the provider's prompt cache are reported as
+    ``cache_read_input_tokens``, whether the provider reports them at the top level
+    (Anthropic) or in ``prompt_tokens_details`` (OpenAI).
+    """
+    usage = to_dict(usage) or {}
+    counts = {
+        key: value
+        for key, value in usage.items()
+        if isinstance(value, int) and not isinstance(value, bool)
+    }
+    details = to_dict(usage.get("prompt_tokens_details")) or {}
+    cached_tokens = details.get("cached_tokens")
+    if isinstance(cached_tokens, int) and "cache_read_input_tokens" not in counts:
+        counts["cache_read_input_tokens"] = cached_tokens
+    return counts
+
+
+def count_message_tokens(message, model=None) -> int:
+    """Estimate the number of prompt tokens a single chat message costs."""
+    if hasattr(message, "model_dump"):
+        message = message.model_dump(exclude_none=True)
+
+    import litellm
+
+    try:
+        return litellm.token_counter(model=model or "", messages=[message])
+    except Exception:
+        # Unknown message shapes fall back to the usual ~4 characters per token heuristic
+        return len(json.dumps(message, default=str)) // 4 + 1
+
+
+def count_tools_tokens(tools, model=None) -> int:
+    """Estimate the number of prompt tokens the tool schemas cost."""
+    import litellm
+
+    text = json.dumps(tools, default=str)
+    try:
+        return litellm.token_counter(model=model or "", text=text)
+    except Exception:
+        return len(text) // 4 + 1
+
+
+class TokenEstimateCache:
+    """LRU of token estimates keyed by object identity.
+
+    Messages and tool schemas are resent unchanged on every turn of the loop, so they are
+    only tokenized once. The object is kept alongside its estimate so that its ``id`` can't
+    be reused by another object while cached.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_count(self, obj, model, counter) -> int:
+        key = (id(obj), model)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is obj:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        count = counter(obj, model)
+        with self._lock:
+            self._entries[key] = (obj, count)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return count
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
 class TokenUsageTracker:
+    """Accumulate token usage and enforce a token budget.
+
+    Usage is aggregated in total, per model and per workflow. The workflow is either given
+    explicitly or taken from the enclosing :meth:`workflow` block.
+    """
+
     def __init__(self, budget=None):
         self.tracker = collections.Counter()
+        self.by_model = collections.defaultdict(collections.Counter)
+        self.by_workflow = collections.defaultdict(collections.Counter)
         self.budget = budget
+        self.estimates = TokenEstimateCache()
+        self._lock = threading.Lock()
 
     def clear(self):
-        self.tracker = collections.Counter()
+        with self._lock:
+            self.tracker.clear()
+            self.by_model.clear()
+            self.by_workflow.clear()
         return self
 
-    def track_usage(self, usage: Dict):
-        self.tracker = self.tracker + collections.Counter(usage)
+    @contextlib.contextmanager
+    def workflow(self, name: str):
+        """Attribute the usage tracked inside the block to the workflow ``name``."""
+        token = _WORKFLOW.set(name)
+        try:
+            yield self
+        finally:
+            _WORKFLOW.reset(token)
+
+    def remaining(self):
+        """Tokens left before the budget is exceeded, or ``None`` without a budget."""
+        if self.budget is None:
+            return None
+        return self.budget - self.tracker["total_tokens"]
+
+    def check_budget(self, prompt_tokens: int):
+        """Raise if sending ``prompt_tokens`` more would exceed the budget."""
+        remaining = self.remaining()
+        if remaining is not None and prompt_tokens > remaining:
+            raise TokenUsageTrackerException(
+                f"Token budget would be exceeded. Budget: {self.budget}, "
+                f"Usage: {dict(self.tracker)}, Request: {prompt_tokens}"
+            )
+
+    def estimate(self, messages, tools=None, model=None) -> int:
+        """Estimate the prompt tokens of a request, reusing the estimates of known messages."""
+        tokens = sum(
+            self.estimates.get_or_count(message, model, count_message_tokens)
+            for message in messages
+        )
+        if tools:
+            tokens += self.estimates.get_or_count(tools, model, count_tools_tokens)
+        return tokens
+
+    def estimate_usage(self, messages, completion, tools=None, model=None) -> Dict[str, int]:
+        """Estimate the usage of a request whose response did not report it, e.g. streams."""
+        prompt_tokens = self.estimate(messages, tools=tools, model=model)
+        completion_tokens = count_message_tokens(completion, model)
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+    def preflight(self, messages, tools=None, model=None):
+        """Raise before a request is sent if its estimated prompt would exceed the budget."""
+        if self.budget is None:
+            return None
+        estimate = self.estimate(messages, tools=tools, model=model)
+        self.check_budget(estimate)
+        return estimate
+
+    def cache_hit_tokens(self, model: str = None) -> int:
+        """Prompt tokens served from the provider prompt cache, in total or for ``model``."""
+        usage = self.tracker if model is None else self.by_model.get(model, {})
+        return usage.get("cache_read_input_tokens", 0)
+
+    def cache_hit_ratio(self, model: str = None) -> float:
+        """Share of the prompt tokens served from the provider prompt cache."""
+        usage = self.tracker if model is None else self.by_model.get(model, {})
+        prompt_tokens = usage.get("prompt_tokens", 0)
+        return self.cache_hit_tokens(model) / prompt_tokens if prompt_tokens else 0.0
+
+    def track_usage(self, usage: Dict, model: str = None, workflow: str = None):
+        usage = usage_to_dict(usage)
+        workflow = workflow or _WORKFLOW.get()
+
+        with self._lock:
+            self.tracker.update(usage)
+            if model is not None:
+                self.by_model[model].update(usage)
+            if workflow is not None:
+                self.by_workflow[workflow].update(usage)
 
         if self.budget is not None and self.tracker["total_tokens"] > self.budget:
             raise TokenUsageTrackerException(
@@ -39,3 +39,38 @@ def run_async_from_sync(coroutine):
         if not hasattr(_cached_loop, "loop"):
             _cached_loop.loop = asyncio.new_event_loop()
         return _cached_loop.loop.run_until_complete(coroutine)
+
+
+_background_loop = None
+_background_loop_lock = threading.Lock()
+
+
+def get_background_loop():
+    """
+    Loop running in a daemon thread, shared by the sync callers that can't use their own.
+    """
+    global _background_loop
+    with _background_loop_lock:
+        if _background_loop is None:
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(
+                target=loop.run_forever, name="agentkit-async", daemon=True
+            )
+            thread.start()
+            _background_loop = loop
+        return _background_loop
+
+
+def run_coroutine_sync(coroutine):
+    """
+    Run an async coroutine to completion from a synchronous context and return its result.
+
+    Unlike `run_async_from_sync`, this also blocks when the thread is already running a
+    loop, e.g. sync code called from async code, by running the coroutine on the
+    background loop.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return run_async_from_sync(coroutine)
+    return asyncio.run_coroutine_threadsafe(coroutine, get_background_loop()).result()
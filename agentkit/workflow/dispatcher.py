@@ -8,6 +8,7 @@ from typing import Iterable
 from typing import Set
 from typing import Tuple
 
+from agentkit.telemetry.spans import span
 from agentkit.workflow.callbacks import SPECS_ALL
 from agentkit.workflow.callbacks import SpecReference
 from agentkit.workflow.signature import SignatureAdapter
@@ -70,8 +71,9 @@ class Listeners:
         if not filtered_specs:
             return
 
-        for spec in filtered_specs:
-            registry[spec.group.build_key(specs)]._add(spec, self)
+        with span("workflow.listeners.resolve", specs=len(filtered_specs)):
+            for spec in filtered_specs:
+                registry[spec.group.build_key(specs)]._add(spec, self)
 
     def search(self, spec: "CallbackSpec") -> Generator["Callable", None, None]:
         if spec.reference is SpecReference.NAME:
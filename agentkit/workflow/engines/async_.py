@@ -1,11 +1,14 @@
 from threading import Lock
+from time import perf_counter_ns
 from typing import TYPE_CHECKING
 from weakref import proxy
 
+from agentkit.workflow import metrics
 from agentkit.workflow.event import EventData
 from agentkit.workflow.event import TriggerData
 from agentkit.workflow.exceptions import InvalidDefinition
 from agentkit.workflow.exceptions import TransitionNotAllowed
+from agentkit.telemetry.spans import span
 from agentkit.utils.i18n import _
 from agentkit import Transition
 
@@ -16,6 +19,7 @@ if TYPE_CHECKING:
 class AsyncEngine:
     def __init__(self, workflow: "Workflow", rtc: bool = True):
         self.workflow = proxy(workflow)
+        self.metrics = metrics.registry.workflow(type(workflow))
         self._sentinel = object()
         if not rtc:
             raise InvalidDefinition(_("Only RTC is supported on async engine"))
@@ -66,7 +70,8 @@ class AsyncEngine:
             while self.workflow._external_queue:
                 trigger_data = self.workflow._external_queue.popleft()
                 try:
-                    result = await self._trigger(trigger_data)
+                    with span("workflow.processing_loop", workflow=self.workflow.name):
+                        result = await self._trigger(trigger_data)
                     if first_result is self._sentinel:
                         first_result = result
                 except Exception:
@@ -79,6 +84,15 @@ class AsyncEngine:
         return first_result if first_result is not self._sentinel else None
 
     async def _trigger(self, trigger_data: TriggerData):
+        started = perf_counter_ns()
+        try:
+            with span("workflow.trigger", event=trigger_data.event):
+                return await self._trigger_event(trigger_data)
+        finally:
+            if trigger_data.event != "__initial__":
+                self.metrics.observe_event(trigger_data.event, perf_counter_ns() - started)
+
+    async def _trigger_event(self, trigger_data: TriggerData):
         event_data = None
         if trigger_data.event == "__initial__":
             transition = Transition(None, self.workflow._get_initial_state(), event="__initial__")
@@ -94,16 +108,26 @@ class AsyncEngine:
 
             event_data = EventData(trigger_data=trigger_data, transition=transition)
             args, kwargs = event_data.args, event_data.extended_kwargs
-            await self.workflow._get_callbacks(transition.validators.key).async_call(*args, **kwargs)
-            if not await self.workflow._get_callbacks(transition.cond.key).async_all(*args, **kwargs):
+            callbacks = self.workflow._get_callbacks
+            with span("workflow.callbacks", group="validators"):
+                await callbacks(transition.validators.key).async_call(*args, **kwargs)
+            with span("workflow.callbacks", group="cond"):
+                allowed = await callbacks(transition.cond.key).async_all(*args, **kwargs)
+            if not allowed:
+                self.metrics.guard_rejected(trigger_data.event, state.id, transition.target.id)
                 continue
 
+            started = perf_counter_ns()
             result = await self._activate(event_data)
+            self.metrics.observe_transition(
+                trigger_data.event, state.id, transition.target.id, perf_counter_ns() - started
+            )
             event_data.result = result
             event_data.executed = True
             break
         else:
             if not self.workflow.allow_event_without_transition:
+                self.metrics.transition_not_allowed(trigger_data.event, state.id)
                 raise TransitionNotAllowed(trigger_data.event, state)
 
         return event_data.result if event_data else None
@@ -113,20 +137,26 @@ class AsyncEngine:
         transition = event_data.transition
         source = event_data.state
         target = transition.target
+        callbacks = self.workflow._get_callbacks
 
-        result = await self.workflow._get_callbacks(transition.before.key).async_call(*args, **kwargs)
+        with span("workflow.callbacks", group="before"):
+            result = await callbacks(transition.before.key).async_call(*args, **kwargs)
         if source is not None and not transition.internal:
-            await self.workflow._get_callbacks(source.exit.key).async_call(*args, **kwargs)
+            with span("workflow.callbacks", group="exit"):
+                await callbacks(source.exit.key).async_call(*args, **kwargs)
 
-        result += await self.workflow._get_callbacks(transition.on.key).async_call(*args, **kwargs)
+        with span("workflow.callbacks", group="on"):
+            result += await callbacks(transition.on.key).async_call(*args, **kwargs)
 
         self.workflow.current_state = target
         event_data.state = target
         kwargs["state"] = target
 
         if not transition.internal:
-            await self.workflow._get_callbacks(target.enter.key).async_call(*args, **kwargs)
-        await self.workflow._get_callbacks(transition.after.key).async_call(*args, **kwargs)
+            with span("workflow.callbacks", group="enter"):
+                await callbacks(target.enter.key).async_call(*args, **kwargs)
+        with span("workflow.callbacks", group="after"):
+            await callbacks(transition.after.key).async_call(*args, **kwargs)
 
         if len(result) == 0:
             result = None
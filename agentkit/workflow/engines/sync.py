@@ -1,10 +1,13 @@
 from threading import Lock
+from time import perf_counter_ns
 from typing import TYPE_CHECKING
 from weakref import proxy
 
+from agentkit.workflow import metrics
 from agentkit.workflow.event import EventData
 from agentkit.workflow.event import TriggerData
 from agentkit.workflow.exceptions import TransitionNotAllowed
+from agentkit.telemetry.spans import span
 from agentkit import Transition
 
 if TYPE_CHECKING:
@@ -14,6 +17,7 @@ if TYPE_CHECKING:
 class SyncEngine:
     def __init__(self, workflow: "Workflow", rtc: bool = True):
         self.workflow = proxy(workflow)
+        self.metrics = metrics.registry.workflow(type(workflow))
         self._sentinel = object()
         self._rtc = rtc
         self._processing = Lock()
@@ -69,7 +73,8 @@ class SyncEngine:
             while self.workflow._external_queue:
                 trigger_data = self.workflow._external_queue.popleft()
                 try:
-                    result = self._trigger(trigger_data)
+                    with span("workflow.processing_loop", workflow=self.workflow.name):
+                        result = self._trigger(trigger_data)
                     if first_result is self._sentinel:
                         first_result = result
                 except Exception:
@@ -82,6 +87,15 @@ class SyncEngine:
         return first_result if first_result is not self._sentinel else None
 
     def _trigger(self, trigger_data: TriggerData):
+        started = perf_counter_ns()
+        try:
+            with span("workflow.trigger", event=trigger_data.event):
+                return self._trigger_event(trigger_data)
+        finally:
+            if trigger_data.event != "__initial__":
+                self.metrics.observe_event(trigger_data.event, perf_counter_ns() - started)
+
+    def _trigger_event(self, trigger_data: TriggerData):
         event_data = None
         if trigger_data.event == "__initial__":
             transition = Transition(None, self.workflow._get_initial_state(), event="__initial__")
@@ -97,16 +111,25 @@ class SyncEngine:
 
             event_data = EventData(trigger_data=trigger_data, transition=transition)
             args, kwargs = event_data.args, event_data.extended_kwargs
-            self.workflow._get_callbacks(transition.validators.key).call(*args, **kwargs)
-            if not self.workflow._get_callbacks(transition.cond.key).all(*args, **kwargs):
+            with span("workflow.callbacks", group="validators"):
+                self.workflow._get_callbacks(transition.validators.key).call(*args, **kwargs)
+            with span("workflow.callbacks", group="cond"):
+                allowed = self.workflow._get_callbacks(transition.cond.key).all(*args, **kwargs)
+            if not allowed:
+                self.metrics.guard_rejected(trigger_data.event, state.id, transition.target.id)
                 continue
 
+            started = perf_counter_ns()
             result = self._activate(event_data)
+            self.metrics.observe_transition(
+                trigger_data.event, state.id, transition.target.id, perf_counter_ns() - started
+            )
             event_data.result = result
             event_data.executed = True
             break
         else:
             if not self.workflow.allow_event_without_transition:
+                self.metrics.transition_not_allowed(trigger_data.event, state.id)
                 raise TransitionNotAllowed(trigger_data.event, state)
 
         return event_data.result if event_data else None
@@ -117,19 +140,24 @@ class SyncEngine:
         source = event_data.state
         target = transition.target
 
-        result = self.workflow._get_callbacks(transition.before.key).call(*args, **kwargs)
+        with span("workflow.callbacks", group="before"):
+            result = self.workflow._get_callbacks(transition.before.key).call(*args, **kwargs)
         if source is not None and not transition.internal:
-            self.workflow._get_callbacks(source.exit.key).call(*args, **kwargs)
+            with span("workflow.callbacks", group="exit"):
+                self.workflow._get_callbacks(source.exit.key).call(*args, **kwargs)
 
-        result += self.workflow._get_callbacks(transition.on.key).call(*args, **kwargs)
+        with span("workflow.callbacks", group="on"):
+            result += self.workflow._get_callbacks(transition.on.key).call(*args, **kwargs)
 
         self.workflow.current_state = target
         event_data.state = target
         kwargs["state"] = target
 
         if not transition.internal:
-            self.workflow._get_callbacks(target.enter.key).call(*args, **kwargs)
-        self.workflow._get_callbacks(transition.after.key).call(*args, **kwargs)
+            with span("workflow.callbacks", group="enter"):
+                self.workflow._get_callbacks(target.enter.key).call(*args, **kwargs)
+        with span("workflow.callbacks", group="after"):
+            self.workflow._get_callbacks(transition.after.key).call(*args, **kwargs)
 
         if len(result) == 0:
             result = None
@@ -3,7 +3,7 @@ from typing import TYPE_CHECKING
 
 from agentkit.utils.workflow import run_async_from_sync
 
-from agentkit.workflow.event import TriggerData
+from agentkit.workflow.event.data import TriggerData
 
 if TYPE_CHECKING:
     from agentkit import Workflow
@@ -0,0 +1,318 @@
+"""Aggregate metrics of the workflows, by class, exported in the Prometheus text format.
+
+The metrics of every :class:`~agentkit.workflow.workflow.Workflow` class are kept in
+:data:`registry`, updated by the engines while the events are processed::
+
+    from agentkit.workflow import metrics
+
+    metrics.registry.workflow(Traffic).events  # {"cycle": 3}
+    print(metrics.to_prometheus())  # All the workflow classes of the process
+    metrics.serve(port=9464)  # Same text on http://127.0.0.1:9464/metrics
+
+Recording an event costs two ``perf_counter_ns`` calls and a few counter updates, the
+histograms have fixed buckets so that their memory doesn't grow with the traffic.
+"""
+
+import threading
+from bisect import bisect_left
+from typing import TYPE_CHECKING
+from typing import Dict
+from typing import List
+from typing import Sequence
+from typing import Tuple
+
+from agentkit.utils.workflow import qualname
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+# 1-2-5 steps per decade from 1µs to 10s, in nanoseconds
+DEFAULT_BUCKETS: Tuple[int, ...] = tuple(
+    step * 10**exponent for exponent in range(3, 10) for step in (1, 2, 5)
+) + (10**10,)
+
+
+class Histogram:
+    """Counts of the observed durations in fixed buckets, with their sum.
+
+    Args:
+        buckets: Increasing upper bounds of the buckets in nanoseconds, inclusive.
+    """
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[int] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        # The last count is the +Inf bucket
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, duration_ns: int):
+        self.counts[bisect_left(self.buckets, duration_ns)] += 1
+        self.sum += duration_ns
+        self.count += 1
+
+    def cumulative(self) -> List[int]:
+        total, counts = 0, []
+        for count in self.counts:
+            total += count
+            counts.append(total)
+        return counts
+
+
+class WorkflowMetrics:
+    """Metrics of the instances of a workflow class.
+
+    Attributes:
+        events: Number of processed events by event name, failed ones included.
+        event_latency: Duration of the processed events by event name.
+        transition_latency: Duration of the transitions by ``(event, source, target)``.
+        guard_rejections: Number of transitions rejected by their conditions, by
+            ``(event, source, target)``.
+        not_allowed: Number of :class:`TransitionNotAllowed` raised, by ``(event, state)``.
+        queue_high_water: Largest number of events waiting in the queue of an instance.
+    """
+
+    def __init__(self, name: str, buckets: Sequence[int] = DEFAULT_BUCKETS):
+        self.name = name
+        self.buckets = buckets
+        self.events: Dict[str, int] = {}
+        self.event_latency: Dict[str, Histogram] = {}
+        self.transition_latency: Dict[Tuple[str, str, str], Histogram] = {}
+        self.guard_rejections: Dict[Tuple[str, str, str], int] = {}
+        self.not_allowed: Dict[Tuple[str, str], int] = {}
+        self.queue_high_water = 0
+        self._lock = threading.Lock()
+
+    def observe_event(self, event: str, duration_ns: int):
+        with self._lock:
+            self.events[event] = self.events.get(event, 0) + 1
+            histogram = self.event_latency.get(event)
+            if histogram is None:
+                histogram = self.event_latency[event] = Histogram(self.buckets)
+            histogram.observe(duration_ns)
+
+    def observe_transition(self, event: str, source: str, target: str, duration_ns: int):
+        key = (event, source, target)
+        with self._lock:
+            histogram = self.transition_latency.get(key)
+            if histogram is None:
+                histogram = self.transition_latency[key] = Histogram(self.buckets)
+            histogram.observe(duration_ns)
+
+    def guard_rejected(self, event: str, source: str, target: str):
+        key = (event, source, target)
+        with self._lock:
+            self.guard_rejections[key] = self.guard_rejections.get(key, 0) + 1
+
+    def transition_not_allowed(self, event: str, state: str):
+        key = (event, state)
+        with self._lock:
+            self.not_allowed[key] = self.not_allowed.get(key, 0) + 1
+
+    def observe_queue(self, depth: int):
+        # Racy read first, the lock is only taken for a new high-water mark
+        if depth > self.queue_high_water:
+            with self._lock:
+                self.queue_high_water = max(self.queue_high_water, depth)
+
+    def reset(self):
+        with self._lock:
+            self.events.clear()
+            self.event_latency.clear()
+            self.transition_latency.clear()
+            self.guard_rejections.clear()
+            self.not_allowed.clear()
+            self.queue_high_water = 0
+
+
+class MetricsRegistry:
+    """Metrics of the workflow classes, by qualified class name."""
+
+    def __init__(self):
+        self.workflows: Dict[str, WorkflowMetrics] = {}
+        self._lock = threading.Lock()
+
+    def workflow(self, cls: type) -> WorkflowMetrics:
+        """Return the metrics of a workflow class, labelled with its qualified name. A class
+        redefined with the same qualified name shares the metrics of the previous one."""
+        name = qualname(cls)
+        # Lock-free lookup first, this runs on every event sent
+        metrics = self.workflows.get(name)
+        if metrics is None:
+            with self._lock:
+                metrics = self.workflows.setdefault(name, WorkflowMetrics(name))
+        return metrics
+
+    def reset(self):
+        for metrics in list(self.workflows.values()):
+            metrics.reset()
+
+    def to_prometheus(self) -> str:
+        """Metrics of every workflow class in the Prometheus text exposition format."""
+        with self._lock:
+            workflows = list(self.workflows.values())
+        families = {name: (kind, help, []) for name, kind, help in FAMILIES}
+        for metrics in workflows:
+            with metrics._lock:
+                collect(metrics, families)
+
+        lines = []
+        for name, (kind, help, samples) in families.items():
+            if not samples:
+                continue
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def serve(self, port: int = 9464, host: str = "127.0.0.1") -> "ThreadingHTTPServer":
+        """Serve the metrics on ``http://<host>:<port>/metrics`` from a daemon thread.
+
+        Call ``shutdown()`` on the returned server to stop it. Pass ``port=0`` to pick a free
+        port, read it back from ``server.server_address``.
+        """
+        # Imported here, the HTTP stack is only needed by the processes serving metrics
+        from http.server import BaseHTTPRequestHandler
+        from http.server import ThreadingHTTPServer
+
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.to_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="agentkit-metrics", daemon=True).start()
+        return server
+
+
+FAMILIES = (
+    (
+        "agentkit_workflow_events_total",
+        "counter",
+        "Events processed by the workflows.",
+    ),
+    (
+        "agentkit_workflow_event_duration_seconds",
+        "histogram",
+        "Duration of the processed events.",
+    ),
+    (
+        "agentkit_workflow_transition_duration_seconds",
+        "histogram",
+        "Duration of the transitions, callbacks included.",
+    ),
+    (
+        "agentkit_workflow_guard_rejections_total",
+        "counter",
+        "Transitions rejected by their conditions.",
+    ),
+    (
+        "agentkit_workflow_transitions_not_allowed_total",
+        "counter",
+        "Events raising TransitionNotAllowed.",
+    ),
+    (
+        "agentkit_workflow_queue_depth_max",
+        "gauge",
+        "Largest number of events waiting in the queue of a workflow.",
+    ),
+)
+
+
+def escape(value: str) -> str:
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def format_labels(labels: Dict[str, str]) -> str:
+    return ",".join(f'{key}="{escape(value)}"' for key, value in labels.items())
+
+
+def format_histogram(name: str, labels: Dict[str, str], histogram: Histogram) -> List[str]:
+    prefix = format_labels(labels)
+    samples = []
+    for bound, count in zip([*histogram.buckets, None], histogram.cumulative(), strict=True):
+        le = "+Inf" if bound is None else repr(bound / 1e9)
+        samples.append(f'{name}_bucket{{{prefix},le="{le}"}} {count}')
+    samples.append(f"{name}_sum{{{prefix}}} {histogram.sum / 1e9!r}")
+    samples.append(f"{name}_count{{{prefix}}} {histogram.count}")
+    return samples
+
+
+def labels_of(workflow: str, names: Tuple[str, ...], key) -> Dict[str, str]:
+    """Labels of a sample, from the key of a metric, a tuple or a single value."""
+    values = key if isinstance(key, tuple) else (key,)
+    return {"workflow": workflow, **dict(zip(names, values, strict=True))}
+
+
+def format_sample(name: str, labels: Dict[str, str], value) -> str:
+    return f"{name}{{{format_labels(labels)}}} {value}"
+
+
+def collect(metrics: WorkflowMetrics, families: Dict[str, tuple]):
+    """Add the samples of ``metrics`` to ``families``, by family name."""
+    workflow = metrics.name
+    counters = (
+        ("agentkit_workflow_events_total", ("event",), metrics.events),
+        (
+            "agentkit_workflow_guard_rejections_total",
+            ("event", "source", "target"),
+            metrics.guard_rejections,
+        ),
+        (
+            "agentkit_workflow_transitions_not_allowed_total",
+            ("event", "state"),
+            metrics.not_allowed,
+        ),
+    )
+    for name, names, counts in counters:
+        for key, count in counts.items():
+            families[name][2].append(format_sample(name, labels_of(workflow, names, key), count))
+
+    histograms = (
+        ("agentkit_workflow_event_duration_seconds", ("event",), metrics.event_latency),
+        (
+            "agentkit_workflow_transition_duration_seconds",
+            ("event", "source", "target"),
+            metrics.transition_latency,
+        ),
+    )
+    for name, names, latencies in histograms:
+        for key, histogram in latencies.items():
+            families[name][2].extend(
+                format_histogram(name, labels_of(workflow, names, key), histogram)
+            )
+
+    if metrics.queue_high_water:
+        name = "agentkit_workflow_queue_depth_max"
+        families[name][2].append(
+            format_sample(name, {"workflow": workflow}, metrics.queue_high_water)
+        )
+
+
+registry = MetricsRegistry()
+"""Registry of the metrics of every workflow class of the process."""
+
+
+def to_prometheus() -> str:
+    """Metrics of every workflow class in the Prometheus text exposition format."""
+    return registry.to_prometheus()
+
+
+def serve(port: int = 9464, host: str = "127.0.0.1") -> "ThreadingHTTPServer":
+    """Serve the metrics of every workflow class, see :meth:`MetricsRegistry.serve`."""
+    return registry.serve(port, host)
@@ -8,6 +8,8 @@ from types import MethodType
 from typing import Any
 from typing import Callable
 
+from agentkit.telemetry import spans
+
 
 def _make_key(method):
     method = method.func if isinstance(method, partial) else method
@@ -43,28 +45,49 @@ def signature_cache(user_function):
     return cached_function
 
 
+def _traced_bind(bind_expected, name, args, kwargs) -> BoundArguments:
+    with spans.span("workflow.signature.bind", callback=name):
+        return bind_expected(*args, **kwargs)
+
+
+def _async_adapter(method, bind_expected, name) -> Callable:
+    async def signature_adapter(*args: Any, **kwargs: Any) -> Any:
+        if spans.collector is None:
+            ba = bind_expected(*args, **kwargs)
+            return await method(*ba.args, **ba.kwargs)
+        with spans.span("workflow.callback", callback=name):
+            ba = _traced_bind(bind_expected, name, args, kwargs)
+            return await method(*ba.args, **ba.kwargs)
+
+    return signature_adapter
+
+
+def _sync_adapter(method, bind_expected, name) -> Callable:
+    def signature_adapter(*args: Any, **kwargs: Any) -> Any:
+        if spans.collector is None:
+            ba = bind_expected(*args, **kwargs)
+            return method(*ba.args, **ba.kwargs)
+        with spans.span("workflow.callback", callback=name):
+            ba = _traced_bind(bind_expected, name, args, kwargs)
+            return method(*ba.args, **ba.kwargs)
+
+    return signature_adapter
+
+
 class SignatureAdapter(Signature):
     @classmethod
     def wrap(cls, method) -> Callable:
         """Build a wrapper that adapts the received arguments to the inner ``method`` signature"""
 
         sig = cls.from_callable(method)
-        sig_bind_expected = sig.bind_expected
-
         metadata_to_copy = method.func if isinstance(method, partial) else method
+        name = metadata_to_copy.__name__
 
-        if iscoroutinefunction(method):
-
-            async def signature_adapter(*args: Any, **kwargs: Any) -> Any:
-                ba = sig_bind_expected(*args, **kwargs)
-                return await method(*ba.args, **ba.kwargs)
-        else:
-
-            def signature_adapter(*args: Any, **kwargs: Any) -> Any:  # type: ignore[misc]
-                ba = sig_bind_expected(*args, **kwargs)
-                return method(*ba.args, **ba.kwargs)
-
-        signature_adapter.__name__ = metadata_to_copy.__name__
+        # The adapters check the collector first, keeping the spans off the path of
+        # uninstrumented calls
+        adapter = _async_adapter if iscoroutinefunction(method) else _sync_adapter
+        signature_adapter = adapter(method, sig.bind_expected, name)
+        signature_adapter.__name__ = name
 
         return signature_adapter
 
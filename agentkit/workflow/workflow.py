@@ -9,6 +9,7 @@ from typing import Any
 from typing import Dict
 from typing import List
 
+from agentkit.workflow import metrics
 from agentkit.workflow.callbacks import SPECS_ALL
 from agentkit.workflow.callbacks import SPECS_SAFE
 from agentkit.workflow.callbacks import CallbacksExecutor
@@ -306,6 +307,7 @@ class Workflow(metaclass=WorkflowMetaclass):
     def _put_nonblocking(self, trigger_data: TriggerData):
         """Put the trigger on the queue without blocking the caller."""
         self._external_queue.append(trigger_data)
+        metrics.registry.workflow(type(self)).observe_queue(len(self._external_queue))
 
     def send(self, event: str, *args, **kwargs):
         """Send an :ref:`Event` to the state flow.
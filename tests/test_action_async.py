@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import time
+
+from agentkit.actions.factories.function import action
+from agentkit.actions.factories.repeat import repeat
+from agentkit.llms.backends import SyntheticBackend
+from agentkit.llms.client.chat import ChatCompletion
+from agentkit.llms.executor import ToolCall
+from agentkit.llms.executor import ToolExecutor
+from agentkit.telemetry import traceable
+
+
+@action(name="Fetch")
+async def fetch(url: str, delay: float = 0.0):
+    "Fetch an url"
+    await asyncio.sleep(delay)
+    return f"content of {url}"
+
+
+class Client:
+    def __init__(self, base):
+        self.base = base
+
+    @action(name="Get")
+    async def get(self, path: str):
+        "Get a path"
+        await asyncio.sleep(0)
+        return self.base + path
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record.msg)
+
+
+def make_logger(name):
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.INFO)
+    handler = ListHandler()
+    logger.addHandler(handler)
+    return logger, handler
+
+
+def test_async_actions_are_detected():
+    assert fetch.is_async
+    assert Client("b").get.is_async
+
+
+def test_async_actions_are_run_from_sync_code():
+    assert fetch(url="a") == "content of a"
+    assert fetch.invoke({"url": "a"}) == "content of a"
+    assert Client("https://x").get.invoke({"path": "/y"}) == "https://x/y"
+
+
+def test_async_actions_are_awaited_from_async_code():
+    async def main():
+        coroutine = fetch(url="a")
+        return await coroutine, await fetch.acall(url="b"), await fetch.ainvoke({"url": "c"})
+
+    assert asyncio.run(main()) == ("content of a", "content of b", "content of c")
+
+
+def test_acall_runs_sync_actions_in_a_thread():
+    @action(name="Sleep")
+    def sleep(seconds: float):
+        "Sleep"
+        time.sleep(seconds)
+        return seconds
+
+    async def main():
+        return await asyncio.gather(*(sleep.acall(seconds=0.1) for _ in range(5)))
+
+    started = time.monotonic()
+    assert asyncio.run(main()) == [0.1] * 5
+    assert time.monotonic() - started < 0.4
+
+
+def test_invoke_blocks_inside_a_running_loop():
+    async def main():
+        # Sync code, e.g. a completion, called from async code
+        return fetch.invoke({"url": "a"})
+
+    assert asyncio.run(main()) == "content of a"
+
+
+def test_async_results_are_cached():
+    calls = []
+
+    @action(name="Count", cacheable=True)
+    async def count(key: str):
+        "Count calls"
+        calls.append(key)
+        return len(calls)
+
+    assert count.invoke({"key": "a"}) == 1
+    assert asyncio.run(count.ainvoke({"key": "a"})) == 1
+    assert calls == ["a"]
+
+
+def test_traceable_logs_async_functions_once_awaited():
+    logger, handler = make_logger("test_traceable_async")
+
+    @traceable("Outer", logger)
+    async def outer(x):
+        return await inner(x) + 1
+
+    @traceable("Inner", logger)
+    async def inner(x):
+        return x * 2
+
+    assert asyncio.iscoroutinefunction(outer)
+    assert asyncio.run(outer(3)) == 7
+
+    inner_record, outer_record = handler.records
+    assert inner_record["outputs"] == 6
+    assert outer_record["outputs"] == 7
+    assert inner_record["parent_run_id"] == outer_record["run_id"]
+
+
+def test_traced_async_actions_log_their_result():
+    logger, handler = make_logger("test_traced_async_action")
+
+    @action(name="Traced", logger=logger)
+    async def traced(x: int):
+        "Traced"
+        return x + 1
+
+    assert traced.invoke({"x": 1}) == 2
+    assert handler.records[0]["outputs"] == 2
+
+
+def test_repeat_awaits_async_actions_on_one_loop():
+    fetches = repeat(fetch, reducer=list, strategy="asyncio")
+    items = [{"url": str(i), "delay": 0.1} for i in range(20)]
+
+    started = time.monotonic()
+    assert fetches.invoke({"Fetch": items}) == [f"content of {i}" for i in range(20)]
+    assert time.monotonic() - started < 0.5
+
+
+def test_tool_executor_runs_async_actions():
+    calls = [ToolCall(str(i), fetch, {"url": str(i)}) for i in range(3)]
+
+    assert ToolExecutor(max_workers=3).run(calls) == [f"content of {i}" for i in range(3)]
+
+
+def test_completion_loop_sends_awaited_results():
+    backend = SyntheticBackend([[("Fetch", {"url": "a"})], "done"])
+    chat = ChatCompletion(model="fake", backend=backend)
+    messages = [{"role": "user", "content": "go"}]
+
+    chat(messages=messages, actions=[fetch])
+
+    tool_message = next(m for m in messages if isinstance(m, dict) and m.get("role") == "tool")
+    assert "content of a" in tool_message["content"]
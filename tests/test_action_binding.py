@@ -0,0 +1,85 @@
+import copy
+import pickle
+import weakref
+
+from agentkit.actions.action import InstanceAction
+from agentkit.actions.factories.function import action
+
+
+def exclaim(function):
+    def wrapper(*args, **kwargs):
+        return function(*args, **kwargs) + "!"
+
+    return wrapper
+
+
+class Greeter:
+    def __init__(self, name):
+        self.name = name
+
+    @action(name="Greet", decorators=[exclaim])
+    def greet(self, greeting: str):
+        "Greet someone"
+        return f"{greeting} {self.name}"
+
+
+def test_bound_actions_are_cached_per_instance():
+    alice, bob = Greeter("alice"), Greeter("bob")
+
+    assert isinstance(alice.greet, InstanceAction)
+    assert alice.greet is alice.greet
+    assert alice.greet is not bob.greet
+    assert alice.greet.function is Greeter.__dict__["greet"].function
+
+
+def test_bound_actions_dont_keep_their_instance_alive():
+    greeter = Greeter("alice")
+    bound = greeter.greet
+    instance = weakref.ref(greeter)
+
+    del greeter, bound
+
+    assert instance() is None
+
+
+def test_bound_actions_read_the_attributes_of_their_action():
+    class Counter:
+        @action(name="Count")
+        def count(self):
+            "Count"
+            return 1
+
+    bound = Counter().count
+    Counter.__dict__["count"].timeout = 5.0
+
+    assert bound.timeout == 5.0
+    assert bound.options()["timeout"] == 5.0
+
+
+def test_decorators_are_applied_once():
+    greeter = Greeter("alice")
+
+    assert greeter.greet(greeting="hi") == "hi alice!"
+    assert greeter.greet.decorators == [exclaim]
+    rebound = InstanceAction(
+        "Greet",
+        Greeter.greet.undecorated_function,
+        Greeter.greet.pydantic_model,
+        instance=greeter,
+        decorators=[exclaim],
+    )
+    assert rebound(greeting="hey") == "hey alice!"
+
+
+def test_class_access_returns_an_unbound_action():
+    assert Greeter.greet is Greeter.greet
+    assert Greeter.greet.instance is None
+
+
+def test_instances_with_bound_actions_can_be_copied_and_pickled():
+    greeter = Greeter("alice")
+    greeter.greet  # noqa: B018
+
+    for clone in (copy.deepcopy(greeter), pickle.loads(pickle.dumps(greeter))):
+        assert clone.greet.instance is clone
+        assert clone.greet(greeting="hello") == "hello alice!"
@@ -0,0 +1,93 @@
+import time
+
+from agentkit.actions.factories.function import action
+from agentkit.llms.backends import SyntheticBackend
+from agentkit.llms.cache import InMemoryResponseCache
+from agentkit.llms.cache import SQLiteResponseCache
+from agentkit.llms.client.chat import ChatCompletion
+
+calls = []
+
+
+@action(name="Lookup", cacheable=True)
+def lookup(city: str, days: int = 1):
+    "Look up the weather"
+    calls.append((city, days))
+    return f"sunny in {city} for {days} days"
+
+
+def test_identical_validated_arguments_hit_the_cache():
+    calls.clear()
+    lookup.cache.clear()
+
+    assert lookup.invoke({"city": "Paris", "days": 2}) == "sunny in Paris for 2 days"
+    assert lookup.invoke({"city": "Paris", "days": "2"}) == "sunny in Paris for 2 days"
+    lookup.invoke({"city": "Rome"})
+
+    assert calls == [("Paris", 2), ("Rome", 1)]
+    assert (lookup.cache.hits, lookup.cache.misses) == (1, 2)
+
+
+def test_expired_entries_are_recomputed():
+    count = []
+
+    @action(name="Now", cache=InMemoryResponseCache(ttl=0.05))
+    def now():
+        "Current time"
+        count.append(1)
+        return len(count)
+
+    assert now.invoke({}) == now.invoke({}) == 1
+    time.sleep(0.06)
+    assert now.invoke({}) == 2
+
+
+def test_sqlite_store_is_shared_across_sessions(tmp_path):
+    path = str(tmp_path / "tools.sqlite3")
+    count = []
+
+    def make_action():
+        @action(name="Slow", cache=SQLiteResponseCache(path))
+        def slow(query: str):
+            "Slow query"
+            count.append(query)
+            return query.upper()
+
+        return slow
+
+    assert make_action().invoke({"query": "a"}) == "A"
+    assert make_action().invoke({"query": "a"}) == "A"
+    assert count == ["a"]
+
+
+def test_tool_calls_consult_the_cache():
+    calls.clear()
+    lookup.cache.clear()
+    backend = SyntheticBackend(
+        [[("Lookup", {"city": "Oslo"})], [("Lookup", {"city": "Oslo"})], "done"]
+    )
+
+    ChatCompletion(model="fake", backend=backend)(
+        messages=[{"role": "user", "content": "weather?"}], actions=[lookup]
+    )
+
+    assert calls == [("Oslo", 1)]
+
+
+class Counter:
+    def __init__(self, start):
+        self.start = start
+
+    @action(name="Next", cacheable=True)
+    def next(self, step: int):
+        "Next value"
+        return self.start + step
+
+
+def test_bound_actions_are_cached_per_instance():
+    Counter.next.cache.clear()
+    first, second = Counter(0), Counter(10)
+
+    assert first.next.invoke({"step": 1}) == first.next.invoke({"step": 1}) == 1
+    assert second.next.invoke({"step": 1}) == 11
+    assert (Counter.next.cache.hits, Counter.next.cache.misses) == (1, 2)
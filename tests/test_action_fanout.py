@@ -0,0 +1,133 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from agentkit.actions.factories.combine import combine
+from agentkit.actions.factories.fanout import ItemError
+from agentkit.actions.factories.fanout import fan_out
+from agentkit.actions.factories.function import action
+from agentkit.actions.factories.repeat import repeat
+
+STRATEGIES = ["serial", "thread", "asyncio"]
+
+
+@action(name="Lookup")
+def lookup(key: str, delay: float = 0.0):
+    "Look a key up"
+    time.sleep(delay)
+    if key == "missing":
+        raise KeyError(key)
+    return key.upper()
+
+
+@action(name="Length")
+def length(text: str):
+    "Length of a text"
+    return len(text)
+
+
+@pytest.mark.parametrize("strategy", STRATEGIES)
+def test_repeat_returns_results_in_order(strategy):
+    lookups = repeat(lookup, reducer=list, strategy=strategy)
+    items = [{"key": "a", "delay": 0.03}, {"key": "b"}, {"key": "c", "delay": 0.01}]
+
+    assert lookups.invoke({"Lookup": items}) == ["A", "B", "C"]
+
+
+@pytest.mark.parametrize("strategy", ["thread", "asyncio"])
+def test_repeat_runs_items_concurrently(strategy):
+    lookups = repeat(lookup, reducer=list, strategy=strategy)
+    items = [{"key": str(i), "delay": 0.1} for i in range(10)]
+
+    started = time.monotonic()
+    lookups.invoke({"Lookup": items})
+
+    assert time.monotonic() - started < 0.5
+
+
+@pytest.mark.parametrize("strategy", ["thread", "asyncio"])
+def test_max_concurrency_limits_running_items(strategy):
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    @action(name="Track")
+    def track(i: int):
+        "Track concurrency"
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+        return i
+
+    tracked = repeat(track, reducer=list, strategy=strategy, max_concurrency=3)
+
+    assert tracked.invoke({"Track": [{"i": i} for i in range(12)]}) == list(range(12))
+    assert peak[0] == 3
+
+
+@pytest.mark.parametrize("strategy", STRATEGIES)
+def test_errors_are_raised_unless_captured(strategy):
+    items = [{"key": "a"}, {"key": "missing"}]
+
+    with pytest.raises(KeyError):
+        repeat(lookup, reducer=list, strategy=strategy).invoke({"Lookup": items})
+
+    results = repeat(lookup, reducer=list, strategy=strategy, capture_errors=True).invoke(
+        {"Lookup": items}
+    )
+    assert results[0] == "A"
+    assert isinstance(results[1], ItemError)
+    assert results[1].index == 1
+    assert str(results[1]) == "Error: KeyError: 'missing'"
+
+
+@pytest.mark.parametrize("strategy", ["thread", "asyncio"])
+def test_streaming_reducer_gets_results_as_they_complete(strategy):
+    lookups = repeat(lookup, reducer=list, strategy=strategy, streaming=True)
+    items = [{"key": "slow", "delay": 0.2}, {"key": "fast"}]
+
+    assert lookups.invoke({"Lookup": items}) == ["FAST", "SLOW"]
+
+
+def test_streaming_reducer_can_stop_early():
+    calls = [lambda i=i: time.sleep(0.05 * i) or i for i in range(5)]
+
+    assert next(iter(fan_out(calls, "thread"))) == (0, 0)
+
+
+@pytest.mark.parametrize("strategy", STRATEGIES)
+def test_combine_runs_the_called_actions(strategy):
+    both = combine([lookup, length], reducer=list, strategy=strategy, capture_errors=True)
+
+    assert both.invoke({"Lookup": {"key": "a"}, "Length": {"text": "abc"}}) == ["A", 3]
+    assert both.invoke({"Length": {"text": "ab"}}) == [2]
+
+
+def test_asyncio_strategy_awaits_coroutines():
+    async def double(i):
+        await asyncio.sleep(0.01)
+        return i * 2
+
+    calls = [lambda i=i: double(i) for i in range(3)]
+
+    assert sorted(fan_out(calls, "asyncio")) == [(0, 0), (1, 2), (2, 4)]
+
+
+def test_asyncio_strategy_works_inside_a_running_loop():
+    async def main():
+        return repeat(lookup, reducer=list, strategy="asyncio").invoke(
+            {"Lookup": [{"key": "a"}, {"key": "b"}]}
+        )
+
+    assert asyncio.run(main()) == ["A", "B"]
+
+
+def test_invalid_options_are_rejected():
+    with pytest.raises(ValueError, match="strategy"):
+        repeat(lookup, strategy="processes")
+
+    with pytest.raises(ValueError, match="max_concurrency"):
+        combine([lookup], reducer=list, max_concurrency=0)
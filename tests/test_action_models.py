@@ -0,0 +1,116 @@
+import pytest
+from agentkit.actions.factories.combine import combine
+from agentkit.actions.factories.function import action
+from agentkit.utils import pydantic_utils
+from agentkit.utils.pydantic_utils import create_pydantic_model_from_func
+
+
+def make_function(default):
+    def fetch(url: str, retries: int = default):
+        "Fetch an url"
+        return url
+
+    return fetch
+
+
+def test_models_are_cached_per_function():
+    function = make_function(3)
+
+    model = create_pydantic_model_from_func("Fetch", function)
+
+    assert create_pydantic_model_from_func("Fetch", function) is model
+    assert create_pydantic_model_from_func("Other", function) is not model
+
+
+def test_closures_with_different_defaults_have_their_own_model():
+    three = create_pydantic_model_from_func("Fetch", make_function(3))
+    five = create_pydantic_model_from_func("Fetch", make_function(5))
+
+    assert three is not five
+    assert three(url="u").retries == 3
+    assert five(url="u").retries == 5
+    assert create_pydantic_model_from_func("Fetch", make_function(3)) is three
+
+
+def test_the_least_recently_used_models_are_evicted(monkeypatch):
+    monkeypatch.setattr(pydantic_utils, "_MODEL_CACHE_SIZE", 2)
+    pydantic_utils.clear_model_cache()
+    three, five, seven = make_function(3), make_function(5), make_function(7)
+
+    model = create_pydantic_model_from_func("Fetch", three)
+    evicted = create_pydantic_model_from_func("Fetch", five)
+    assert create_pydantic_model_from_func("Fetch", three) is model
+    create_pydantic_model_from_func("Fetch", seven)
+
+    assert len(pydantic_utils._MODEL_CACHE) == 2
+    assert create_pydantic_model_from_func("Fetch", three) is model
+    assert create_pydantic_model_from_func("Fetch", five) is not evicted
+
+
+def test_lazy_actions_generate_their_model_on_first_use(monkeypatch):
+    calls = []
+    create = pydantic_utils._create_pydantic_model_from_func
+
+    def counting_create(*args):
+        calls.append(args[0])
+        return create(*args)
+
+    monkeypatch.setattr(pydantic_utils, "_create_pydantic_model_from_func", counting_create)
+
+    @action(name="Shout", lazy=True)
+    def shout(text: str, times: int = 2):
+        "Shout a text"
+        return text.upper() * times
+
+    assert calls == []
+
+    assert shout.get_function_details()["parameters"]["required"] == ["text"]
+    assert shout.invoke(shout.decode_arguments('{"text": "a"}')) == "AA"
+    assert shout.pydantic_model is shout.pydantic_model
+    assert calls == ["Shout"]
+
+
+def test_lazy_actions_can_be_combined():
+    @action(name="First", lazy=True)
+    def first(a: int):
+        "First"
+        return a
+
+    @action(name="Second", lazy=True)
+    def second(b: int):
+        "Second"
+        return b
+
+    both = combine([first, second], reducer=list)
+
+    assert both.invoke({"First": {"a": 1}, "Second": {"b": 2}}) == [1, 2]
+
+
+def decorate_functions(functions, lazy):
+    return [action(name=f"Act{i}", lazy=lazy)(f) for i, f in enumerate(functions)]
+
+
+def test_json_schemas_are_copies():
+    @action(name="Echo")
+    def echo(text: str):
+        "Echo a text"
+        return text
+
+    echo.json_schema()["properties"]["text"]["type"] = "integer"
+
+    assert echo.json_schema()["properties"]["text"]["type"] == "string"
+
+
+@pytest.mark.slow()
+@pytest.mark.parametrize("lazy", [False, True], ids=["eager", "lazy"])
+def test_action_decoration_cost(benchmark, lazy):
+    namespace = {}
+    for i in range(200):
+        exec(f"def tool_{i}(a: int, b: str = 'x', c: float = {i}.0):\n    'Tool {i}'\n", namespace)
+    functions = [namespace[f"tool_{i}"] for i in range(200)]
+
+    def setup():
+        pydantic_utils.clear_model_cache()
+        return (functions, lazy), {}
+
+    benchmark.pedantic(decorate_functions, setup=setup, rounds=10)
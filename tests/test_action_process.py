@@ -0,0 +1,133 @@
+import asyncio
+import os
+import pickle
+import time
+
+import pytest
+from agentkit.actions.factories.function import action
+from agentkit.actions.process import ProcessPool
+from agentkit.actions.process import ProcessPoolException
+from agentkit.utils.exceptions import ToolTimeoutException
+
+pool = ProcessPool(max_workers=2)
+# Timed out calls keep their worker busy until they finish
+timeout_pool = ProcessPool(max_workers=1, timeout=0.2)
+
+
+@pytest.fixture(scope="module", autouse=True)
+def _shutdown_pools():
+    yield
+    pool.shutdown()
+    timeout_pool.shutdown()
+
+
+@action(name="Pid", process_pool=pool)
+def pid(offset: int = 0):
+    "Process id of the worker"
+    return os.getpid() + offset
+
+
+def hold_cpu(seconds: float):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        pass
+    return seconds
+
+
+@action(name="Spin", process_pool=pool)
+def spin(seconds: float):
+    "Hold the CPU"
+    return hold_cpu(seconds)
+
+
+@action(name="SpinTooLong", process_pool=timeout_pool)
+def spin_too_long(seconds: float):
+    "Hold the CPU for too long"
+    return hold_cpu(seconds)
+
+
+@action(name="Fail", process_pool=pool)
+def fail(message: str):
+    "Fail"
+    raise ValueError(message)
+
+
+@action(name="Unpicklable", process_pool=pool)
+def unpicklable():
+    "Return a lambda"
+    return lambda: None
+
+
+@action(name="Sleep", process_pool=pool)
+async def sleep(seconds: float):
+    "Sleep in the worker"
+    await asyncio.sleep(seconds)
+    return seconds
+
+
+class Counter:
+    def __init__(self, start):
+        self.start = start
+
+    @action(name="Add", process_pool=pool)
+    def add(self, n: int):
+        "Add to the counter"
+        return self.start + n
+
+
+def test_actions_run_in_a_worker_process():
+    assert pid.invoke({}) != os.getpid()
+    assert pid.invoke(pid.decode_arguments('{"offset": 0}')) != os.getpid()
+
+
+def test_module_level_actions_are_pickled_by_reference():
+    assert pickle.loads(pickle.dumps(pid)) is pid
+
+
+def test_bound_actions_are_sent_with_their_instance():
+    assert Counter(40).add.invoke({"n": 2}) == 42
+
+
+def test_errors_are_raised_in_the_caller():
+    with pytest.raises(ValueError, match="boom"):
+        fail.invoke({"message": "boom"})
+
+
+def test_unpicklable_results_are_reported():
+    with pytest.raises(ProcessPoolException, match="Unpicklable"):
+        unpicklable.invoke({})
+
+
+def test_local_actions_are_rejected():
+    @action(name="Local", process_pool=pool)
+    def local():
+        "Local action"
+
+    with pytest.raises(ProcessPoolException, match="Local"):
+        local.invoke({})
+
+
+def test_calls_time_out():
+    with pytest.raises(ToolTimeoutException):
+        spin_too_long.invoke({"seconds": 1})
+
+
+def test_async_actions_run_in_the_worker():
+    assert sleep.invoke({"seconds": 0.01}) == 0.01
+    assert asyncio.run(sleep.ainvoke({"seconds": 0.01})) == 0.01
+
+
+def test_cpu_bound_actions_do_not_stall_the_loop():
+    async def tick(ticks):
+        while True:
+            await asyncio.sleep(0.01)
+            ticks.append(time.monotonic())
+
+    async def main():
+        ticks = []
+        ticker = asyncio.ensure_future(tick(ticks))
+        await spin.acall(seconds=0.5)
+        ticker.cancel()
+        return ticks
+
+    assert len(asyncio.run(main())) >= 10
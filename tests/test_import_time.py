@@ -0,0 +1,81 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LLM_STACK = ("litellm", "openai")
+
+
+def import_times(statement):
+    """Cumulative import time in microseconds of every module loaded by ``statement``,
+    measured in a fresh interpreter with ``-X importtime``."""
+    env = {**os.environ, "PYTHONPATH": ROOT}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line.split("|")
+        times[module.strip()] = int(cumulative)
+    return times
+
+
+def loads_llm_stack(times):
+    return any(module.split(".")[0] in LLM_STACK for module in times)
+
+
+@pytest.mark.parametrize(
+    "statement",
+    [
+        "import agentkit",
+        "from agentkit import Workflow, State, Event",
+        "import agentkit.workflow.workflow",
+        "import agentkit.actions",
+        "from agentkit import action",
+    ],
+)
+def test_imports_do_not_load_the_llm_stack(statement):
+    assert not loads_llm_stack(import_times(statement))
+
+
+def test_llm_exports_are_loaded_on_first_access():
+    assert loads_llm_stack(import_times("import agentkit; agentkit.completion"))
+
+
+def test_unknown_exports_raise_attribute_error():
+    subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import agentkit\n"
+            "try:\n"
+            "    agentkit.missing\n"
+            "except AttributeError:\n"
+            "    pass\n"
+            "else:\n"
+            "    raise SystemExit(1)",
+        ],
+        cwd=ROOT,
+        env={**os.environ, "PYTHONPATH": ROOT},
+        check=True,
+    )
+
+
+@pytest.mark.slow()
+@pytest.mark.parametrize("module", ["agentkit", "agentkit.workflow", "agentkit.actions"])
+def test_import_time(benchmark, module):
+    times = benchmark.pedantic(import_times, args=(f"import {module}",), rounds=5)
+
+    benchmark.extra_info["cumulative_us"] = times[module]
+    benchmark.extra_info["modules"] = len(times)
+    assert not loads_llm_stack(times)
@@ -0,0 +1,58 @@
+import pytest
+from agentkit.actions.factories.function import action
+from agentkit.llms.backends import CompletionBackendException
+from agentkit.llms.backends import RecordingBackend
+from agentkit.llms.backends import ReplayBackend
+from agentkit.llms.backends import SyntheticBackend
+from agentkit.llms.client.chain import ChatLoopManager
+from agentkit.llms.client.chat import ChatCompletion
+
+
+@action(name="Add")
+def add(a: int, b: int):
+    "Add two numbers"
+    return a + b
+
+
+def test_synthetic_backend_drives_the_tool_loop():
+    backend = SyntheticBackend([[("Add", {"a": 1, "b": 2}), ("Add", {"a": 3, "b": 4})], "3 and 7"])
+    messages = [{"role": "user", "content": "add"}]
+
+    response = ChatCompletion(model="fake", backend=backend)(messages=messages, actions=[add])
+
+    assert response.choices[0].message.content == "3 and 7"
+    assert [m["content"] for m in messages if isinstance(m, dict) and m["role"] == "tool"] == [
+        "3",
+        "7",
+    ]
+    assert backend.calls == 2
+
+
+def test_synthetic_backend_streams_in_chunks():
+    backend = SyntheticBackend(["a long final answer"], chunk_size=4)
+    chunks = list(backend.completion(model="fake", messages=[], stream=True))
+
+    assert "".join(c.choices[0].delta.content or "" for c in chunks) == "a long final answer"
+    assert chunks[-1].choices[0].finish_reason == "stop"
+
+
+def test_recorded_fixture_is_replayed(tmp_path):
+    path = str(tmp_path / "fixture.jsonl")
+    recorder = RecordingBackend(path, backend=SyntheticBackend([[("Add", {"a": 1, "b": 1})], "2"]))
+    ChatLoopManager(backend=recorder)(
+        model="fake", messages=[{"role": "user", "content": "1 + 1"}], actions=[add]
+    )
+
+    replay = ReplayBackend(path, match_requests=True)
+    response = ChatLoopManager(backend=replay)(
+        model="fake", messages=[{"role": "user", "content": "1 + 1"}], actions=[add]
+    )
+
+    assert response.choices[0].message.content == "2"
+
+
+def test_replay_backend_raises_when_exhausted():
+    backend = ReplayBackend(records=[])
+
+    with pytest.raises(CompletionBackendException, match="exhausted"):
+        backend.completion(model="fake", messages=[])
@@ -0,0 +1,93 @@
+import json
+import threading
+import time
+
+from agentkit.actions.factories.pydantic_model_to_action import action_from_model
+from agentkit.llms.backends import CompletionBackend
+from agentkit.llms.backends import SyntheticBackend
+from agentkit.llms.client.batch import BatchCompletion
+from agentkit.llms.client.batch import batch_completion
+from pydantic import BaseModel
+
+
+class Invoice(BaseModel):
+    number: str
+    total: float
+
+
+extract = action_from_model(Invoice)
+
+
+class ConcurrentBackend(CompletionBackend):
+    """Extract an invoice from the user message, failing on "crash"."""
+
+    def __init__(self, latency=0.02):
+        self.latency = latency
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def completion(self, *args, **kwargs):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.latency)
+        with self.lock:
+            self.active -= 1
+
+        text = kwargs["messages"][0]["content"]
+        if text == "crash":
+            raise RuntimeError("provider down")
+        turn = [(extract.name, {"number": text, "total": 1.5})]
+        usage = {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}
+        return SyntheticBackend([turn], usage=usage).completion(*args, **kwargs)
+
+
+def requests(texts):
+    return [
+        {"id": text, "messages": [{"role": "user", "content": text}], "actions": [extract]}
+        for text in texts
+    ]
+
+
+def test_requests_run_concurrently_and_report_usage():
+    backend = ConcurrentBackend()
+    batch = BatchCompletion(concurrency=4, model="fake", backend=backend)
+
+    results = {result.id: result for result in batch.run(requests([f"n{i}" for i in range(8)]))}
+
+    assert backend.peak == 4
+    assert results["n3"].response == [Invoice(number="n3", total=1.5)]
+    assert results["n3"].usage["total_tokens"] == 15
+    assert batch.usage["total_tokens"] == 8 * 15
+
+
+def test_failures_are_reported_per_request():
+    results = list(
+        batch_completion(requests(["a", "crash"]), model="fake", backend=ConcurrentBackend())
+    )
+
+    errors = {result.id: result.error for result in results}
+    assert errors["a"] is None
+    assert "provider down" in errors["crash"]
+
+
+def test_checkpointed_requests_are_skipped(tmp_path):
+    path = str(tmp_path / "batch.jsonl")
+    backend = ConcurrentBackend()
+    list(
+        batch_completion(requests(["a", "crash"]), model="fake", backend=backend, checkpoint=path)
+    )
+
+    with open(path) as f:
+        saved = [json.loads(line) for line in f]
+    assert {line["id"] for line in saved} == {"a", "crash"}
+
+    rerun = list(
+        BatchCompletion(model="fake", backend=backend, checkpoint=path, yield_restored=True).run(
+            requests(["a", "b"])
+        )
+    )
+
+    assert [(result.id, result.restored) for result in rerun] == [("a", True), ("b", False)]
+    assert rerun[0].response == [{"number": "a", "total": 1.5}]
@@ -0,0 +1,129 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import litellm
+import pytest
+from agentkit.actions.factories.function import action
+from agentkit.llms.backends import SyntheticBackend
+from agentkit.llms.cache import InMemoryResponseCache
+from agentkit.llms.cache import SQLiteResponseCache
+from agentkit.llms.cache import make_cache_key
+from agentkit.llms.client.chat import ChatCompletion
+
+
+@action(name="Echo")
+def echo(text: str):
+    "Echo the text back"
+    return text
+
+
+def text_response(content):
+    return litellm.ModelResponse(
+        choices=[
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }
+        ],
+        usage={"prompt_tokens": 3, "completion_tokens": 2, "total_tokens": 5},
+    )
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def cache(request, tmp_path):
+    if request.param == "memory":
+        return InMemoryResponseCache(maxsize=8)
+    return SQLiteResponseCache(path=str(tmp_path / "cache.sqlite3"))
+
+
+def test_cache_key_ignores_transport_arguments():
+    messages = [{"role": "user", "content": "hi"}]
+    assert make_cache_key(model="m", messages=messages) == make_cache_key(
+        model="m", messages=messages, timeout=10
+    )
+    assert make_cache_key(model="m", messages=messages) != make_cache_key(
+        model="m", messages=messages, temperature=0.5
+    )
+
+
+@pytest.mark.parametrize("credential", ["api_key", "api_base"])
+def test_cache_key_is_split_by_credentials(credential):
+    messages = [{"role": "user", "content": "hi"}]
+    keys = {
+        make_cache_key(model="m", messages=messages, **{credential: value})
+        for value in ("tenant-a", "tenant-b")
+    }
+
+    assert len(keys) == 2
+
+
+def test_identical_requests_are_served_from_cache(mocker, cache):
+    completion = mocker.patch("litellm.completion", return_value=text_response("hello"))
+    chat = ChatCompletion(model="fake", cache=cache)
+
+    for _ in range(3):
+        response = chat(messages=[{"role": "user", "content": "hi"}], actions=[echo])
+        assert response.choices[0].message.content == "hello"
+
+    assert completion.call_count == 1
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+@pytest.mark.parametrize("stream", [False, True], ids=["response", "stream"])
+def test_cache_hits_are_not_billed(stream):
+    backend = SyntheticBackend(["hello"])
+    chat = ChatCompletion(model="fake", cache=InMemoryResponseCache(), backend=backend)
+
+    for _ in range(3):
+        response = chat(
+            messages=[{"role": "user", "content": "hi"}], actions=[echo], stream=stream
+        )
+        if stream:
+            list(response)
+
+    assert backend.calls == 1
+    assert chat.token_usage_tracker.tracker["total_tokens"] == 20
+
+
+def test_expired_entries_are_refreshed(mocker):
+    cache = InMemoryResponseCache(ttl=60)
+    method = cache.wrap(mocker.Mock(side_effect=["first", "second"]))
+    clock = mocker.patch("agentkit.utils.response_cache.time.time", return_value=0)
+
+    assert method(model="m") == "first"
+    clock.return_value = 61
+    assert method(model="m") == "second"
+
+
+def test_lookups_are_counted_across_threads(cache):
+    cache.set("hit", 1)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda index: cache.get("hit" if index % 2 else "miss"), range(2000)))
+
+    assert (cache.hits, cache.misses) == (1000, 1000)
+
+
+def test_lru_evicts_least_recently_used():
+    cache = InMemoryResponseCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+
+def test_streamed_responses_are_replayed(cache):
+    calls = []
+
+    def stream(**kwargs):
+        calls.append(kwargs)
+        yield from ["a", "b", "c"]
+
+    method = cache.wrap(stream)
+
+    assert list(method(model="m", stream=True)) == ["a", "b", "c"]
+    assert list(method(model="m", stream=True)) == ["a", "b", "c"]
+    assert len(calls) == 1
@@ -0,0 +1,88 @@
+import pytest
+from agentkit.actions.factories.combine import combine
+from agentkit.actions.factories.function import action
+from agentkit.actions.factories.pydantic_model_to_action import action_from_model
+from agentkit.llms.backends import SyntheticBackend
+from agentkit.llms.client.chat import ChatCompletion
+from agentkit.llms.client.chat import ChatCompletionException
+from agentkit.utils.encoding import encode_tool_result
+from pydantic import BaseModel
+from pydantic import Field
+
+
+class Point(BaseModel):
+    x: int
+    y: int
+
+
+@action(name="Shift")
+def shift(point: Point, dx: int = 0):
+    "Shift a point"
+    return {"x": point.x + dx, "y": point.y}
+
+
+def tool_contents(messages):
+    return [m["content"] for m in messages if isinstance(m, dict) and m["role"] == "tool"]
+
+
+def test_arguments_are_validated_into_the_model():
+    arguments = shift.decode_arguments('{"point": {"x": "1", "y": 2}, "dx": 3}')
+
+    assert isinstance(arguments.point, Point)
+    assert shift.invoke(arguments) == {"x": 4, "y": 2}
+
+
+class Invoice(BaseModel):
+    number: str = Field(alias="invoiceNumber")
+    total: float = 0
+
+
+def test_model_actions_accept_aliased_fields():
+    create = action_from_model(Invoice)
+    backend = SyntheticBackend([[(create.name, {"invoiceNumber": "A1", "total": "9.5"})]])
+
+    result = ChatCompletion(model="fake", backend=backend)(
+        messages=[{"role": "user", "content": "extract"}], actions=[create]
+    )
+
+    assert result == [Invoice(invoiceNumber="A1", total=9.5)]
+    assert create.invoke(create.decode_arguments('{"invoiceNumber": "B2"}')).number == "B2"
+
+
+def test_invalid_arguments_are_rejected():
+    backend = SyntheticBackend([[("Shift", {"point": {"x": "left"}})]])
+
+    with pytest.raises(ChatCompletionException, match="Failed to parse"):
+        ChatCompletion(model="fake", backend=backend)(
+            messages=[{"role": "user", "content": "shift"}], actions=[shift]
+        )
+
+
+def test_results_are_encoded_as_json():
+    assert encode_tool_result("text") == "text"
+    assert encode_tool_result({"a": [1, None]}) == '{"a":[1,null]}'
+    assert encode_tool_result(Point(x=1, y=2)) == '{"x":1,"y":2}'
+    assert encode_tool_result({1, 2}) == str({1, 2})
+
+
+def test_custom_result_encoder():
+    backend = SyntheticBackend([[("Shift", {"point": {"x": 1, "y": 2}})], "done"])
+    messages = [{"role": "user", "content": "shift"}]
+
+    ChatCompletion(model="fake", backend=backend, result_encoder=repr)(
+        messages=messages, actions=[shift]
+    )
+
+    assert tool_contents(messages) == ["{'x': 1, 'y': 2}"]
+
+
+def test_combined_actions_receive_validated_arguments():
+    both = combine([shift], reducer=lambda results: results)
+    backend = SyntheticBackend(
+        [[(both.name, {"Shift": {"point": {"x": 1, "y": 1}, "dx": 1}})], "done"]
+    )
+    messages = [{"role": "user", "content": "shift"}]
+
+    ChatCompletion(model="fake", backend=backend)(messages=messages, actions=[both])
+
+    assert tool_contents(messages) == ['[{"x":2,"y":1}]']
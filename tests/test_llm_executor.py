@@ -0,0 +1,211 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from agentkit.actions.factories.function import action
+from agentkit.llms.backends import SyntheticBackend
+from agentkit.llms.client.chat import ChatCompletion
+from agentkit.llms.executor import ToolCall
+from agentkit.llms.executor import ToolExecutor
+from agentkit.llms.executor import ToolExecutorException
+from agentkit.llms.executor import ToolTimeoutException
+
+log = []
+lock = threading.Lock()
+
+
+def record(event):
+    with lock:
+        log.append(event)
+
+
+@action(name="Sleep")
+def sleep(seconds: float, label: str):
+    "Sleep for a while"
+    record(("start", label))
+    time.sleep(seconds)
+    record(("end", label))
+    return label
+
+
+released = threading.Event()
+
+
+@action(name="Wait")
+def wait_for_release(label: str):
+    "Wait until released"
+    record(("start", label))
+    # Fails instead of hanging when the calls don't overlap
+    if not released.wait(5):
+        raise TimeoutError(label)
+    record(("end", label))
+    return label
+
+
+@action(name="Release")
+def release(label: str):
+    "Release the waiting calls"
+    record(("end", label))
+    released.set()
+    return label
+
+
+@action(name="Write", serialize_key="file")
+def write(label: str):
+    "Write to the shared file"
+    record(("start", label))
+    time.sleep(0.02)
+    record(("end", label))
+    return label
+
+
+@action(name="Read", depends_on=["Write"])
+def read():
+    "Read the shared file"
+    record(("start", "read"))
+    return "read"
+
+
+@action(name="Fail")
+def fail():
+    "Always fails"
+    raise ValueError("boom")
+
+
+@action(name="Done", stop=True)
+def done():
+    "Finish"
+    return "finished"
+
+
+barriers = {}
+
+
+@action(name="Meet")
+async def meet(label: str):
+    "Wait until every Meet call of the turn arrived"
+    record(("start", label))
+    # Times out instead of hanging when the calls don't overlap
+    await asyncio.wait_for(barriers["meet"].wait(), 5)
+    return label
+
+
+@action(name="Hang")
+async def hang():
+    "Never returns"
+    try:
+        await asyncio.sleep(60)
+    except asyncio.CancelledError:
+        record(("cancelled", "hang"))
+        raise
+
+
+@action(name="AsyncRead", depends_on=["Write"])
+async def async_read():
+    "Read the shared file"
+    record(("start", "async read"))
+    return "async read"
+
+
+@pytest.fixture(autouse=True)
+def _clear_log():
+    log.clear()
+    released.clear()
+
+
+def test_independent_calls_run_in_parallel_and_keep_their_order():
+    calls = [
+        ToolCall("1", wait_for_release, {"label": "slow"}),
+        ToolCall("2", release, {"label": "fast"}),
+    ]
+
+    results = ToolExecutor(max_workers=4).run(calls)
+
+    assert results == ["slow", "fast"]
+    assert log.index(("end", "fast")) < log.index(("end", "slow"))
+
+
+def test_serialized_and_dependent_calls_wait_for_each_other():
+    calls = [
+        ToolCall("1", read, {}),
+        ToolCall("2", write, {"label": "a"}),
+        ToolCall("3", write, {"label": "b"}),
+    ]
+
+    results = ToolExecutor(max_workers=4).run(calls)
+
+    assert results == ["read", "a", "b"]
+    assert log == [("start", "a"), ("end", "a"), ("start", "b"), ("end", "b"), ("start", "read")]
+
+
+def test_circular_dependencies_are_rejected():
+    first = action(name="First", description="First", depends_on=["Second"])(lambda: None)
+    second = action(name="Second", description="Second", depends_on=["First"])(lambda: None)
+
+    with pytest.raises(ToolExecutorException, match="Circular"):
+        ToolExecutor().run([ToolCall("1", first, {}), ToolCall("2", second, {})])
+
+
+def test_first_error_in_original_order_is_raised():
+    calls = [ToolCall("1", fail, {}), ToolCall("2", sleep, {"seconds": 0.01, "label": "x"})]
+
+    with pytest.raises(ValueError, match="boom"):
+        ToolExecutor(max_workers=2).run(calls)
+
+
+def test_slow_calls_time_out():
+    calls = [ToolCall("1", sleep, {"seconds": 0.5, "label": "slow"})]
+
+    with pytest.raises(ToolTimeoutException):
+        ToolExecutor(max_workers=2, timeout=0.05).run(calls)
+
+
+def test_any_stop_action_stops_the_loop():
+    backend = SyntheticBackend([[("Sleep", {"seconds": 0, "label": "x"}), ("Done", {})], "more"])
+
+    response = ChatCompletion(model="fake", backend=backend, tool_executor=ToolExecutor(2))(
+        messages=[{"role": "user", "content": "go"}], actions=[sleep, done]
+    )
+
+    assert response == [["x"], ["finished"]]
+    assert backend.calls == 1
+
+
+def test_async_calls_of_a_turn_are_awaited_together():
+    barriers["meet"] = asyncio.Barrier(4)
+    calls = [ToolCall(str(i), meet, {"label": str(i)}) for i in range(4)]
+
+    assert ToolExecutor(max_workers=1).run(calls) == ["0", "1", "2", "3"]
+
+
+def test_async_calls_wait_for_sync_prerequisites():
+    calls = [ToolCall("1", async_read, {}), ToolCall("2", write, {"label": "a"})]
+
+    assert ToolExecutor().run(calls) == ["async read", "a"]
+    assert log == [("start", "a"), ("end", "a"), ("start", "async read")]
+
+
+def test_timed_out_async_calls_are_cancelled():
+    with pytest.raises(ToolTimeoutException, match="Hang"):
+        ToolExecutor(timeout=0.01).run([ToolCall("1", hang, {})])
+
+    assert log == [("cancelled", "hang")]
+
+
+def test_async_calls_run_on_the_running_loop():
+    barriers["meet"] = asyncio.Barrier(2)
+    calls = [ToolCall("1", meet, {"label": "a"}), ToolCall("2", meet, {"label": "b"})]
+
+    assert asyncio.run(ToolExecutor().arun(calls)) == ["a", "b"]
+
+
+def test_completion_awaits_async_tool_calls_together():
+    barriers["meet"] = asyncio.Barrier(3)
+    backend = SyntheticBackend([[("Meet", {"label": str(i)}) for i in range(3)], "done"])
+
+    response = ChatCompletion(model="fake", backend=backend)(
+        messages=[{"role": "user", "content": "go"}], actions=[meet]
+    )
+
+    assert response.choices[0].message.content == "done"
@@ -0,0 +1,152 @@
+import copy
+import pickle
+
+import pytest
+from agentkit.actions.factories.function import action
+from agentkit.llms.backends import SyntheticBackend
+from agentkit.llms.client.chat import ChatCompletion
+from agentkit.llms.history import ConversationBuffer
+from agentkit.llms.history import ConversationBufferException
+from agentkit.llms.history import SummarizePolicy
+from agentkit.utils.tokens import TokenUsageTracker
+from agentkit.utils.tokens import TokenUsageTrackerException
+
+
+def word_counter(message, model):
+    content = message["content"] if isinstance(message, dict) else message.content
+    return len((content or "").split()) + 1
+
+
+def user(content):
+    return {"role": "user", "content": content}
+
+
+def assistant_tool_call(call_id):
+    return {
+        "role": "assistant",
+        "content": None,
+        "tool_calls": [
+            {"id": call_id, "type": "function", "function": {"name": "T", "arguments": "{}"}}
+        ],
+    }
+
+
+def tool(call_id, content):
+    return {"role": "tool", "tool_call_id": call_id, "name": "T", "content": content}
+
+
+@pytest.fixture()
+def buffer():
+    return ConversationBuffer(
+        [{"role": "system", "content": "be nice"}, user("one two three")],
+        max_tokens=12,
+        token_counter=word_counter,
+    )
+
+
+def test_token_counts_are_tracked_on_every_mutation(buffer):
+    buffer += [assistant_tool_call("a"), tool("a", "x y")]
+    buffer.append(user("four"))
+
+    assert buffer.token_counts == [3, 4, 1, 3, 2]
+    assert buffer.pop() == user("four")
+    assert buffer.total_tokens == 11
+
+
+def test_token_counts_follow_reordering(buffer):
+    buffer[1:] = (user(content) for content in ["a", "b c d", "e f"])
+    assert buffer.token_counts == [3, 2, 4, 3]
+
+    buffer.sort(key=lambda message: len(message["content"]))
+    assert [message["content"] for message in buffer] == ["a", "e f", "b c d", "be nice"]
+    assert buffer.token_counts == [2, 3, 4, 3]
+
+    buffer.reverse()
+    assert buffer.token_counts == [3, 4, 3, 2]
+
+    buffer *= 2
+    assert buffer.token_counts == [3, 4, 3, 2] * 2
+
+
+@pytest.mark.parametrize(
+    "clone",
+    [copy.copy, copy.deepcopy, lambda buffer: pickle.loads(pickle.dumps(buffer))],
+    ids=["copy", "deepcopy", "pickle"],
+)
+def test_copies_keep_messages_and_token_counts_together(buffer, clone):
+    cloned = clone(buffer)
+
+    assert type(cloned) is ConversationBuffer
+    assert cloned == buffer
+    assert cloned.token_counts == buffer.token_counts == [3, 4]
+    assert cloned.max_tokens == 12
+
+    cloned.append(user("more"))
+    assert buffer.token_counts == [3, 4]
+    assert cloned.token_counts == [3, 4, 2]
+
+
+def test_fit_drops_oldest_turns_with_their_tool_results(buffer):
+    buffer += [assistant_tool_call("a"), tool("a", "x y z w v u"), user("latest question")]
+
+    buffer.fit()
+
+    assert buffer == [{"role": "system", "content": "be nice"}, user("latest question")]
+    assert buffer.total_tokens <= 12
+
+
+def test_summarize_policy_replaces_old_turns(buffer):
+    buffer.policy = SummarizePolicy(lambda messages: f"{len(messages)} msgs")
+    buffer += [user("a b c d e f"), user("latest")]
+
+    buffer.fit()
+
+    assert buffer[1] == {"role": "system", "content": "2 msgs"}
+    assert buffer[1] is buffer.summary
+    assert buffer[-1] == user("latest")
+
+
+def test_fit_raises_when_last_turn_does_not_fit(buffer):
+    buffer.append(user(" ".join(["w"] * 20)))
+
+    with pytest.raises(ConversationBufferException):
+        buffer.fit()
+
+
+def test_fit_honours_token_usage_tracker_budget(buffer):
+    tracker = TokenUsageTracker(budget=100)
+    tracker.track_usage({"total_tokens": 90})
+    buffer.max_tokens = None
+
+    buffer.fit(tracker)
+
+    assert buffer == [{"role": "system", "content": "be nice"}, user("one two three")]
+    tracker.track_usage({"total_tokens": 5})
+    with pytest.raises(TokenUsageTrackerException):
+        buffer.fit(tracker)
+
+
+@action(name="T")
+def noop():
+    "Do nothing"
+    return "x " * 50
+
+
+class RecordingSyntheticBackend(SyntheticBackend):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prompt_sizes = []
+
+    def completion(self, *args, **kwargs):
+        self.prompt_sizes.append(kwargs["messages"].total_tokens)
+        return super().completion(*args, **kwargs)
+
+
+def test_completion_loop_keeps_history_within_budget():
+    backend = RecordingSyntheticBackend([[("T", {})]] * 5 + ["done"])
+    messages = ConversationBuffer([user("start")], max_tokens=60, token_counter=word_counter)
+
+    ChatCompletion(model="fake", backend=backend)(messages=messages, actions=[noop])
+
+    assert len(backend.prompt_sizes) == 6
+    assert max(backend.prompt_sizes) <= 60
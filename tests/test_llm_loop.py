@@ -0,0 +1,101 @@
+import pytest
+from agentkit.actions.factories.function import action
+from agentkit.llms.backends import SyntheticBackend
+from agentkit.llms.client.chain import ChatLoopManager
+from agentkit.llms.client.chain import FunctionCallingLoopException
+from agentkit.llms.client.chat import ChatCompletion
+from agentkit.llms.client.loop import LoopHook
+from agentkit.llms.exception_handler import ExceptionHandler
+from agentkit.llms.exception_handler import Return
+
+
+@action(name="Add")
+def add(a: int, b: int):
+    "Add two numbers"
+    return a + b
+
+
+class RecordingHook(LoopHook):
+    def __init__(self):
+        self.stages = []
+
+    def on_request(self, state):
+        self.stages.append(("request", state.turn, sorted(state.request)))
+
+    def on_response(self, state):
+        self.stages.append(("response", state.turn))
+
+    def on_message(self, state):
+        self.stages.append(("message", state.turn, state.message.content))
+
+    def on_tool_results(self, state):
+        self.stages.append(("tools", state.turn, [r for _, r in state.tool_results]))
+
+    def on_decision(self, state):
+        self.stages.append(("decision", state.turn, type(state.action).__name__))
+
+
+@pytest.mark.parametrize("loop_class", [ChatCompletion, ChatLoopManager])
+def test_both_entry_points_run_the_same_stages(loop_class):
+    hook = RecordingHook()
+    backend = SyntheticBackend([[("Add", {"a": 1, "b": 2})], "3"])
+
+    response = loop_class(model="fake", backend=backend, hooks=[hook])(
+        messages=[{"role": "user", "content": "1 + 2"}], actions=[add]
+    )
+
+    assert response.choices[0].message.content == "3"
+    assert [stage[:2] for stage in hook.stages] == [
+        (name, turn)
+        for turn in (1, 2)
+        for name in ("request", "response", "message", "tools", "decision")
+    ]
+    assert "tools" in hook.stages[0][2]
+    assert hook.stages[3][2] == [3]
+    assert hook.stages[-1][2] == "ReturnRightAway"
+
+
+def test_hooks_can_rewrite_the_request():
+    class Temperature(LoopHook):
+        def on_request(self, state):
+            state.request["temperature"] = 0
+
+    class Backend(SyntheticBackend):
+        def completion(self, *args, **kwargs):
+            self.temperature = kwargs.get("temperature")
+            return super().completion(*args, **kwargs)
+
+    backend = Backend(["ok"])
+    ChatCompletion(model="fake", backend=backend, hooks=[Temperature()])(
+        messages=[{"role": "user", "content": "hi"}], actions=[add]
+    )
+
+    assert backend.temperature == 0
+
+
+def test_exception_handler_decides_on_errors():
+    class Fallback(ExceptionHandler):
+        def handle_exception(self, e, info):
+            return Return(content=f"recovered from {type(e).__name__}")
+
+    backend = SyntheticBackend([[("Unknown", {})]])
+
+    with pytest.raises(FunctionCallingLoopException, match="not a valid function name"):
+        ChatLoopManager(backend=backend)(
+            model="fake", messages=[{"role": "user", "content": "hi"}], actions=[add]
+        )
+
+    response = ChatLoopManager(backend=backend, exception_handler=Fallback())(
+        model="fake", messages=[{"role": "user", "content": "hi"}], actions=[add]
+    )
+    assert response == "recovered from FunctionCallingLoopException"
+
+
+def test_chat_loop_manager_returns_text_streams_as_is():
+    backend = SyntheticBackend(["streamed answer"], chunk_size=4)
+
+    stream = ChatLoopManager(backend=backend)(
+        model="fake", messages=[{"role": "user", "content": "hi"}], actions=[add], stream=True
+    )
+
+    assert "".join(c.choices[0].delta.content or "" for c in stream) == "streamed answer"
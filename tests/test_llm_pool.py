@@ -0,0 +1,128 @@
+import asyncio
+import threading
+import time
+
+import httpx
+import litellm
+from agentkit.actions.factories.function import action
+from agentkit.llms.backends import SyntheticBackend
+from agentkit.llms.client.chat import ChatCompletion
+from agentkit.llms.pool import ClientPool
+from agentkit.llms.pool import HostLimitedTransport
+
+
+class SlowTransport(httpx.BaseTransport):
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def handle_request(self, request):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.02)
+        with self.lock:
+            self.active -= 1
+        return httpx.Response(200, content=b"{}")
+
+
+def test_clients_are_created_lazily_and_reused():
+    pool = ClientPool()
+    assert pool._client is None
+
+    assert pool.client is pool.client
+    assert pool.async_client is pool.async_client
+    pool.close()
+    assert pool._client is None
+
+
+def test_install_sets_and_close_restores_litellm_sessions():
+    previous = litellm.client_session
+    with ClientPool() as pool:
+        assert litellm.client_session is pool.client
+        assert litellm.aclient_session is pool.async_client
+        pool.install()
+        assert litellm.client_session is pool.client
+
+    assert litellm.client_session is previous
+
+
+def test_pools_closed_out_of_order_restore_open_sessions():
+    previous = litellm.client_session
+    outer, inner = ClientPool().install(), ClientPool().install()
+
+    outer.close()
+    assert litellm.client_session is inner.client
+    assert not inner.client.is_closed
+
+    inner.close()
+    assert litellm.client_session is previous
+
+
+def test_closing_a_pool_hands_the_sessions_back_to_the_previous_one():
+    outer, inner = ClientPool().install(), ClientPool().install()
+    try:
+        inner.close()
+        assert litellm.client_session is outer.client
+        assert litellm.aclient_session is outer.async_client
+    finally:
+        outer.close()
+
+
+def test_aclose_restores_litellm_sessions():
+    previous = litellm.aclient_session
+    pool = ClientPool().install()
+    async_client = pool.async_client
+
+    asyncio.run(pool.aclose())
+
+    assert litellm.aclient_session is previous
+    assert async_client.is_closed
+    assert pool._async_client is None
+
+
+def test_close_in_a_running_loop_finishes_closing():
+    pool = ClientPool().install()
+    async_client = pool.async_client
+
+    async def close():
+        pool.close()
+        assert len(pool._closing) == 1
+        await asyncio.gather(*pool._closing)
+
+    asyncio.run(close())
+
+    assert async_client.is_closed
+    assert not pool._closing
+
+
+def test_per_host_concurrency_is_limited():
+    transport = SlowTransport()
+    client = httpx.Client(transport=HostLimitedTransport(transport, per_host=2))
+
+    threads = [
+        threading.Thread(target=client.get, args=("http://example.com/",)) for _ in range(6)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert transport.peak == 2
+
+
+def test_completion_installs_the_pool():
+    @action(name="Noop")
+    def noop():
+        """Does nothing."""
+        return "ok"
+
+    previous = litellm.client_session
+    pool = ClientPool()
+    with ChatCompletion(backend=SyntheticBackend(["done"]), client_pool=pool) as chat:
+        chat(model="test", messages=[{"role": "user", "content": "hi"}], actions=[noop])
+        assert litellm.client_session is pool.client
+
+    assert litellm.client_session is previous
+    assert pool._client is None
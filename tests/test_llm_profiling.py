@@ -0,0 +1,85 @@
+import pytest
+from agentkit.actions.factories.function import action
+from agentkit.llms.backends import SyntheticBackend
+from agentkit.llms.client.chain import ChatLoopManager
+from agentkit.llms.client.chat import ChatCompletion
+from agentkit.llms.client.loop import LoopState
+from agentkit.llms.general.stream import StreamMerger
+from agentkit.llms.general.tools import Tools
+from agentkit.utils import DEFAULT_ACTION_SCOPE
+
+
+@action(name="Lookup")
+def lookup(key: str):
+    "Look a key up"
+    return key.upper()
+
+
+TOOL_TURNS = 10
+script = [[("Lookup", {"key": f"k{i}"})] for i in range(TOOL_TURNS)] + ["done"]
+
+
+def run_chat_completion(backend):
+    ChatCompletion(model="fake", backend=backend)(
+        messages=[{"role": "user", "content": "go"}], actions=[lookup]
+    )
+
+
+def run_chat_loop_manager(backend):
+    ChatLoopManager(backend=backend)(
+        model="fake", messages=[{"role": "user", "content": "go"}], actions=[lookup]
+    )
+
+
+def merge_stream(chunks):
+    merger = StreamMerger()
+    for chunk in chunks:
+        for _ in merger.feed(chunk):
+            pass
+    return merger.message()
+
+
+def dispatch_tools(chat, message, handlers, orch, tools):
+    state = LoopState((), {"model": "fake", "messages": []}, handlers, orch, tools)
+    state.message = message
+    for _ in chat.dispatch_tools(state):
+        pass
+
+
+@pytest.mark.slow()
+def test_chat_completion_loop_overhead(benchmark):
+    benchmark.pedantic(
+        run_chat_completion, args=(SyntheticBackend(script),), rounds=10, iterations=10
+    )
+
+
+@pytest.mark.slow()
+def test_chat_loop_manager_loop_overhead(benchmark):
+    benchmark.pedantic(
+        run_chat_loop_manager, args=(SyntheticBackend(script),), rounds=10, iterations=10
+    )
+
+
+@pytest.mark.slow()
+def test_stream_merge_performance(benchmark):
+    backend = SyntheticBackend([[("Lookup", {"key": "x" * 100_000})]], chunk_size=64)
+    chunks = backend.chunks(backend.script[0])
+    benchmark.pedantic(merge_stream, args=(chunks,), rounds=10, iterations=1)
+
+
+@pytest.mark.slow()
+def test_tool_dispatch_throughput(benchmark):
+    backend = SyntheticBackend([[("Lookup", {"key": f"k{i}"}) for i in range(100)]])
+    message = backend.completion(model="fake", messages=[]).choices[0].message
+    chat = ChatCompletion(model="fake")
+    handlers, orch = chat.build_orch([lookup])
+    tools = Tools.from_expr(orch[DEFAULT_ACTION_SCOPE])
+    benchmark.pedantic(
+        dispatch_tools, args=(chat, message, handlers, orch, tools), rounds=10, iterations=10
+    )
+
+
+@pytest.mark.slow()
+def test_large_tool_arguments_decoding(benchmark):
+    raw = '{"key": "%s"}' % ("x" * 100_000)
+    benchmark.pedantic(lookup.decode_arguments, args=(raw,), rounds=10, iterations=10)
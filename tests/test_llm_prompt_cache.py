@@ -0,0 +1,86 @@
+from agentkit.actions.factories.function import action
+from agentkit.llms.backends import SyntheticBackend
+from agentkit.llms.client.chat import ChatCompletion
+from agentkit.llms.prompt_cache import PromptCache
+from agentkit.utils.tokens import TokenUsageTracker
+from agentkit.utils.tokens import usage_to_dict
+
+
+@action(name="Search")
+def search(query: str):
+    "Search the docs"
+    return "results"
+
+
+@action(name="Add")
+def add(a: int, b: int):
+    "Add two numbers"
+    return a + b
+
+
+class RecordingBackend(SyntheticBackend):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.requests = []
+
+    def completion(self, *args, **kwargs):
+        self.requests.append(kwargs)
+        return super().completion(*args, **kwargs)
+
+
+def run(backend, model, messages):
+    ChatCompletion(model=model, backend=backend, hooks=[PromptCache()])(
+        messages=messages, actions=[search, add]
+    )
+
+
+def test_tools_are_sorted_and_marked_for_anthropic():
+    backend = RecordingBackend([[("Search", {"query": "cache"})], "done"])
+    messages = [
+        {"role": "system", "content": "You are helpful."},
+        {"role": "user", "content": "find it"},
+    ]
+
+    run(backend, "anthropic/claude-3-5-sonnet", messages)
+
+    first, second = backend.requests
+    assert [tool["function"]["name"] for tool in first["tools"]] == ["Add", "Search"]
+    assert first["tools"][-1]["cache_control"] == {"type": "ephemeral"}
+    assert first["messages"][0]["content"][-1]["cache_control"] == {"type": "ephemeral"}
+    assert first["messages"][1]["content"][-1]["text"] == "find it"
+    # The breakpoint moves to the end of the conversation, the history is left untouched
+    assert second["messages"][-1]["content"][-1]["cache_control"] == {"type": "ephemeral"}
+    assert "cache_control" not in second["messages"][1]
+    assert messages[0] == {"role": "system", "content": "You are helpful."}
+
+
+def test_no_markers_for_automatic_caching_providers():
+    backend = RecordingBackend(["done"])
+
+    run(backend, "gpt-4o", [{"role": "system", "content": "You are helpful."}])
+
+    request = backend.requests[0]
+    assert [tool["function"]["name"] for tool in request["tools"]] == ["Add", "Search"]
+    assert "cache_control" not in request["tools"][-1]
+    assert request["messages"][0]["content"] == "You are helpful."
+
+
+def test_cached_tokens_are_tracked():
+    tracker = TokenUsageTracker()
+    tracker.track_usage(
+        {
+            "prompt_tokens": 100,
+            "total_tokens": 110,
+            "prompt_tokens_details": {"cached_tokens": 80},
+        },
+        model="gpt-4o",
+    )
+    tracker.track_usage(
+        {"prompt_tokens": 100, "total_tokens": 110, "cache_read_input_tokens": 60},
+        model="claude",
+    )
+
+    assert tracker.cache_hit_tokens() == 140
+    assert tracker.cache_hit_ratio("gpt-4o") == 0.8
+    usage = {"cache_read_input_tokens": 5, "prompt_tokens_details": {"cached_tokens": 5}}
+    assert usage_to_dict(usage) == {"cache_read_input_tokens": 5}
@@ -0,0 +1,306 @@
+import contextvars
+import threading
+import time
+
+import pytest
+from agentkit.actions.factories.function import action
+from agentkit.llms.backends import CompletionBackend
+from agentkit.llms.backends import SyntheticBackend
+from agentkit.llms.client.chat import ChatCompletion
+from agentkit.llms.resilience import CircuitBreaker
+from agentkit.llms.resilience import CircuitOpenException
+from agentkit.llms.resilience import Hedger
+from agentkit.llms.resilience import ResilientCompletion
+from agentkit.llms.resilience import RetryPolicy
+from agentkit.llms.scheduler import RequestScheduler
+
+
+class TransientError(Exception):
+    status_code = 429
+
+
+class BadRequest(Exception):
+    status_code = 400
+
+
+class FlakyBackend(CompletionBackend):
+    """Fail the first ``failures[model]`` calls of each model, then answer."""
+
+    def __init__(self, failures, error=TransientError, latency=0.0):
+        self.failures = dict(failures)
+        self.error = error
+        self.latency = latency
+        self.calls = []
+        self.synthetic = SyntheticBackend(["ok"])
+
+    def completion(self, *args, **kwargs):
+        model = kwargs["model"]
+        self.calls.append(model)
+        if self.failures.get(model, 0) > 0:
+            self.failures[model] -= 1
+            raise self.error(model)
+        time.sleep(self.latency)
+        return self.synthetic.completion(*args, **kwargs)
+
+
+@action(name="Noop")
+def noop():
+    "Do nothing"
+
+
+def no_sleep(seconds):
+    pass
+
+
+def test_transient_errors_are_retried_with_backoff():
+    backend = FlakyBackend({"primary": 2})
+    delays = []
+    resilience = ResilientCompletion(retry=RetryPolicy(max_attempts=3), sleep=delays.append)
+
+    response = ChatCompletion(model="primary", backend=backend, resilience=resilience)(
+        messages=[{"role": "user", "content": "hi"}], actions=[noop]
+    )
+
+    assert response.choices[0].message.content == "ok"
+    assert backend.calls == ["primary"] * 3
+    assert len(delays) == 2
+    assert all(0 <= delay <= 1.0 for delay in delays)
+    assert resilience.metrics.counts["retries"] == 2
+
+
+def test_fails_over_to_next_model_in_order():
+    backend = FlakyBackend({"primary": 5, "secondary": 5})
+    resilience = ResilientCompletion(
+        retry=RetryPolicy(max_attempts=2),
+        fallback_models=["secondary", "tertiary"],
+        sleep=no_sleep,
+    )
+
+    resilience.call(backend.completion, model="primary", messages=[])
+
+    assert backend.calls == ["primary", "primary", "secondary", "secondary", "tertiary"]
+    assert resilience.metrics.counts["failovers"] == 2
+
+
+def test_non_transient_errors_are_raised_right_away():
+    backend = FlakyBackend({"primary": 1}, error=BadRequest)
+    resilience = ResilientCompletion(fallback_models=["secondary"], sleep=no_sleep)
+
+    with pytest.raises(BadRequest):
+        resilience.call(backend.completion, model="primary", messages=[])
+    assert backend.calls == ["primary"]
+
+
+def test_open_circuit_short_circuits_the_model():
+    backend = FlakyBackend({"primary": 100})
+    resilience = ResilientCompletion(
+        retry=RetryPolicy(max_attempts=1), failure_threshold=2, sleep=no_sleep
+    )
+
+    for _ in range(2):
+        with pytest.raises(TransientError):
+            resilience.call(backend.completion, model="primary", messages=[])
+    with pytest.raises(CircuitOpenException):
+        resilience.call(backend.completion, model="primary", messages=[])
+
+    assert len(backend.calls) == 2
+    assert resilience.metrics.by_model["primary"]["short_circuits"] == 1
+
+
+def test_circuit_half_opens_after_recovery_time():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=1, recovery_time=10, clock=lambda: now[0])
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    now[0] = 10
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+class RecordingBackend(SyntheticBackend):
+    """Record the model, messages and thread of the calls, the ``slow`` model sleeps."""
+
+    def __init__(self, slow="primary"):
+        super().__init__(["ok"])
+        self.slow = slow
+        self.requests = []
+
+    def completion(self, *args, **kwargs):
+        self.requests.append((kwargs["model"], kwargs["messages"], threading.current_thread()))
+        if kwargs["model"] == self.slow:
+            time.sleep(0.2)
+        return super().completion(*args, **kwargs)
+
+
+def test_hedged_request_wins_over_slow_primary():
+    backend = RecordingBackend()
+    hedger = Hedger(delay=0.02, model="hedge")
+    messages = [{"role": "user", "content": "hi"}]
+
+    hedger.call(backend.completion, (), {"model": "primary", "messages": messages})
+    hedger.shutdown()
+
+    assert hedger.metrics.counts["hedge_wins"] == 1
+    (_, hedged, _) = next(call for call in backend.requests if call[0] == "hedge")
+    assert hedged == messages
+    assert hedged is not messages
+
+
+def test_hedges_admitted_after_the_race_are_not_sent():
+    backend = RecordingBackend()
+    gate, finished = threading.Event(), threading.Event()
+
+    def admit(send):
+        def admitted(*args, **kwargs):
+            gate.wait(1)
+            try:
+                return send(*args, **kwargs)
+            finally:
+                finished.set()
+
+        return admitted
+
+    hedger = Hedger(delay=0.02, model="hedge")
+    hedger.call(backend.completion, (), {"model": "primary", "messages": []}, admit=admit)
+    gate.set()
+    assert finished.wait(1)
+    hedger.shutdown()
+
+    assert [model for model, _, _ in backend.requests] == ["primary"]
+    assert hedger.metrics.counts["hedges_cancelled"] == 1
+
+
+def test_requests_are_not_hedged_on_a_busy_pool():
+    backend = RecordingBackend()
+    hedger = Hedger(delay=0.02, model="hedge", max_workers=1)
+
+    hedger.call(backend.completion, (), {"model": "primary", "messages": []})
+
+    assert [(model, thread) for model, _, thread in backend.requests] == [
+        ("primary", threading.current_thread())
+    ]
+    assert hedger.metrics.counts["hedges_skipped"] == 1
+
+
+def test_hedge_delay_follows_observed_latency_percentile():
+    hedger = Hedger(delay=1.0, percentile=0.9, min_samples=10)
+    assert hedger.hedge_delay("m") == 1.0
+
+    hedger.latencies["m"].extend(i / 100 for i in range(1, 11))
+    assert hedger.hedge_delay("m") == pytest.approx(0.1)
+
+
+def test_hedge_on_cheaper_model_bills_both_requests():
+    class SlowPrimaryBackend(SyntheticBackend):
+        def completion(self, *args, **kwargs):
+            if kwargs["model"] == "expensive":
+                time.sleep(0.3)
+            response = super().completion(*args, **kwargs)
+            response.model = kwargs["model"]
+            return response
+
+    backend = SlowPrimaryBackend(["ok"], usage={"total_tokens": 10})
+    hedger = Hedger(delay=0.05, model="cheap")
+    chat = ChatCompletion(model="expensive", backend=backend, hedge=hedger)
+
+    response = chat(messages=[{"role": "user", "content": "hi"}], actions=[noop])
+    hedger.shutdown()
+    time.sleep(0.4)
+
+    assert response.model == "cheap"
+    assert hedger.metrics.counts["hedge_wins"] == 1
+    assert chat.token_usage_tracker.tracker["total_tokens"] == 20
+    assert chat.token_usage_tracker.by_model["expensive"]["total_tokens"] == 10
+
+
+def test_hedges_are_admitted_by_the_scheduler():
+    class RecordingScheduler(RequestScheduler):
+        def __init__(self):
+            super().__init__()
+            self.admitted = []
+
+        def acquire(self, model, cost=0, priority=0, api_key=None):
+            self.admitted.append(model)
+
+    latencies = iter([0.3, 0.0])
+    backend = SyntheticBackend(["ok"], latency=lambda: next(latencies))
+    scheduler = RecordingScheduler()
+    hedger = Hedger(delay=0.05, model="cheap")
+    chat = ChatCompletion(model="expensive", backend=backend, hedge=hedger, scheduler=scheduler)
+
+    chat(messages=[{"role": "user", "content": "hi"}], actions=[noop])
+    hedger.shutdown()
+
+    assert scheduler.admitted == ["expensive", "cheap"]
+
+
+def test_hedged_requests_run_in_the_caller_context():
+    request = contextvars.ContextVar("request", default=None)
+    seen = []
+
+    class ContextBackend(SyntheticBackend):
+        def completion(self, *args, **kwargs):
+            seen.append((kwargs["model"], request.get()))
+            if kwargs["model"] == "primary":
+                time.sleep(0.2)
+            return super().completion(*args, **kwargs)
+
+    discarded = threading.Event()
+
+    def on_discarded(response):
+        seen.append(("discarded", request.get()))
+        discarded.set()
+
+    hedger = Hedger(delay=0.05, model="hedge")
+    request.set("r1")
+    hedger.call(
+        ContextBackend(["ok"], usage={"total_tokens": 1}).completion,
+        (),
+        {"model": "primary", "messages": []},
+        on_discarded=on_discarded,
+    )
+    assert discarded.wait(1)
+    hedger.shutdown()
+
+    assert sorted(seen) == [("discarded", "r1"), ("hedge", "r1"), ("primary", "r1")]
+
+
+def test_non_transient_error_of_the_trial_closes_the_circuit():
+    now = [0.0]
+    backend = FlakyBackend({"primary": 2})
+    resilience = ResilientCompletion(retry=RetryPolicy(max_attempts=1), sleep=no_sleep)
+    resilience.breakers["primary"] = CircuitBreaker(
+        failure_threshold=1, recovery_time=10, clock=lambda: now[0]
+    )
+
+    with pytest.raises(TransientError):
+        resilience.call(backend.completion, model="primary", messages=[])
+    now[0] = 10
+    backend.error = BadRequest
+    with pytest.raises(BadRequest):
+        resilience.call(backend.completion, model="primary", messages=[])
+
+    assert resilience.breakers["primary"].state == CircuitBreaker.CLOSED
+    resilience.call(backend.completion, model="primary", messages=[])
+    assert backend.calls == ["primary"] * 3
+
+
+def test_interrupted_trial_is_released():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=1, recovery_time=10, clock=lambda: now[0])
+    resilience = ResilientCompletion(retry=RetryPolicy(max_attempts=1), sleep=no_sleep)
+    resilience.breakers["primary"] = breaker
+    breaker.record_failure()
+    now[0] = 10
+
+    def interrupted(**kwargs):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        resilience.call(interrupted, model="primary", messages=[])
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.allow()
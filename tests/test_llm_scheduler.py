@@ -0,0 +1,101 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from agentkit.actions.factories.function import action
+from agentkit.llms.backends import SyntheticBackend
+from agentkit.llms.client.chat import ChatCompletion
+from agentkit.llms.scheduler import RequestScheduler
+from agentkit.llms.scheduler import TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_refills_over_a_minute():
+    clock = FakeClock()
+    bucket = TokenBucket(60, clock=clock)
+    bucket.consume(60)
+
+    assert bucket.wait_time(30) == pytest.approx(30)
+    clock.now = 30
+    bucket.refill()
+    assert bucket.wait_time(30) == 0
+
+
+def test_unlimited_models_are_not_queued():
+    scheduler = RequestScheduler()
+    scheduler.acquire("unlimited", cost=10**9)
+
+    assert scheduler.queues == {}
+
+
+def test_requests_wait_for_the_token_budget():
+    scheduler = RequestScheduler()
+    scheduler.set_limit("m", tpm=6000)
+    scheduler.acquire("m", cost=6000)
+
+    started = time.monotonic()
+    scheduler.acquire("m", cost=10)
+
+    assert time.monotonic() - started == pytest.approx(0.1, abs=0.08)
+
+
+def test_waiters_are_served_by_priority():
+    scheduler = RequestScheduler()
+    scheduler.set_limit("m", rpm=600)
+    scheduler.acquire("m")
+    scheduler.limits[("m", None)].requests.level = 0
+    served = []
+
+    def worker(priority):
+        scheduler.acquire("m", priority=priority)
+        served.append(priority)
+
+    threads = [threading.Thread(target=worker, args=(priority,)) for priority in (5, 1, 3)]
+    with scheduler._condition:
+        for thread in threads:
+            thread.start()
+        while len(scheduler.queues[("m", None)]) < 3:
+            scheduler._condition.wait(0.01)
+    for thread in threads:
+        thread.join()
+
+    assert served == [1, 3, 5]
+
+
+def test_async_requests_share_the_limits():
+    scheduler = RequestScheduler()
+    scheduler.set_limit("m", rpm=1200)
+
+    async def request():
+        await scheduler.aacquire("m")
+
+    async def main():
+        started = time.monotonic()
+        await asyncio.gather(*(request() for _ in range(1202)))
+        return time.monotonic() - started
+
+    assert asyncio.run(main()) >= 0.05
+
+
+@action(name="Noop")
+def noop():
+    "Do nothing"
+
+
+def test_completion_reconciles_estimate_with_actual_usage():
+    scheduler = RequestScheduler(clock=FakeClock())
+    scheduler.set_limit("fake", tpm=100_000)
+    backend = SyntheticBackend(["ok"], usage={"total_tokens": 1000})
+    chat = ChatCompletion(model="fake", backend=backend, scheduler=scheduler)
+
+    chat(messages=[{"role": "user", "content": "hi"}], actions=[noop])
+
+    assert scheduler.limits[("fake", None)].tokens.level == 99_000
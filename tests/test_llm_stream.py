@@ -0,0 +1,78 @@
+import pytest
+from agentkit.actions.factories.function import action
+from agentkit.llms import events
+from agentkit.llms.client.chat import ChatCompletion
+from openai.types.chat.chat_completion_chunk import ChatCompletionChunk
+
+
+def chunk(content=None, tool_calls=None, finish_reason=None, usage=None):
+    return ChatCompletionChunk(
+        id="chunk",
+        object="chat.completion.chunk",
+        created=0,
+        model="fake",
+        choices=[
+            {
+                "index": 0,
+                "delta": {"content": content, "tool_calls": tool_calls},
+                "finish_reason": finish_reason,
+            }
+        ],
+        usage=usage,
+    )
+
+
+@action(name="Add", stop=True)
+def add(a: int, b: int):
+    "Add two numbers"
+    return a + b
+
+
+@pytest.fixture()
+def responses(mocker):
+    turns = [
+        [
+            chunk(content="Let me "),
+            chunk(content="compute."),
+            chunk(
+                tool_calls=[
+                    {
+                        "index": 0,
+                        "id": "call_1",
+                        "type": "function",
+                        "function": {"name": "Add", "arguments": '{"a": 1, '},
+                    }
+                ]
+            ),
+            chunk(tool_calls=[{"index": 0, "function": {"arguments": '"b": 2}'}}]),
+            chunk(
+                finish_reason="tool_calls",
+                usage={"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+            ),
+        ]
+    ]
+    return mocker.patch("litellm.completion", side_effect=[iter(turn) for turn in turns])
+
+
+def test_stream_yields_text_before_tool_calls_and_runs_tools(responses):
+    chat = ChatCompletion(model="fake")
+    messages = [{"role": "user", "content": "1 + 2?"}]
+
+    stream = chat(messages=messages, actions=[add], stream=True)
+    received = list(stream)
+
+    assert [type(e) for e in received] == [
+        events.TextDelta,
+        events.TextDelta,
+        events.ToolCallStarted,
+        events.ToolCallArgumentsDelta,
+        events.ToolCallArgumentsDelta,
+        events.ToolResult,
+        events.Usage,
+    ]
+    assert received[2].name == "Add"
+    assert received[5].output == 3
+    assert received[6].usage["total_tokens"] == 15
+    assert messages[1].content == "Let me compute."
+    assert messages[2]["content"] == "3"
+    assert chat.token_usage_tracker.tracker["total_tokens"] == 15
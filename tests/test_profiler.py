@@ -0,0 +1,84 @@
+import json
+
+from agentkit.telemetry import spans
+from agentkit.telemetry.profiler import Profiler
+from agentkit.telemetry.profiler import frame_label
+from agentkit.telemetry.spans import span
+from agentkit.workflow.state import State
+from agentkit.workflow.workflow import Workflow
+
+
+class Traffic(Workflow):
+    green = State(initial=True)
+    yellow = State()
+    red = State()
+
+    cycle = green.to(yellow) | yellow.to(red) | red.to(green)
+
+    def on_cycle(self, event_data):
+        return event_data.target.id
+
+
+def test_records_the_engine_and_callback_call_tree():
+    traffic = Traffic()
+
+    with Profiler() as profiler:
+        traffic.cycle()
+        traffic.cycle()
+
+    assert spans.collector is None
+    stacks = dict(line.rsplit(" ", 1) for line in profiler.collapsed())
+    assert (
+        "workflow.processing_loop(Traffic);workflow.trigger(cycle);"
+        "workflow.callbacks(on);workflow.callback(on_cycle)" in stacks
+    )
+    assert (
+        "workflow.processing_loop(Traffic);workflow.trigger(cycle);"
+        "workflow.callbacks(on);workflow.callback(on_cycle);"
+        "workflow.signature.bind(on_cycle)" in stacks
+    )
+    assert all(int(total) >= 0 for total in stacks.values())
+
+
+def test_self_times_add_up_to_the_root_duration():
+    with Profiler() as profiler:
+        with span("root"):
+            with span("child"):
+                pass
+            with span("child"):
+                pass
+
+    (root,) = (s for s in profiler.spans if s.name == "root")
+    stacks = dict(line.rsplit(" ", 1) for line in profiler.collapsed())
+    assert set(stacks) == {"root", "root;child"}
+    assert sum(int(total) for total in stacks.values()) == root.duration_ns
+
+
+def test_chrome_trace(tmp_path):
+    with Profiler() as profiler:
+        with span("root", event="go"):
+            with span("child"):
+                pass
+
+    path = tmp_path / "trace.json"
+    profiler.write_chrome_trace(str(path))
+    trace = json.loads(path.read_text())
+
+    metadata, *events = trace["traceEvents"]
+    assert metadata["ph"] == "M"
+    assert metadata["args"]["name"] == "MainThread"
+    child, root = events
+    assert root["name"] == "root(go)"
+    assert root["ph"] == child["ph"] == "X"
+    assert root["ts"] == 0
+    assert root["ts"] <= child["ts"] <= child["ts"] + child["dur"] <= root["dur"]
+    assert root["tid"] == child["tid"] == metadata["tid"]
+
+
+def test_frame_labels_cannot_break_collapsed_stacks():
+    with Profiler() as profiler:
+        with span("callback", callback="a;b"):
+            pass
+
+    (recorded,) = profiler.spans
+    assert frame_label(recorded) == "callback(a,b)"
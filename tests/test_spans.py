@@ -0,0 +1,161 @@
+import json
+import logging
+
+import pytest
+from agentkit.actions.factories.function import action
+from agentkit.llms.backends import SyntheticBackend
+from agentkit.llms.client.chat import ChatCompletion
+from agentkit.telemetry import LogExporter
+from agentkit.telemetry import get_parent_run_id
+from agentkit.telemetry import spans
+from agentkit.telemetry import traceable
+from agentkit.telemetry.spans import NOOP_SPAN
+from agentkit.telemetry.spans import Collector
+from agentkit.telemetry.spans import InMemoryCollector
+from agentkit.telemetry.spans import OTLPFileExporter
+from agentkit.telemetry.spans import instrument
+from agentkit.telemetry.spans import span
+from agentkit.workflow.state import State
+from agentkit.workflow.workflow import Workflow
+
+
+class Traffic(Workflow):
+    green = State(initial=True)
+    yellow = State()
+    red = State()
+
+    cycle = green.to(yellow) | yellow.to(red) | red.to(green)
+
+    def on_enter_state(self, target):
+        self.entered = target.id
+
+
+@action(name="Lookup")
+def lookup(key: str):
+    "Look a key up"
+    return key.upper()
+
+
+def test_spans_are_noops_when_disabled():
+    assert spans.collector is None
+    assert span("anything") is NOOP_SPAN
+
+
+def test_collectors_must_handle_the_ended_spans():
+    class Incomplete(Collector):
+        pass
+
+    with pytest.raises(TypeError, match="on_end"):
+        Incomplete()
+
+
+def test_workflow_spans_nest_under_the_trigger():
+    traffic = Traffic()
+
+    with instrument(InMemoryCollector()) as collector:
+        traffic.cycle()
+
+    assert spans.collector is None
+    (trigger,) = collector.by_name("workflow.trigger")
+    assert trigger.attributes == {"event": "cycle"}
+    (loop,) = collector.by_name("workflow.processing_loop")
+    assert trigger.parent_id == loop.span_id
+
+    groups = {s.attributes["group"]: s for s in collector.by_name("workflow.callbacks")}
+    assert {"enter", "exit", "on", "after"} <= set(groups)
+    assert all(s.parent_id == trigger.span_id for s in groups.values())
+    assert all(s.trace_id == loop.trace_id for s in collector.spans)
+
+    summary = collector.summary()
+    assert summary["workflow.trigger"]["count"] == 1
+    assert summary["workflow.trigger"]["errors"] == 0
+
+
+class ListExporter(LogExporter):
+    def __init__(self):
+        self.records = []
+
+    def export(self, batch):
+        self.records.extend(record for _, _, record in batch)
+
+
+def test_traced_runs_are_children_of_spans():
+    exporter = ListExporter()
+
+    @traceable("Inner", logging.getLogger("test_spans"), exporter=exporter)
+    def inner():
+        return get_parent_run_id()
+
+    with instrument(InMemoryCollector()):
+        with span("outer") as outer:
+            run_id = inner()
+
+    (record,) = exporter.records
+    assert record["run_id"] == run_id
+    assert record["parent_run_id"] == outer.span_id
+
+
+def test_failed_spans_record_the_error():
+    with instrument(InMemoryCollector()) as collector:
+        with pytest.raises(ValueError, match="boom"):
+            with span("fail"):
+                raise ValueError("boom")
+
+    (failed,) = collector.spans
+    assert failed.error == "ValueError: boom"
+    assert collector.summary()["fail"]["errors"] == 1
+
+
+def test_completion_spans():
+    backend = SyntheticBackend([[("Lookup", {"key": "a"})], "done"])
+    chat = ChatCompletion(model="fake", backend=backend)
+
+    with instrument(InMemoryCollector()) as collector:
+        chat(messages=[{"role": "user", "content": "go"}], actions=[lookup])
+
+    assert len(collector.by_name("llm.request")) == 2
+    assert len(collector.by_name("llm.response")) == 2
+    (tool,) = collector.by_name("llm.tool")
+    assert tool.attributes["tool"] == "Lookup"
+
+
+def test_otlp_file_exporter(tmp_path):
+    path = tmp_path / "spans.jsonl"
+
+    with instrument(OTLPFileExporter(str(path), batch_size=2)):
+        with span("outer", size=3):
+            with span("inner", ok=True):
+                pass
+        with span("last"):
+            pass
+
+    requests = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(requests) == 2
+    exported = [
+        s
+        for request in requests
+        for resource in request["resourceSpans"]
+        for scope in resource["scopeSpans"]
+        for s in scope["spans"]
+    ]
+    inner, outer, last = exported
+    assert inner["parentSpanId"] == outer["spanId"]
+    assert "parentSpanId" not in outer
+    assert inner["traceId"] == outer["traceId"] != last["traceId"]
+    assert outer["attributes"] == [{"key": "size", "value": {"intValue": "3"}}]
+    assert inner["attributes"] == [{"key": "ok", "value": {"boolValue": True}}]
+
+
+def cycle(traffic):
+    traffic.cycle()
+
+
+@pytest.mark.slow()
+@pytest.mark.parametrize("enabled", [False, True], ids=["disabled", "enabled"])
+def test_trigger_overhead(benchmark, enabled):
+    traffic = Traffic()
+    if not enabled:
+        benchmark(cycle, traffic)
+        return
+    with instrument(InMemoryCollector(max_spans=1000)):
+        benchmark(cycle, traffic)
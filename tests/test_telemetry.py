@@ -0,0 +1,225 @@
+import asyncio
+import itertools
+import logging
+import threading
+
+import pytest
+from agentkit.telemetry import BatchLogExporter
+from agentkit.telemetry import LogExporter
+from agentkit.telemetry import Sampler
+from agentkit.telemetry import get_parent_run_id
+from agentkit.telemetry import traceable
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+        self.threads = set()
+
+    def emit(self, record):
+        self.records.append(record.msg)
+        self.threads.add(threading.current_thread().name)
+
+
+@pytest.fixture()
+def handler():
+    logger = logging.getLogger("test_telemetry")
+    logger.setLevel(logging.INFO)
+    handler = ListHandler()
+    logger.addHandler(handler)
+    yield handler
+    logger.removeHandler(handler)
+
+
+@pytest.fixture()
+def logger(handler):
+    return logging.getLogger("test_telemetry")
+
+
+def fixed_random(*values):
+    values = itertools.cycle(values)
+    return lambda: next(values)
+
+
+def test_records_inputs_outputs_and_metadata(logger, handler):
+    @traceable("Add", logger, metadata={"team": "a"}, exporter=LogExporter())
+    def add(a, b=2, **extra):
+        return a + b
+
+    assert add(1, c=3, logging_extra={"request": "r"}) == 3
+
+    (record,) = handler.records
+    assert record["inputs"] == {"a": 1, "b": 2, "c": 3}
+    assert record["outputs"] == 3
+    assert record["team"] == "a"
+    assert record["request"] == "r"
+    assert record["parent_run_id"] is None
+
+
+def test_errors_are_formatted_by_the_exporter(logger, handler):
+    @traceable("Fail", logger, exporter=LogExporter())
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError, match="boom"):
+        fail()
+
+    (record,) = handler.records
+    assert "Traceback" in record["error"]
+    assert "ValueError: boom" in record["error"]
+
+
+def test_nested_runs_share_the_trace(logger, handler):
+    exporter = LogExporter()
+
+    @traceable("Inner", logger, exporter=exporter)
+    def inner():
+        return get_parent_run_id()
+
+    @traceable("Outer", logger, exporter=exporter)
+    def outer():
+        return inner()
+
+    inner_run_id = outer()
+
+    inner_record, outer_record = handler.records
+    assert inner_record["run_id"] == inner_run_id
+    assert inner_record["parent_run_id"] == outer_record["run_id"]
+    assert get_parent_run_id() is None
+
+
+def test_head_sampling_skips_whole_traces(logger, handler):
+    sampler = Sampler(rate=0.5, random=fixed_random(0.9, 0.1))
+    exporter = LogExporter()
+
+    @traceable("Inner", logger, sampler=sampler, exporter=exporter)
+    def inner():
+        return 1
+
+    @traceable("Outer", logger, sampler=sampler, exporter=exporter)
+    def outer():
+        return inner()
+
+    outer()
+    assert handler.records == []
+
+    outer()
+    assert [record["name"] for record in handler.records] == ["Inner", "Outer"]
+
+
+def test_tail_sampling_keeps_errors_and_slow_runs(logger, handler):
+    sampler = Sampler(tail_rate=0.0, slow_threshold=0.05)
+
+    @traceable("Run", logger, sampler=sampler, exporter=LogExporter())
+    def run(seconds=0.0, fail=False):
+        asyncio.run(asyncio.sleep(seconds))
+        if fail:
+            raise ValueError("failed")
+
+    run()
+    run(seconds=0.06)
+    with pytest.raises(ValueError, match="failed"):
+        run(fail=True)
+
+    assert [record["inputs"] for record in handler.records] == [
+        {"seconds": 0.06, "fail": False},
+        {"seconds": 0.0, "fail": True},
+    ]
+
+
+def test_batch_exporter_logs_from_a_background_thread(logger, handler):
+    exporter = BatchLogExporter(batch_size=10, flush_interval=0.01)
+
+    @traceable("Double", logger, exporter=exporter)
+    def double(x):
+        return x * 2
+
+    for i in range(25):
+        double(i)
+    assert exporter.flush(timeout=5)
+
+    assert [record["outputs"] for record in handler.records] == [i * 2 for i in range(25)]
+    assert handler.threads == {"agentkit-trace-exporter"}
+
+
+def test_records_are_logged_synchronously_by_default(logger, handler):
+    @traceable("Double", logger)
+    def double(x):
+        return x * 2
+
+    double(2)
+
+    assert [record["outputs"] for record in handler.records] == [4]
+    assert handler.threads == {threading.current_thread().name}
+
+
+def test_batch_exporter_records_the_values_at_call_time(logger, handler):
+    exporter = BatchLogExporter(flush_interval=0.01)
+    release = threading.Event()
+    export = exporter.export
+    exporter.export = lambda batch: release.wait(5) and export(batch)
+
+    @traceable("Append", logger, exporter=exporter)
+    def append(items, item):
+        items.append(item)
+        return items
+
+    items = append([], 1)
+    items.append(2)
+    release.set()
+    assert exporter.flush(timeout=5)
+
+    (record,) = handler.records
+    assert record["inputs"]["items"] == [1]
+    assert record["outputs"] == [1]
+
+
+def test_batch_exporter_drops_records_when_full(logger, handler):
+    exporter = BatchLogExporter(max_queue_size=2)
+    release = threading.Event()
+    exporter.export = lambda batch: release.wait(5)
+
+    for _ in range(5):
+        exporter.submit(logger, logging.INFO, {})
+    release.set()
+
+    assert exporter.dropped >= 2
+
+
+def test_async_functions_are_recorded_once_awaited(logger, handler):
+    @traceable("Sleep", logger, exporter=LogExporter())
+    async def sleep(seconds):
+        await asyncio.sleep(seconds)
+        return seconds
+
+    assert asyncio.run(sleep(0.01)) == 0.01
+    assert handler.records[0]["outputs"] == 0.01
+
+
+def test_generators_are_recorded_once_exhausted(logger, handler):
+    @traceable("Count", logger, exporter=LogExporter())
+    def count(n):
+        for _ in range(n):
+            yield get_parent_run_id()
+
+    run_ids = list(count(2))
+
+    (record,) = handler.records
+    assert record["inputs"] == {"n": 2}
+    assert record["outputs"] == run_ids == [record["run_id"]] * 2
+    assert get_parent_run_id() is None
+
+
+def add(a, b=1):
+    return a + b
+
+
+@pytest.mark.slow()
+@pytest.mark.parametrize("rate", [1.0, 0.0], ids=["sampled", "unsampled"])
+def test_traceable_overhead(benchmark, rate):
+    logger = logging.getLogger("test_traceable_overhead")
+    logger.propagate = False
+    traced = traceable("Add", logger, sampler=Sampler(rate=rate), exporter=BatchLogExporter())(add)
+
+    benchmark(traced, 1, b=2)
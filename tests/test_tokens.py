@@ -0,0 +1,43 @@
+import pytest
+from agentkit.utils.tokens import TokenUsageTracker
+from agentkit.utils.tokens import TokenUsageTrackerException
+
+
+def test_track_usage_accumulates_in_place_per_model_and_workflow():
+    tracker = TokenUsageTracker()
+    counter = tracker.tracker
+
+    tracker.track_usage({"prompt_tokens": 3, "total_tokens": 5}, model="a")
+    with tracker.workflow("nightly"):
+        tracker.track_usage({"prompt_tokens": 1, "total_tokens": 2}, model="b")
+
+    assert tracker.tracker is counter
+    assert tracker.tracker["total_tokens"] == 7
+    assert tracker.by_model["a"]["total_tokens"] == 5
+    assert dict(tracker.by_workflow) == {"nightly": {"prompt_tokens": 1, "total_tokens": 2}}
+
+
+def test_track_usage_ignores_non_integer_fields():
+    tracker = TokenUsageTracker()
+    tracker.track_usage({"total_tokens": 4, "prompt_tokens_details": None})
+
+    assert dict(tracker.tracker) == {"total_tokens": 4}
+
+
+def test_estimates_are_cached_per_message(mocker):
+    counter = mocker.patch("agentkit.utils.tokens.count_message_tokens", return_value=7)
+    tracker = TokenUsageTracker()
+    messages = [{"role": "user", "content": "hi"}]
+
+    assert tracker.estimate(messages) == 7
+    messages.append({"role": "assistant", "content": "hello"})
+    assert tracker.estimate(messages) == 14
+    assert counter.call_count == 2
+
+
+def test_preflight_raises_before_the_request_is_sent():
+    tracker = TokenUsageTracker(budget=10)
+    tracker.track_usage({"total_tokens": 8})
+
+    with pytest.raises(TokenUsageTrackerException, match="would be exceeded"):
+        tracker.preflight([{"role": "user", "content": "a rather long question " * 5}])
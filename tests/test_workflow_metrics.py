@@ -0,0 +1,172 @@
+import asyncio
+import urllib.request
+
+import pytest
+from agentkit.utils.workflow import qualname
+from agentkit.workflow import metrics
+from agentkit.workflow.exceptions import TransitionNotAllowed
+from agentkit.workflow.metrics import Histogram
+from agentkit.workflow.state import State
+from agentkit.workflow.workflow import Workflow
+
+
+class Door(Workflow):
+    closed = State(initial=True)
+    opened = State()
+
+    open = closed.to(opened, cond="unlocked") | closed.to(closed)
+    close = opened.to(closed)
+
+    def __init__(self, unlocked=True):
+        self.unlocked = unlocked
+        super().__init__()
+
+
+class AsyncDoor(Workflow):
+    closed = State(initial=True)
+    opened = State()
+
+    open = closed.to(opened)
+    close = opened.to(closed)
+
+    async def on_open(self):
+        await asyncio.sleep(0)
+
+
+class Chain(Workflow):
+    a = State(initial=True)
+    b = State()
+    c = State()
+
+    go = a.to(b)
+    then = b.to(c)
+
+    def after_go(self):
+        # Queued while the current event is processed
+        self.then()
+
+
+@pytest.fixture(autouse=True)
+def _reset_metrics():
+    metrics.registry.reset()
+
+
+def test_histogram_buckets_are_inclusive():
+    histogram = Histogram(buckets=(10, 100))
+    for duration in (5, 10, 11, 100, 1000):
+        histogram.observe(duration)
+
+    assert histogram.counts == [2, 2, 1]
+    assert histogram.cumulative() == [2, 4, 5]
+    assert histogram.sum == 1126
+
+
+def test_events_and_transitions_are_counted_by_class():
+    door = Door()
+    door.open()
+    door.close()
+    Door(unlocked=False).open()
+
+    assert metrics.registry.workflow(Door).events == {"open": 2, "close": 1}
+    assert metrics.registry.workflow(Door).event_latency["open"].count == 2
+    assert set(metrics.registry.workflow(Door).transition_latency) == {
+        ("open", "closed", "opened"),
+        ("open", "closed", "closed"),
+        ("close", "opened", "closed"),
+    }
+    assert metrics.registry.workflow(Door).guard_rejections == {("open", "closed", "opened"): 1}
+
+
+def test_transitions_not_allowed_are_counted():
+    door = Door()
+    with pytest.raises(TransitionNotAllowed):
+        door.close()
+
+    assert metrics.registry.workflow(Door).not_allowed == {("close", "closed"): 1}
+    assert metrics.registry.workflow(Door).events == {"close": 1}
+
+
+def test_events_and_handlers_named_metrics_are_kept():
+    class Report(Workflow):
+        draft = State(initial=True)
+        published = State(final=True)
+
+        metrics = draft.to(published)
+
+        def on_metrics(self):
+            return "published"
+
+    assert Report().metrics() == "published"
+    assert Report().send("metrics") == "published"
+    assert metrics.registry.workflow(Report).events == {"metrics": 2}
+
+
+def test_classes_with_the_same_name_are_labelled_apart():
+    class Other(Door):
+        __module__ = "elsewhere"
+
+    Other.__name__ = "Door"
+    Door().open()
+    Other().open()
+
+    text = metrics.to_prometheus()
+    assert f'workflow="{qualname(Door)}",event="open"}} 1' in text
+    assert 'workflow="elsewhere.Door",event="open"} 1' in text
+
+
+def test_async_engine_records_the_events():
+    async def main():
+        door = AsyncDoor()
+        await door.activate_initial_state()
+        await door.open()
+
+    asyncio.run(main())
+
+    door_metrics = metrics.registry.workflow(AsyncDoor)
+    assert door_metrics.events == {"open": 1}
+    assert door_metrics.transition_latency[("open", "closed", "opened")].count == 1
+
+
+def test_queue_high_water_mark():
+    Chain().go()
+
+    assert metrics.registry.workflow(Chain).queue_high_water == 1
+    assert metrics.registry.workflow(Chain).events == {"go": 1, "then": 1}
+
+
+def test_prometheus_text_format():
+    door = Door()
+    door.open()
+    with pytest.raises(TransitionNotAllowed):
+        door.open()
+
+    text = metrics.to_prometheus()
+    workflow = f'workflow="{qualname(Door)}"'
+
+    assert "# TYPE agentkit_workflow_events_total counter" in text
+    assert f'agentkit_workflow_events_total{{{workflow},event="open"}} 2' in text
+    assert "# TYPE agentkit_workflow_event_duration_seconds histogram" in text
+    assert (
+        f'agentkit_workflow_event_duration_seconds_bucket{{{workflow},event="open",le="+Inf"}} 2'
+        in text
+    )
+    assert f'agentkit_workflow_event_duration_seconds_count{{{workflow},event="open"}} 2' in text
+    assert (
+        "agentkit_workflow_transitions_not_allowed_total"
+        f'{{{workflow},event="open",state="opened"}} 1' in text
+    )
+    assert "agentkit_workflow_guard_rejections_total" not in text
+
+
+def test_metrics_endpoint():
+    Door().open()
+    server = metrics.serve(port=0)
+    try:
+        host, port = server.server_address
+        with urllib.request.urlopen(f"http://{host}:{port}/metrics") as response:
+            body = response.read().decode()
+    finally:
+        server.shutdown()
+
+    assert body == metrics.to_prometheus()
+    assert 'event="open"' in body